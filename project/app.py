@@ -1,23 +1,33 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask import Flask, request, jsonify, render_template, session, redirect, url_for, Response, stream_with_context, make_response
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+import hashlib
+import io
 import json
 import os
 from datetime import datetime, timedelta
-import requests
+import httpx
 import uuid
+import time
 from functools import wraps
 import re
-import numpy as np
-import cv2
-import pandas as pd
-import tensorflow as tf
-from keras.models import Sequential
-from keras.layers import Dense, Conv2D, MaxPooling2D, Flatten, LSTM
 import logging
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+from storage import open_storage, StorageError, DuplicateEmailError, CHAT_PAGE_SIZE
+from llm_gateway import get_gateway, GatewayOverloaded
+from response_cache import ResponseCache, health_bucket
+from prompt_context import PromptBuilder
+from health_series import HealthSeries, METRICS, RESOLUTIONS, default_range, parse_time, to_json_list
+from risk import calculate_health_risk, score_records, read_csv_records, read_json_records, csv_lines, ndjson_lines
+from recommender import get_recommender, profile_features, profile_key, rule_recommendations
+from symptom_index import get_symptom_index, SymptomIndexError, UnknownSymptomError, METHODS as SYMPTOM_METHODS
+from jobs import JobQueue
+from inference import InferenceService
+from user_cache import UserDataCache
+from metrics import instrument_app, observe, register_gauge, timed, histogram
+from log_pipeline import configure_logging
+
+# JSON-lines logging through a background writer thread (see log_pipeline.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -25,43 +35,40 @@ app.secret_key = 'healthcare_secret_key_2024'
 app.config['UPLOAD_FOLDER'] = 'Uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Per-route and per-subsystem latency histograms at /metrics (see metrics.py)
+instrument_app(app)
+
 # Ensure directories exist
 os.makedirs('data', exist_ok=True)
 os.makedirs('uploads', exist_ok=True)
 os.makedirs('datasets', exist_ok=True)
 os.makedirs('models', exist_ok=True)
 
-# Data file paths
-USERS_FILE = 'data/users.json'
-HEALTH_DATA_FILE = 'data/health_data.json'
-CHAT_HISTORY_FILE = 'data/chat_history.json'
-RECOMMENDATIONS_FILE = 'data/recommendations.json'
+# Keyed per-user storage (SQLite by default, see storage.py)
+storage = open_storage()
 
-def load_json_file(filepath, default=None):
-    """Load JSON file with error handling"""
-    if default is None:
-        default = {}
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                return json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Corrupted JSON file {filepath}: {str(e)}")
-        return default
-    except Exception as e:
-        logger.error(f"Error loading {filepath}: {str(e)}")
-        return default
+# Answers to repeated questions, shared between similar health profiles
+response_cache = ResponseCache.from_env()
 
-def save_json_file(filepath, data):
-    """Save data to JSON file"""
-    try:
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
-        logger.debug(f"Successfully saved data to {filepath}")
-        return True
-    except Exception as e:
-        logger.error(f"Error saving {filepath}: {str(e)}")
-        return False
+# Health summary, recent turns and reusable Ollama context for chat prompts
+prompt_builder = PromptBuilder.from_env()
+PROMPT_TOKENS = histogram('ollama_prompt_tokens', 'Prompt tokens evaluated per chat request',
+                          ('context',), (32, 64, 128, 256, 512, 1024, 2048, 4096))
+
+# Users' page data, reloaded only when their storage version changes
+user_cache = UserDataCache.from_env(storage)
+
+# History of every health reading, with daily/weekly rollups for the charts
+health_series = HealthSeries(storage)
+
+# Durable queue for work that does not need to hold up the request (see jobs.py)
+job_queue = JobQueue.from_env()
+register_gauge('background_jobs', 'Background jobs by status', ('status',),
+               lambda: {(status,): count for status, count in job_queue.counts().items()})
+
+# Trained models, loaded on first use and micro-batched per model (see inference.py)
+inference = InferenceService.from_env()
+register_gauge('inference_queue_depth', 'Requests waiting for a model batch', ('model',), inference.queue_depths)
 
 def login_required(f):
     """Decorator to require login for protected routes"""
@@ -73,153 +80,265 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def get_ollama_response(prompt, context=""):
-    try:
-        ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:5001")
-        ollama_url = f"{ollama_host}/api/generate"
-        # ... rest of the function remains unchanged
-        
-        health_context = """You are a healthcare assistant AI. Provide helpful, accurate health advice while always recommending users consult healthcare professionals for serious concerns. Be supportive, informative, and encouraging about healthy lifestyle choices."""
-        
-        full_prompt = f"{health_context}\n\nContext: {context}\n\nUser: {prompt}\n\nAssistant:"
-        
-        payload = {
-            "model": "llama2",
-            "prompt": full_prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9
-            }
+OLLAMA_MODEL = 'llama2'
+OLLAMA_UNAVAILABLE_MESSAGE = "I'm sorry, the AI assistant is temporarily unavailable. Please consult a healthcare professional for urgent concerns or try again later."
+
+def build_ollama_request(chat_prompt, stream=False):
+    """Return the Ollama generate payload for a prompt from prompt_builder.build"""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": chat_prompt['prompt'],
+        "stream": stream,
+        "keep_alive": prompt_builder.keep_alive,
+        "options": {
+            "temperature": 0.7,
+            "top_p": 0.9
         }
-        
-        logger.debug(f"Sending request to Ollama: URL={ollama_url}, Payload={payload}")
-        response = requests.post(ollama_url, json=payload, timeout=240)
-        response.raise_for_status()
-        response_data = response.json()
-        logger.debug(f"Ollama response: {response_data}")
+    }
+    if chat_prompt['system']:
+        payload['system'] = chat_prompt['system']
+    if chat_prompt['context']:
+        payload['context'] = chat_prompt['context']
+    return payload
+
+def describe_ollama_request(payload):
+    """Loggable summary of a generate payload, without the prompt text"""
+    return (f"model={payload['model']}, stream={payload['stream']}, prompt_chars={len(payload['prompt'])}, "
+            f"system={'system' in payload}, context_tokens={len(payload.get('context') or ())}")
+
+def record_usage(usage, response_data, chat_prompt):
+    """Copy Ollama's token counts, timings and context into usage, then log and export them"""
+    usage.update({
+        'prompt_tokens': response_data.get('prompt_eval_count', 0),
+        'prompt_eval_ms': round(response_data.get('prompt_eval_duration', 0) / 1e6, 1),
+        'eval_tokens': response_data.get('eval_count', 0),
+        'eval_ms': round(response_data.get('eval_duration', 0) / 1e6, 1),
+        'context_reused': chat_prompt['context'] is not None,
+        'turns': chat_prompt['turns'],
+        'context': response_data.get('context'),
+    })
+    observe('ollama', 'prompt_eval', usage['prompt_eval_ms'] / 1000)
+    observe('ollama', 'eval', usage['eval_ms'] / 1000)
+    PROMPT_TOKENS.observe(usage['prompt_tokens'], 'reused' if usage['context_reused'] else 'fresh')
+    logger.info(f"Ollama usage: prompt_tokens={usage['prompt_tokens']} (estimated {chat_prompt['estimated_tokens']}), "
+                f"prompt_eval={usage['prompt_eval_ms']}ms, eval_tokens={usage['eval_tokens']}, "
+                f"eval={usage['eval_ms']}ms, turns={usage['turns']}, context_reused={usage['context_reused']}")
+
+@timed('ollama', 'generate')
+def get_ollama_response(chat_prompt, cache_key=None, usage=None):
+    """Return Ollama's answer, caching it under cache_key (prompt, bucket) on success"""
+    gateway = get_gateway()
+    payload = build_ollama_request(chat_prompt)
+    try:
+        logger.debug(f"Sending request to Ollama: URL={gateway.base_url}/api/generate, {describe_ollama_request(payload)}")
+        response_data = gateway.post('/api/generate', payload)
+        logger.debug(f"Ollama response: {len(response_data.get('response') or '')} chars, done={response_data.get('done')}")
+        if usage is not None:
+            record_usage(usage, response_data, chat_prompt)
+        if cache_key and response_data.get('response'):
+            response_cache.put(*cache_key, response_data['response'])
         return response_data.get('response', 'Sorry, I could not process your request.')
-    except requests.exceptions.ConnectionError:
-        logger.error(f"Failed to connect to Ollama server at {ollama_url}. Ensure 'ollama serve' is running.")
-        return "I'm sorry, the AI assistant is temporarily unavailable. Please consult a healthcare professional for urgent concerns or try again later."
-    except requests.exceptions.Timeout:
-        logger.error(f"Ollama request timed out at {ollama_url}.")
-        return "I'm sorry, the AI assistant is temporarily unavailable. Please consult a healthcare professional for urgent concerns or try again later."
-    except requests.exceptions.HTTPError as e:
+    except GatewayOverloaded:
+        raise
+    except httpx.ConnectError:
+        logger.error(f"Failed to connect to Ollama server at {gateway.base_url}. Ensure 'ollama serve' is running.")
+        return OLLAMA_UNAVAILABLE_MESSAGE
+    except httpx.TimeoutException:
+        logger.error(f"Ollama request timed out at {gateway.base_url}.")
+        return OLLAMA_UNAVAILABLE_MESSAGE
+    except httpx.HTTPStatusError as e:
         logger.error(f"Ollama HTTP error: {e.response.status_code} - {e.response.text}")
         return f"Chatbot error: HTTP {e.response.status_code}. Please try again."
     except Exception as e:
         logger.error(f"Unexpected error in get_ollama_response: {str(e)}")
-        return "I'm sorry, the AI assistant is temporarily unavailable. Please consult a healthcare professional for urgent concerns or try again later."
-
-def calculate_health_risk(health_data):
-    """Calculate health risk level based on health metrics"""
-    risk_score = 0
-    
-    if 'weight' in health_data and 'height' in health_data:
-        weight = float(health_data['weight'])
-        height = float(health_data['height']) / 100
-        bmi = weight / (height * height)
-        
-        if bmi < 18.5 or bmi > 30:
-            risk_score += 2
-        elif bmi > 25:
-            risk_score += 1
-    
-    if 'blood_pressure_systolic' in health_data:
-        systolic = int(health_data['blood_pressure_systolic'])
-        if systolic > 140:
-            risk_score += 3
-        elif systolic > 130:
-            risk_score += 2
-        elif systolic > 120:
-            risk_score += 1
-    
-    if 'heart_rate' in health_data:
-        heart_rate = int(health_data['heart_rate'])
-        if heart_rate > 100 or heart_rate < 60:
-            risk_score += 1
-    
-    if 'glucose_level' in health_data:
-        glucose = int(health_data['glucose_level'])
-        if glucose > 140:
-            risk_score += 3
-        elif glucose > 126:
-            risk_score += 2
-        elif glucose > 100:
-            risk_score += 1
-    
-    if risk_score >= 6:
-        return "High"
-    elif risk_score >= 3:
-        return "Medium"
-    else:
-        return "Low"
+        return OLLAMA_UNAVAILABLE_MESSAGE
+
+def stream_ollama_response(chat_prompt, cache_key=None, usage=None):
+    """Start a streaming generation and return an iterator over its tokens
+
+    Raises GatewayOverloaded up front, before any token is produced.
+    """
+    gateway = get_gateway()
+    payload = build_ollama_request(chat_prompt, stream=True)
+    logger.debug(f"Streaming request to Ollama: URL={gateway.base_url}/api/generate, {describe_ollama_request(payload)}")
+    return relay_ollama_tokens(gateway.stream('/api/generate', payload), gateway.base_url, cache_key,
+                               chat_prompt, usage)
+
+def relay_ollama_tokens(chunks, ollama_host, cache_key=None, chat_prompt=None, usage=None):
+    """Yield response tokens from Ollama stream chunks as they arrive"""
+    started = time.perf_counter()
+    first_token_at = None
+    token_count = 0
+    tokens = []
+    try:
+        for chunk in chunks:
+            token = chunk.get('response', '')
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                token_count += 1
+                tokens.append(token)
+                yield token
+            if chunk.get('done'):
+                token_count = chunk.get('eval_count', token_count)
+                if usage is not None and chat_prompt is not None:
+                    record_usage(usage, chunk, chat_prompt)
+                if cache_key and tokens:
+                    response_cache.put(*cache_key, ''.join(tokens))
+    except httpx.ConnectError:
+        logger.error(f"Failed to connect to Ollama server at {ollama_host}. Ensure 'ollama serve' is running.")
+        if first_token_at is None:
+            yield OLLAMA_UNAVAILABLE_MESSAGE
+    except httpx.TimeoutException:
+        logger.error(f"Ollama stream timed out at {ollama_host}.")
+        if first_token_at is None:
+            yield OLLAMA_UNAVAILABLE_MESSAGE
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Ollama HTTP error: {e.response.status_code} - {e.response.text}")
+        yield f"Chatbot error: HTTP {e.response.status_code}. Please try again."
+    except GatewayOverloaded:
+        logger.warning("Ollama stream shed while waiting for a gateway slot")
+        if first_token_at is None:
+            yield OLLAMA_UNAVAILABLE_MESSAGE
+    except Exception as e:
+        logger.error(f"Unexpected error in relay_ollama_tokens: {str(e)}")
+        if first_token_at is None:
+            yield OLLAMA_UNAVAILABLE_MESSAGE
+    finally:
+        chunks.close()
+        finished = time.perf_counter()
+        observe('ollama', 'stream', finished - started)
+        if first_token_at is not None:
+            observe('ollama', 'first_token', first_token_at - started)
+            generation_time = finished - first_token_at
+            tokens_per_sec = token_count / generation_time if generation_time > 0 else 0.0
+            logger.info(f"Ollama stream finished: time_to_first_token={first_token_at - started:.3f}s, "
+                        f"tokens={token_count}, tokens_per_sec={tokens_per_sec:.1f}, total={finished - started:.3f}s")
 
 def generate_recommendations(user_id, health_data):
     """Generate personalized recommendations based on health data"""
-    recommendations = {
-        'diet': [],
-        'exercise': [],
-        'lifestyle': []
-    }
-    
-    if 'weight' in health_data and 'height' in health_data:
-        weight = float(health_data['weight'])
-        height = float(health_data['height']) / 100
-        bmi = weight / (height * height)
-        
-        if bmi > 25:
-            recommendations['diet'].extend([
-                "Reduce caloric intake by 300-500 calories per day",
-                "Increase fiber intake with whole grains and vegetables",
-                "Limit processed foods and added sugars"
-            ])
-            recommendations['exercise'].extend([
-                "30 minutes of cardio exercise 5 times per week",
-                "Include strength training 2-3 times per week"
-            ])
-        elif bmi < 18.5:
-            recommendations['diet'].extend([
-                "Increase healthy caloric intake",
-                "Include protein-rich foods in every meal",
-                "Add healthy fats like nuts and avocados"
-            ])
-    
-    if 'blood_pressure_systolic' in health_data:
-        systolic = int(health_data['blood_pressure_systolic'])
-        if systolic > 130:
-            recommendations['diet'].extend([
-                "Reduce sodium intake to less than 2300mg per day",
-                "Increase potassium-rich foods like bananas and spinach"
-            ])
-            recommendations['lifestyle'].extend([
-                "Practice stress management techniques",
-                "Ensure 7-8 hours of quality sleep"
-            ])
-    
-    if 'glucose_level' in health_data:
-        glucose = int(health_data['glucose_level'])
-        if glucose > 100:
-            recommendations['diet'].extend([
-                "Choose low glycemic index foods",
-                "Limit refined carbohydrates and sugary drinks",
-                "Include cinnamon and other blood sugar-friendly spices"
-            ])
-            recommendations['exercise'].extend([
-                "Regular post-meal walks",
-                "Include resistance training to improve insulin sensitivity"
-            ])
-    
-    all_recommendations = load_json_file(RECOMMENDATIONS_FILE, {})
-    all_recommendations[user_id] = {
+    user_info = storage.get('users', user_id, {})
+    features = profile_features(user_info, health_data)
+    key = profile_key(features)
+    recommender = get_recommender()
+    source = f"knn:{recommender.fingerprint}" if recommender else 'rules'
+
+    # Reuse the stored result until the user's metrics (or the datasets) change
+    cached = storage.get('recommendations', user_id)
+    if cached and cached.get('profile_key') == key and cached.get('source') == source:
+        return cached['recommendations']
+
+    if recommender:
+        recommendations = recommender.recommend(features, health_data)
+    else:
+        recommendations = rule_recommendations(health_data)
+
+    storage.put('recommendations', user_id, {
         'recommendations': recommendations,
-        'generated_at': datetime.now().isoformat()
-    }
-    save_json_file(RECOMMENDATIONS_FILE, all_recommendations)
+        'generated_at': datetime.now().isoformat(),
+        'profile_key': key,
+        'source': source
+    })
     
     return recommendations
 
+HEALTH_UPDATE_POINTS = 10
+
+# Points owed for saved health data live in the 'job_outbox' table, written in
+# the same transaction as the reading; the job only wakes a worker to apply them
+def record_health_update(user_id):
+    """Add one update's points to the user's outbox entry; call inside the saving transaction"""
+    pending = storage.get('job_outbox', user_id) or {'points': 0, 'updates': 0}
+    pending['points'] += HEALTH_UPDATE_POINTS
+    pending['updates'] += 1
+    storage.put('job_outbox', user_id, pending)
+
+def enqueue_health_update(user_id):
+    """Queue the job that applies the user's outbox; returns the job id, or None if the queue failed"""
+    try:
+        return job_queue.enqueue('health_update', user_id)
+    except Exception as e:
+        # The outbox entry stays, so the next save or the hourly sweep queues it again
+        logger.error(f"Could not queue health update for user_id: {user_id}: {str(e)}")
+        return None
+
+def enqueue_pending_health_updates():
+    """Queue a job for every outbox entry left behind by a failed enqueue"""
+    for user_id in storage.load_all('job_outbox'):
+        enqueue_health_update(user_id)
+
+def process_health_update(user_id, payload, job_id):
+    """Regenerate recommendations and award the points in the user's outbox"""
+    with storage.transaction():
+        user_health = storage.get('health_data', user_id, {})
+        recommendations = generate_recommendations(user_id, user_health)
+        # Consumed in this transaction, so a job that runs twice awards the points once
+        pending = storage.get('job_outbox', user_id) or {'points': 0, 'updates': 0}
+        if pending['updates']:
+            storage.delete('job_outbox', user_id)
+            user_info = storage.get('users', user_id)
+            if user_info is not None:
+                user_info['points'] = user_info.get('points', 0) + pending['points']
+                storage.put('users', user_id, user_info)
+    return {'recommendations': recommendations, 'points_earned': pending['points'], 'updates': pending['updates']}
+
+job_queue.register('health_update', process_health_update)
+job_queue.add_maintenance(enqueue_pending_health_updates)
+
+@app.before_request
+def start_job_workers():
+    # Idempotent; also restarts the workers in a forked server process
+    job_queue.start()
+
+def build_fingerprint():
+    """Changes when the code or templates are deployed, so cached pages are not reused across versions"""
+    digest = hashlib.sha1()
+    paths = [os.path.abspath(__file__)]
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        paths.extend(os.path.join(root, name) for name in files)
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:12]
+
+APP_BUILD = build_fingerprint()
+
+def conditional_response(user_id, name, build):
+    """Answer 304 if the client's copy of this view of the user's data is current, else build(docs)
+
+    The ETag combines the user's storage version with the view name and
+    APP_BUILD, so checking it costs one version lookup and no document loads.
+    Backends whose versions miss other processes' writes (JSON) always build.
+    """
+    if not storage.shared_versions:
+        response = make_response(build(user_cache.documents(user_id)))
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    version, updated_at = user_cache.version(user_id)
+    etag = hashlib.sha1(f"{user_id}:{version}:{updated_at}:{name}:{APP_BUILD}".encode()).hexdigest()[:24]
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = bool(updated_at and request.if_modified_since
+                     and updated_at.replace(microsecond=0) <= request.if_modified_since)
+    if fresh:
+        response = app.response_class(status=304)
+    else:
+        response = make_response(build(user_cache.documents(user_id, version=version)))
+    response.set_etag(etag)
+    if updated_at:
+        response.last_modified = updated_at
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.errorhandler(GatewayOverloaded)
+def handle_gateway_overloaded(e):
+    logger.warning(f"LLM gateway overloaded, shedding request: {get_gateway().metrics()}")
+    response = jsonify({'success': False, 'message': str(e)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
 @app.route('/')
 def index():
     if 'user_id' in session:
@@ -245,14 +364,8 @@ def signup():
         if not re.match(email_pattern, data['email']):
             return jsonify({'success': False, 'message': 'Invalid email format'})
         
-        users = load_json_file(USERS_FILE, {})
-        
-        for user_id, user_info in users.items():
-            if user_info['email'] == data['email']:
-                return jsonify({'success': False, 'message': 'Email already registered'})
-        
         user_id = str(uuid.uuid4())
-        users[user_id] = {
+        user_info = {
             'name': data['name'].strip(),
             'email': data['email'].strip(),
             'phone': data['phone'].strip(),
@@ -263,9 +376,13 @@ def signup():
             'points': 0
         }
         
-        if save_json_file(USERS_FILE, users):
+        try:
+            storage.create_user(user_id, user_info)
             return jsonify({'success': True, 'message': 'Account created successfully'})
-        else:
+        except DuplicateEmailError:
+            return jsonify({'success': False, 'message': 'Email already registered'})
+        except StorageError as e:
+            logger.error(f"Error creating account: {str(e)}")
             return jsonify({'success': False, 'message': 'Failed to create account'})
     
     return render_template('signup.html')
@@ -283,15 +400,7 @@ def login():
         if not email or not password:
             return jsonify({'success': False, 'message': 'Email and password are required'})
         
-        users = load_json_file(USERS_FILE, {})
-        
-        user_id = None
-        user_info = None
-        for uid, info in users.items():
-            if info['email'] == email:
-                user_id = uid
-                user_info = info
-                break
+        user_id, user_info = storage.find_user_by_email(email)
         
         if user_info and check_password_hash(user_info['password_hash'], password):
             session['user_id'] = user_id
@@ -306,31 +415,18 @@ def login():
 @login_required
 def home():
     user_id = session['user_id']
-    users = load_json_file(USERS_FILE, {})
-    user_info = users.get(user_id, {})
-    
-    health_data = load_json_file(HEALTH_DATA_FILE, {})
-    user_health = health_data.get(user_id, {})
-    
-    recommendations_data = load_json_file(RECOMMENDATIONS_FILE, {})
-    user_recommendations = recommendations_data.get(user_id, {})
-    
-    return render_template('home.html', 
-                         user=user_info, 
-                         health_data=user_health,
-                         recommendations=user_recommendations.get('recommendations', {}))
+    return conditional_response(user_id, 'home', lambda docs: render_template(
+        'home.html',
+        user=docs['users'] or {},
+        health_data=docs['health_data'] or {},
+        recommendations=(docs['recommendations'] or {}).get('recommendations', {})))
 
 @app.route('/dashboard')
 @login_required
 def dashboard():
     user_id = session['user_id']
-    users = load_json_file(USERS_FILE, {})
-    user_info = users.get(user_id, {})
-    
-    health_data = load_json_file(HEALTH_DATA_FILE, {})
-    user_health = health_data.get(user_id, {})
-    
-    return render_template('dashboard.html', user=user_info, health_data=user_health)
+    return conditional_response(user_id, 'dashboard', lambda docs: render_template(
+        'dashboard.html', user=docs['users'] or {}, health_data=docs['health_data'] or {}))
 
 @app.route('/chat')
 @login_required
@@ -347,8 +443,6 @@ def assistant():
 def health_data_api():
     user_id = session['user_id']
     logger.debug(f"Handling health-data request for user_id: {user_id}")
-
-    data_file = HEALTH_DATA_FILE
     
     if request.method == 'POST':
         try:
@@ -357,54 +451,125 @@ def health_data_api():
                 logger.error("No data provided in POST request")
                 return jsonify({'success': False, 'message': 'No data provided'}), 400
 
-            health_data = load_json_file(data_file, {})
-            
-            if user_id not in health_data:
-                health_data[user_id] = {}
-            
-            health_data[user_id].update(data)
-            health_data[user_id]['last_updated'] = datetime.now().isoformat()
-            
-            risk_level = calculate_health_risk(health_data[user_id])
-            health_data[user_id]['risk_level'] = risk_level
-            
-            if not save_json_file(data_file, health_data):
-                logger.error("Failed to save health data to file")
+            try:
+                with storage.transaction():
+                    # Before the first append, while the stored snapshot is still the old one
+                    seed_health_series(user_id)
+                    user_health = storage.get('health_data', user_id, {})
+                    user_health.update(data)
+                    user_health['last_updated'] = datetime.now().isoformat()
+                    health_series.append(user_id, data)
+                    
+                    risk_level = calculate_health_risk(user_health)
+                    user_health['risk_level'] = risk_level
+                    storage.put('health_data', user_id, user_health)
+                    record_health_update(user_id)
+            except StorageError as e:
+                logger.error(f"Failed to save health data: {str(e)}")
                 return jsonify({'success': False, 'message': 'Failed to save health data'}), 500
             
-            recommendations = generate_recommendations(user_id, health_data[user_id])
-            
-            users = load_json_file(USERS_FILE, {})
-            if user_id in users:
-                users[user_id]['points'] = users[user_id].get('points', 0) + 10
-                if not save_json_file(USERS_FILE, users):
-                    logger.error("Failed to save user points")
+            # Recommendations and points are updated in the background; rapid
+            # successive submissions share one queued job. The save has
+            # committed, so a failed enqueue is logged and retried, not reported
+            job_id = enqueue_health_update(user_id)
             
-            logger.debug(f"Health data saved for user_id: {user_id}, data: {data}")
+            logger.debug(f"Health data saved for user_id: {user_id}, fields: {sorted(data)}, job: {job_id}")
             return jsonify({
                 'success': True,
                 'message': 'Health data updated successfully',
                 'risk_level': risk_level,
-                'recommendations': recommendations,
-                'points_earned': 10
-            })
+                'job_id': job_id,
+                'points_earned': HEALTH_UPDATE_POINTS
+            }), 202
         except Exception as e:
             logger.error(f"Error saving health data: {str(e)}")
             return jsonify({'success': False, 'message': f'Failed to save health data: {str(e)}'}), 500
     
     else:
         try:
-            health_data = load_json_file(data_file, {})
-            user_health = health_data.get(user_id, {})
-            logger.debug(f"Health data retrieved for user_id: {user_id}, data: {user_health}")
-            return jsonify(user_health)
+            logger.debug(f"Health data requested for user_id: {user_id}")
+            return conditional_response(user_id, 'health_data',
+                                        lambda docs: jsonify(docs['health_data'] or {}))
         except json.JSONDecodeError:
-            logger.error("Corrupted health_data.json")
+            logger.error("Corrupted health data record")
             return jsonify({'success': False, 'message': 'Corrupted health data file'}), 500
         except Exception as e:
             logger.error(f"Error loading health data: {str(e)}")
             return jsonify({'success': False, 'message': f'Failed to load health data: {str(e)}'}), 500
 
+def seed_health_series(user_id):
+    """Start an empty history with the reading saved before history was kept"""
+    with storage.transaction():
+        if health_series.count(user_id):
+            return
+        user_health = storage.get('health_data', user_id, {})
+        if not user_health.get('last_updated'):
+            return
+        try:
+            timestamp = datetime.fromisoformat(user_health['last_updated']).timestamp()
+        except ValueError:
+            return
+        health_series.append(user_id, user_health, timestamp)
+
+@app.route('/api/health-data/history')
+@login_required
+def health_history_api():
+    user_id = session['user_id']
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in RESOLUTIONS + ('raw',):
+        return jsonify({'success': False, 'message': f'Unknown resolution: {resolution}'}), 400
+    metrics = [m.strip() for m in request.args.get('metrics', ','.join(METRICS)).split(',') if m.strip()]
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        return jsonify({'success': False, 'message': f'Unknown metric(s): {", ".join(unknown)}'}), 400
+    try:
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid start or end time'}), 400
+    default_start, default_end = default_range('day' if resolution == 'raw' else resolution)
+    start = default_start if start is None else start
+    end = default_end if end is None else end
+
+    try:
+        if health_series.count(user_id) == 0:
+            seed_health_series(user_id)
+        if resolution == 'raw':
+            series = health_series.readings(user_id, start, end)
+            timestamps = series['t']
+            values = {m: to_json_list(series[m]) for m in metrics}
+        else:
+            series = health_series.rollups(user_id, resolution, start, end)
+            timestamps = series['start']
+            values = {m: {stat: to_json_list(column) for stat, column in series[m].items()} for m in metrics}
+    except StorageError as e:
+        logger.error(f"Failed to load health history: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to load health history'}), 500
+
+    return jsonify({
+        'success': True,
+        'resolution': resolution,
+        'start': datetime.fromtimestamp(start).isoformat(),
+        'end': datetime.fromtimestamp(end).isoformat(),
+        'timestamps': [datetime.fromtimestamp(int(t)).isoformat() for t in timestamps],
+        'metrics': values
+    })
+
+def save_chat_entry(user_id, message, ai_response):
+    """Append a chat exchange to the user's history and return the entry"""
+    chat_entry = {
+        'timestamp': datetime.now().isoformat(),
+        'user_message': message,
+        'ai_response': ai_response
+    }
+    
+    try:
+        chat_entry = storage.append_chat(user_id, chat_entry)
+        logger.debug(f"Chat history saved for user_id: {user_id}, id: {chat_entry['id']}")
+    except StorageError as e:
+        logger.error(f"Failed to save chat history: {str(e)}")
+    return chat_entry
+
 @app.route('/api/chat', methods=['POST'])
 @login_required
 def chat_api():
@@ -415,334 +580,241 @@ def chat_api():
     if not message:
         return jsonify({'success': False, 'message': 'Message cannot be empty'})
     
-    health_data = load_json_file(HEALTH_DATA_FILE, {})
-    user_health = health_data.get(user_id, {})
-    
-    context = f"User's health data: {json.dumps(user_health)}" if user_health else "No health data available"
-    
-    ai_response = get_ollama_response(message, context)
-    
-    chat_history = load_json_file(CHAT_HISTORY_FILE, {})
-    if user_id not in chat_history:
-        chat_history[user_id] = []
-    
-    chat_entry = {
-        'timestamp': datetime.now().isoformat(),
-        'user_message': message,
-        'ai_response': ai_response
-    }
+    user_health = storage.get('health_data', user_id, {})
+    user_info = storage.get('users', user_id, {})
+    try:
+        history = storage.chat_page(user_id, limit=MEMORY_TURNS)
+    except StorageError as e:
+        logger.error(f"Failed to load chat memory: {str(e)}")
+        history = []
+    chat_prompt = prompt_builder.build(user_id, message, user_health, user_info, history)
     
-    chat_history[user_id].append(chat_entry)
+    # Answers that build on earlier turns are personal, so they bypass the shared cache
+    cache_key = None if chat_prompt['memory'] else (message, health_bucket(user_health))
+    cached_response = response_cache.get(*cache_key) if cache_key else None
+    if cached_response is not None:
+        logger.debug(f"Response cache hit for user_id: {user_id}")
+    # Stays None for cached answers, which cost no prompt evaluation
+    usage = None if cached_response is not None else {}
     
-    chat_history[user_id] = chat_history[user_id][-50:]
+    if data.get('stream'):
+        if cached_response is not None:
+            tokens = iter([cached_response])
+        else:
+            tokens = stream_ollama_response(chat_prompt, cache_key, usage)
+        return Response(stream_with_context(stream_chat(user_id, message, tokens, chat_prompt, usage)),
+                        mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
     
-    if save_json_file(CHAT_HISTORY_FILE, chat_history):
-        logger.debug(f"Chat history saved for user_id: {user_id}")
+    if cached_response is not None:
+        ai_response = cached_response
     else:
-        logger.error("Failed to save chat history")
+        ai_response = get_ollama_response(chat_prompt, cache_key, usage)
+    chat_entry = save_chat_entry(user_id, message, ai_response)
+    remember_context(user_id, chat_entry, chat_prompt, usage)
     
     return jsonify({
         'success': True,
         'response': ai_response,
-        'timestamp': chat_entry['timestamp']
+        'timestamp': chat_entry['timestamp'],
+        'id': chat_entry.get('id'),
+        'usage': public_usage(usage)
     })
 
+MEMORY_TURNS = 20
+
+def remember_context(user_id, chat_entry, chat_prompt, usage):
+    """Let the next turn continue from Ollama's context for this answer"""
+    if usage and usage.get('context') and chat_entry.get('id') is not None:
+        prompt_builder.remember(user_id, usage['context'], chat_entry['id'], chat_prompt['summary_key'])
+
+def public_usage(usage):
+    """Token counts and timings for the response body, without the context array"""
+    if usage is None:
+        return {'cached': True}
+    return {key: value for key, value in usage.items() if key != 'context'}
+
+def stream_chat(user_id, message, token_stream, chat_prompt=None, usage=None):
+    """Relay Ollama tokens as NDJSON lines, then persist the full answer"""
+    tokens = []
+    try:
+        for token in token_stream:
+            tokens.append(token)
+            yield json.dumps({'token': token}) + '\n'
+    finally:
+        # Also runs when the client disconnects, so the exchange is not lost
+        chat_entry = save_chat_entry(user_id, message, ''.join(tokens))
+        if chat_prompt is not None:
+            remember_context(user_id, chat_entry, chat_prompt, usage)
+    yield json.dumps({
+        'done': True,
+        'success': True,
+        'response': chat_entry['ai_response'],
+        'timestamp': chat_entry['timestamp'],
+        'id': chat_entry.get('id'),
+        'usage': public_usage(usage)
+    }) + '\n'
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def job_status_api(job_id):
+    """Status of a background job queued for the current user"""
+    job = job_queue.get(job_id)
+    if job is None or job['user_id'] != session['user_id']:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    del job['user_id']
+    return jsonify({'success': True, 'job': job})
+
+MAX_CHAT_PAGE = 200
+
 @app.route('/api/chat/history')
 @login_required
 def chat_history_api():
+    """One page of chat history, oldest first; pass next_before back as before for older messages"""
     user_id = session['user_id']
     try:
-        chat_history = load_json_file(CHAT_HISTORY_FILE, {})
-        user_history = chat_history.get(user_id, [])
-        logger.debug(f"Chat history retrieved for user_id: {user_id}, entries: {len(user_history)}")
-        return jsonify(user_history)
+        before = request.args.get('before', type=int)
+        limit = request.args.get('limit', CHAT_PAGE_SIZE, type=int)
+        if limit < 1 or limit > MAX_CHAT_PAGE:
+            return jsonify({'success': False, 'message': f'limit must be between 1 and {MAX_CHAT_PAGE}'}), 400
+        # One extra row tells whether an older page exists
+        page = storage.chat_page(user_id, before, limit + 1)
+        has_more = len(page) > limit
+        page = page[-limit:]
+        logger.debug(f"Chat history retrieved for user_id: {user_id}, entries: {len(page)}")
+        return jsonify({
+            'success': True,
+            'messages': page,
+            'next_before': page[0]['id'] if has_more else None
+        })
     except json.JSONDecodeError:
-        logger.error("Corrupted chat_history.json")
+        logger.error("Corrupted chat history record")
         return jsonify({'success': False, 'message': 'Corrupted chat history file'}), 500
     except Exception as e:
         logger.error(f"Error loading chat history: {str(e)}")
         return jsonify({'success': False, 'message': f'Failed to load chat history: {str(e)}'}), 500
 
+@app.route('/api/risk/batch', methods=['POST'])
+@login_required
+def risk_batch_api():
+    """Score uploaded CSV/JSON records, streaming one risk level per row"""
+    output = request.args.get('format', 'ndjson')
+    if output not in ('ndjson', 'csv'):
+        return jsonify({'success': False, 'message': f'Unknown format: {output}'}), 400
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'success': False, 'message': 'Upload too large'}), 413
+
+    upload = request.files.get('file')
+    try:
+        if upload is not None:
+            if upload.filename.lower().endswith('.json') or upload.mimetype == 'application/json':
+                records = read_json_records(json.load(upload.stream))
+            else:
+                records = read_csv_records(io.TextIOWrapper(upload.stream, encoding='utf-8', newline=''))
+        elif request.mimetype == 'application/json':
+            records = read_json_records(request.get_json(silent=True))
+        elif request.mimetype in ('text/csv', 'text/plain'):
+            records = read_csv_records(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+        else:
+            return jsonify({'success': False, 'message': 'Send a CSV or JSON file, or a text/csv or application/json body'}), 400
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'message': f'Invalid upload: {str(e)}'}), 400
+
+    results = score_records(records)
+    if output == 'csv':
+        return Response(stream_with_context(csv_lines(results)), mimetype='text/csv')
+    return Response(stream_with_context(ndjson_lines(results)), mimetype='application/x-ndjson')
+
+MAX_SYMPTOM_BATCH = 1000
+
+@app.route('/api/predict/symptoms', methods=['GET', 'POST'])
+@login_required
+def predict_symptoms_api():
+    try:
+        index = get_symptom_index()
+    except (OSError, SymptomIndexError) as e:
+        logger.error(f"Symptom index unavailable: {str(e)}")
+        return jsonify({'success': False, 'message': 'Symptom prediction is not available'}), 503
+
+    if request.method == 'GET':
+        return jsonify({'success': True, 'symptoms': index.symptoms, 'diseases': index.diseases})
+
+    data = request.get_json() or {}
+    method = data.get('method', 'bayes')
+    if method not in SYMPTOM_METHODS:
+        return jsonify({'success': False, 'message': f'Unknown method: {method}'}), 400
+    top_k = data.get('top_k', 5)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return jsonify({'success': False, 'message': 'top_k must be a positive integer'}), 400
+
+    batch = 'batch' in data
+    symptom_sets = data['batch'] if batch else [data.get('symptoms')]
+    if not isinstance(symptom_sets, list) or not symptom_sets or len(symptom_sets) > MAX_SYMPTOM_BATCH:
+        return jsonify({'success': False, 'message': f'batch must hold 1 to {MAX_SYMPTOM_BATCH} symptom lists'}), 400
+    if not all(isinstance(s, list) and s and all(isinstance(n, str) for n in s) for s in symptom_sets):
+        return jsonify({'success': False, 'message': 'Symptoms must be a non-empty list of names'}), 400
+
+    try:
+        predictions = index.predict(symptom_sets, top_k, method)
+    except UnknownSymptomError as e:
+        return jsonify({'success': False, 'message': str(e), 'unknown_symptoms': e.symptoms}), 400
+
+    if batch:
+        return jsonify({'success': True, 'method': method, 'predictions': predictions})
+    return jsonify({'success': True, 'method': method, 'predictions': predictions[0]})
+
+@app.route('/api/llm/metrics')
+@login_required
+def llm_metrics_api():
+    return jsonify(dict(get_gateway().metrics(), response_cache=response_cache.metrics(),
+                        user_cache=user_cache.metrics()))
+
+@app.route('/api/inference/stats')
+@login_required
+def inference_stats_api():
+    return jsonify(inference.stats())
+
 @app.route('/api/user/profile', methods=['GET', 'POST'])
 @login_required
 def user_profile_api():
     user_id = session['user_id']
-    users = load_json_file(USERS_FILE, {})
     
     if request.method == 'POST':
         data = request.get_json()
         
-        if user_id in users:
+        with storage.transaction():
+            user_info = storage.get('users', user_id)
+            if user_info is None:
+                return jsonify({'success': False, 'message': 'User not found'})
+            
             allowed_fields = ['name', 'age', 'phone']
             for field in allowed_fields:
                 if field in data:
-                    users[user_id][field] = data[field]
+                    user_info[field] = data[field]
             
             if 'current_password' in data and 'new_password' in data:
-                if check_password_hash(users[user_id]['password_hash'], data['current_password']):
-                    users[user_id]['password_hash'] = generate_password_hash(data['new_password'])
+                if check_password_hash(user_info['password_hash'], data['current_password']):
+                    user_info['password_hash'] = generate_password_hash(data['new_password'])
                 else:
                     return jsonify({'success': False, 'message': 'Current password is incorrect'})
             
-            save_json_file(USERS_FILE, users)
-            return jsonify({'success': True, 'message': 'Profile updated successfully'})
-        else:
-            return jsonify({'success': False, 'message': 'User not found'})
+            storage.put('users', user_id, user_info)
+        return jsonify({'success': True, 'message': 'Profile updated successfully'})
     
     else:
-        user_info = users.get(user_id, {})
-        safe_info = {k: v for k, v in user_info.items() if k != 'password_hash'}
-        return jsonify(safe_info)
+        return conditional_response(user_id, 'profile', lambda docs: jsonify(
+            {k: v for k, v in (docs['users'] or {}).items() if k != 'password_hash'}))
 
 @app.route('/logout')
 def logout():
     session.clear()
     return redirect(url_for('index'))
 
-def train_cnn():
-    """Train CNN on image datasets if available"""
-    image_files = [f for f in os.listdir('datasets') if f.lower().endswith(('.jpg', '.png'))]
-    if not image_files:
-        print("No image files found for CNN training.")
-        return
-
-    images = []
-    labels = []
-    for f in image_files:
-        img = cv2.imread(os.path.join('datasets', f))
-        if img is None:
-            continue
-        img = cv2.resize(img, (128, 128))
-        images.append(img / 255.0)
-        label = 1 if 'healthy' in f.lower() else 0
-        labels.append(label)
-
-    if len(images) < 2:
-        print("Insufficient images for CNN training.")
-        return
-
-    X = np.array(images)
-    y = tf.keras.utils.to_categorical(labels, 2)
-
-    model = Sequential([
-        Conv2D(32, (3, 3), activation='relu', input_shape=(128, 128, 3)),
-        MaxPooling2D(2, 2),
-        Flatten(),
-        Dense(128, activation='relu'),
-        Dense(2, activation='softmax')
-    ])
-    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-    model.fit(X, y, epochs=10, validation_split=0.2, verbose=0)
-    model.save('models/cnn_model.h5')
-    print("CNN model trained and saved.")
-
-def train_rnn():
-    """Train RNN (LSTM) on CSV datasets if available"""
-    csv_files = [f for f in os.listdir('datasets') if f.lower().endswith('.csv')]
-    if not csv_files:
-        print("No CSV files found for RNN training.")
-        return
-
-    df = pd.read_csv(os.path.join('datasets', csv_files[0]))
-    if len(df.columns) < 2:
-        print("Invalid CSV format for RNN training.")
-        return
-
-    data = df.iloc[:, 1].values.astype(float)
-    if len(data) < 20:
-        print("Insufficient data for RNN training.")
-        return
-
-    data = (data - data.min()) / (data.max() - data.min() + 1e-7)
-
-    seq_length = 10
-    X, y = [], []
-    for i in range(len(data) - seq_length):
-        X.append(data[i:i + seq_length])
-        y.append(data[i + seq_length])
-
-    X = np.array(X).reshape(-1, seq_length, 1)
-    y = np.array(y)
-
-    model = Sequential([
-        LSTM(50, input_shape=(seq_length, 1)),
-        Dense(1)
-    ])
-    model.compile(loss='mse', optimizer='adam')
-    model.fit(X, y, epochs=10, batch_size=32, verbose=0)
-    model.save('models/rnn_model.h5')
-    print("RNN model trained and saved.")
-
-def train_gan():
-    """Train GAN on image datasets if available"""
-    image_files = [f for f in os.listdir('datasets') if f.lower().endswith(('.jpg', '.png'))]
-    if not image_files:
-        print("No image files found for GAN training.")
-        return
-
-    images = []
-    for f in image_files:
-        img = cv2.imread(os.path.join('datasets', f))
-        if img is None:
-            continue
-        img = cv2.resize(img, (64, 64))
-        images.append(img / 255.0)
-
-    if len(images) < 32:
-        print("Insufficient images for GAN training.")
-        return
-
-    images = np.array(images)
-
-    generator = Sequential([
-        Dense(256, input_dim=100, activation='relu'),
-        Dense(512, activation='relu'),
-        Dense(1024, activation='relu'),
-        Dense(64 * 64 * 3, activation='sigmoid'),
-        tf.keras.layers.Reshape((64, 64, 3))
-    ])
-
-    discriminator = Sequential([
-        Flatten(input_shape=(64, 64, 3)),
-        Dense(1024, activation='relu'),
-        Dense(512, activation='relu'),
-        Dense(256, activation='relu'),
-        Dense(1, activation='sigmoid')
-    ])
-    discriminator.compile(loss='binary_crossentropy', optimizer='adam')
-
-    discriminator.trainable = False
-    gan = Sequential([generator, discriminator])
-    gan.compile(loss='binary_crossentropy', optimizer='adam')
-
-    epochs = 100
-    batch_size = min(32, len(images))
-    for e in range(epochs):
-        idx = np.random.randint(0, images.shape[0], batch_size)
-        real_imgs = images[idx]
-        noise = np.random.normal(0, 1, (batch_size, 100))
-        fake_imgs = generator.predict(noise, verbose=0)
-        d_loss_real = discriminator.train_on_batch(real_imgs, np.ones(batch_size))
-        d_loss_fake = discriminator.train_on_batch(fake_imgs, np.zeros(batch_size))
-        noise = np.random.normal(0, 1, (batch_size, 100))
-        g_loss = gan.train_on_batch(noise, np.ones(batch_size))
-
-    generator.save('models/generator.h5')
-    print("GAN model trained and saved.")
-
-class HealthEnv:
-    def __init__(self):
-        self.state = np.array([0.5])
-        self.actions = [0, 1, 2]
-
-    def step(self, action):
-        if action == 0:
-            reward = np.random.normal(0.1, 0.05)
-        elif action == 1:
-            reward = np.random.normal(0.2, 0.1)
-        else:
-            reward = np.random.normal(0.05, 0.03)
-        self.state += reward
-        self.state = np.clip(self.state, 0, 1)
-        done = self.state >= 1
-        return self.state, reward, done, {}
-
-    def reset(self):
-        self.state = np.array([0.5])
-        return self.state
-
-def train_rl():
-    """Train Deep Q-Learning (DQN) for continuous learning"""
-    env = HealthEnv()
-
-    model = Sequential([
-        Dense(24, input_dim=1, activation='relu'),
-        Dense(24, activation='relu'),
-        Dense(3, activation='linear')
-    ])
-    model.compile(loss='mse', optimizer='adam')
-
-    gamma = 0.95
-    epsilon = 1.0
-    epsilon_min = 0.01
-    epsilon_decay = 0.995
-    episodes = 100
-
-    for e in range(episodes):
-        state = env.reset()
-        state = state.reshape(1, -1)
-        done = False
-        while not done:
-            if np.random.rand() <= epsilon:
-                action = np.random.choice(env.actions)
-            else:
-                action = np.argmax(model.predict(state, verbose=0)[0])
-            next_state, reward, done, _ = env.step(action)
-            next_state = next_state.reshape(1, -1)
-            target = reward
-            if not done:
-                target += gamma * np.amax(model.predict(next_state, verbose=0)[0])
-            target_f = model.predict(state, verbose=0)
-            target_f[0][action] = target
-            model.fit(state, target_f, epochs=1, verbose=0)
-            state = next_state
-        if epsilon > epsilon_min:
-            epsilon *= epsilon_decay
-
-    model.save('models/dqn_model.h5')
-    print("DQN model trained and saved.")
-
-def train_sarsa():
-    """Train SARSA for continuous learning (tabular version)"""
-    env = HealthEnv()
-
-    q_table = np.zeros((10, 3))
-    alpha = 0.1
-    gamma = 0.95
-    epsilon = 1.0
-    epsilon_min = 0.01
-    epsilon_decay = 0.995
-    episodes = 100
-
-    for e in range(episodes):
-        state = env.reset()
-        s_idx = int(state[0] * 9)
-        if np.random.rand() < epsilon:
-            action = np.random.choice(env.actions)
-        else:
-            action = np.argmax(q_table[s_idx])
-        done = False
-        while not done:
-            next_state, reward, done, _ = env.step(action)
-            ns_idx = int(next_state[0] * 9)
-            if np.random.rand() < epsilon:
-                next_action = np.random.choice(env.actions)
-            else:
-                next_action = np.argmax(q_table[ns_idx])
-            q_table[s_idx, action] += alpha * (reward + gamma * q_table[ns_idx, next_action] - q_table[s_idx, action])
-            s_idx = ns_idx
-            action = next_action
-        if epsilon > epsilon_min:
-            epsilon *= epsilon_decay
-
-    np.save('models/sarsa_qtable.npy', q_table)
-    print("SARSA Q-table trained and saved.")
-
-def train_models():
-    """Train all models automatically on startup"""
-    train_cnn()
-    train_rnn()
-    train_gan()
-    train_rl()
-    train_sarsa()
-
 if __name__ == '__main__':
     print("Healthcare Personal Assistant System")
     print("==================================")
     print("Starting Flask server...")
     print("Make sure Ollama is running with: ollama serve")
     print("And the llama2 model is available: ollama pull llama2")
-    print("Training AI models...")
-    train_models()
-    print("Training completed.")
+    print("Train or refresh AI models separately with: python train.py")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
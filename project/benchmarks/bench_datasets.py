@@ -0,0 +1,94 @@
+"""Load time of the CSV datasets: text parsing vs the columnar cache.
+
+For every CSV in ``datasets/`` reports, in milliseconds:
+
+* ``csv_module``: ``csv.reader`` over the whole file (what the app did)
+* ``pandas``: ``pd.read_csv`` with dtype inference (what the trainers did),
+  when pandas is installed
+* ``convert``: the one-time conversion to the columnar cache
+* ``open_all_columns``: a new process's first load, hashing the CSV and
+  memory-mapping every column
+* ``project_two_columns``: the same with only two columns mapped
+* ``memoized``: ``load_table`` again in the same process
+
+Run it from the project directory; the cache is written to a temporary
+directory::
+
+    python benchmarks/bench_datasets.py --repeat 5
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_ms(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2)
+
+
+def main(argv=None):
+    from dataset_catalog import convert_csv, load_table, open_table
+    from model_registry import file_sha256
+
+    parser = argparse.ArgumentParser(description='CSV parsing vs the columnar dataset cache')
+    parser.add_argument('--datasets', default='datasets')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    def read_csv_module(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return [row for row in csv.reader(f) if row]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for path in sorted(glob.glob(os.path.join(args.datasets, '*.csv'))):
+            source_hash = file_sha256(path)
+
+            def convert():
+                directory = os.path.join(cache_dir, 'convert')
+                convert_csv(path, directory, source_hash)
+                shutil.rmtree(directory)
+
+            table = open_table(path, cache_dir)
+            two = table.columns[:2]
+            result = {
+                'rows': table.rows,
+                'columns': len(table.columns),
+                'kinds': {kind: sum(table.kind(c) == kind for c in table.columns)
+                          for kind in ('bool', 'int', 'float', 'category')},
+                'csv_module': best_ms(lambda: read_csv_module(path), args.repeat),
+            }
+            if pd is not None:
+                result['pandas'] = best_ms(lambda: pd.read_csv(path), args.repeat)
+            result['convert'] = best_ms(convert, args.repeat)
+            result['open_all_columns'] = best_ms(
+                lambda: [t.column(c) for t in [open_table(path, cache_dir)] for c in t.columns], args.repeat)
+            result['project_two_columns'] = best_ms(
+                lambda: open_table(path, cache_dir).project(two), args.repeat)
+            load_table(path, cache_dir)
+            result['memoized'] = best_ms(lambda: load_table(path, cache_dir).project(two), args.repeat)
+            results[os.path.basename(path)] = result
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
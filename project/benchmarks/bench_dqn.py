@@ -0,0 +1,80 @@
+"""Compare DQN training throughput before and after vectorization.
+
+The baseline is the original per-step loop: ``model.predict`` two or three
+times and ``model.fit`` once per environment step on a single sample. The
+vectorized trainer is ``ml.train_rl.run_dqn``. Both run for roughly the same
+number of environment steps and report steps/sec::
+
+    python benchmarks/bench_dqn.py --steps 300
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def baseline_steps_per_sec(steps):
+    """Original train_rl loop, stopped after ``steps`` environment steps"""
+    import numpy as np
+    from ml.env import HealthEnv
+    from ml.train_rl import build_q_network
+
+    env = HealthEnv()
+    model = build_q_network()
+    gamma, epsilon = 0.95, 1.0
+    taken = 0
+    started = time.perf_counter()
+    while taken < steps:
+        state = env.reset().reshape(1, -1)
+        done = False
+        while not done and taken < steps:
+            if np.random.rand() <= epsilon:
+                action = np.random.choice(env.actions)
+            else:
+                action = np.argmax(model.predict(state, verbose=0)[0])
+            next_state, reward, done, _ = env.step(action)
+            next_state = next_state.reshape(1, -1)
+            target = reward
+            if not done:
+                target += gamma * np.amax(model.predict(next_state, verbose=0)[0])
+            target_f = model.predict(state, verbose=0)
+            target_f[0][action] = target
+            model.fit(state, target_f, epochs=1, verbose=0)
+            state = next_state
+            taken += 1
+        epsilon *= 0.995
+    return taken / (time.perf_counter() - started)
+
+
+def vectorized_steps_per_sec(steps, num_envs):
+    from ml.train_rl import run_dqn
+
+    # Warm-up traces the tf.functions so compilation is not timed
+    run_dqn({'num_envs': num_envs, 'learning_starts': 0}, max_env_steps=num_envs * 2)
+    _, stats = run_dqn({'num_envs': num_envs, 'episodes': 10 ** 9}, max_env_steps=steps)
+    return stats['steps_per_sec']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='DQN training throughput benchmark')
+    parser.add_argument('--steps', type=int, default=300, help='environment steps for the baseline')
+    parser.add_argument('--vector-steps', type=int, default=20000,
+                        help='environment steps for the vectorized trainer')
+    parser.add_argument('--num-envs', type=int, default=32)
+    args = parser.parse_args(argv)
+
+    before = baseline_steps_per_sec(args.steps)
+    after = vectorized_steps_per_sec(args.vector_steps, args.num_envs)
+    print(json.dumps({
+        'baseline_steps_per_sec': round(before, 1),
+        'vectorized_steps_per_sec': round(after, 1),
+        'speedup': round(after / before, 1) if before else None,
+        'num_envs': args.num_envs,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
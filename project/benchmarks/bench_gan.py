@@ -0,0 +1,85 @@
+"""Compare GAN training throughput before and after the compiled train step.
+
+The baseline is the original loop: ``generator.predict``, two
+``discriminator.train_on_batch`` calls and ``gan.train_on_batch`` per batch.
+The compiled version is ``ml.train_gan.run_gan``. Both train on the same
+random uint8 images for the same number of batches and report images/sec::
+
+    python benchmarks/bench_gan.py --steps 30
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def baseline_images_per_sec(images, steps, batch_size, latent_dim):
+    """Original train_gan loop, timed after one warm-up batch"""
+    import numpy as np
+    from keras.models import Sequential
+    from ml.gan_model import build_discriminator, build_generator
+
+    size = images.shape[1]
+    generator = build_generator(size, latent_dim)
+    discriminator = build_discriminator(size)
+    discriminator.compile(loss='binary_crossentropy', optimizer='adam')
+    discriminator.trainable = False
+    gan = Sequential([generator, discriminator])
+    gan.compile(loss='binary_crossentropy', optimizer='adam')
+
+    def step():
+        idx = np.random.randint(0, images.shape[0], batch_size)
+        real_imgs = images[idx] / 255.0
+        noise = np.random.normal(0, 1, (batch_size, latent_dim))
+        fake_imgs = generator.predict(noise, verbose=0)
+        discriminator.train_on_batch(real_imgs, np.ones(batch_size))
+        discriminator.train_on_batch(fake_imgs, np.zeros(batch_size))
+        noise = np.random.normal(0, 1, (batch_size, latent_dim))
+        gan.train_on_batch(noise, np.ones(batch_size))
+
+    step()
+    started = time.perf_counter()
+    for _ in range(steps):
+        step()
+    return steps * batch_size / (time.perf_counter() - started)
+
+
+def compiled_images_per_sec(images, steps, batch_size, latent_dim):
+    import numpy as np
+    from ml.train_gan import run_gan
+
+    params = {'image_size': images.shape[1], 'latent_dim': latent_dim, 'steps': steps + 1,
+              'batch_size': batch_size}
+    _, stats = run_gan(images, np.arange(len(images)), params)
+    return stats['images_per_sec']
+
+
+def main(argv=None):
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description='GAN training throughput benchmark')
+    parser.add_argument('--steps', type=int, default=30, help='timed batches per trainer')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--image-size', type=int, default=64)
+    parser.add_argument('--images', type=int, default=256, help='number of random training images')
+    args = parser.parse_args(argv)
+
+    latent_dim = 100
+    images = np.random.default_rng(0).integers(
+        0, 256, (args.images, args.image_size, args.image_size, 3), dtype=np.uint8)
+    before = baseline_images_per_sec(images, args.steps, args.batch_size, latent_dim)
+    after = compiled_images_per_sec(images, args.steps, args.batch_size, latent_dim)
+    print(json.dumps({
+        'baseline_images_per_sec': round(before, 1),
+        'compiled_images_per_sec': round(after, 1),
+        'speedup': round(after / before, 2) if before else None,
+        'batch_size': args.batch_size,
+        'image_size': args.image_size,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measure how long a web worker takes to import the Flask app.
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter (in a
+scratch working directory, so no real data is touched), then reports the
+total import time, peak RSS and the slowest top-level imports. Exits with
+status 1 if a heavy ML library is imported or the time budget is exceeded::
+
+    python benchmarks/bench_import_time.py --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('tensorflow', 'keras', 'cv2', 'pandas', 'torch', 'sklearn', 'matplotlib')
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module='app'):
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    with tempfile.TemporaryDirectory() as workdir:
+        before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        peak_rss_kb = max(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, before)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    top_level = [entry for entry in imports if entry[3] == 0]
+    total_us = sum(entry[2] for entry in top_level)
+    loaded = {entry[0] for entry in imports}
+    heavy = sorted(name for name in loaded if name.split('.')[0] in HEAVY_MODULES)
+    # Direct dependencies of the top-level imports show where the time goes
+    slowest = sorted((entry for entry in imports if entry[3] == 1),
+                     key=lambda entry: entry[2], reverse=True)[:10]
+    return {
+        'module': module,
+        'total_import_ms': round(total_us / 1000, 1),
+        'peak_rss_mb': round(peak_rss_kb / 1024, 1),
+        'modules_imported': len(loaded),
+        'heavy_modules': sorted({name.split('.')[0] for name in heavy}),
+        'slowest_imports_ms': {name: round(cumulative / 1000, 1) for name, _, cumulative, _ in slowest},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app', help='module to import (default: app)')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='fail if the total import time exceeds this many milliseconds')
+    parser.add_argument('--repeat', type=int, default=3, help='runs; the fastest is reported')
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    result = min(runs, key=lambda run: run['total_import_ms'])
+    print(json.dumps(result, indent=2))
+
+    failed = False
+    if result['heavy_modules']:
+        print(f"FAIL: heavy modules imported: {', '.join(result['heavy_modules'])}", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and result['total_import_ms'] > args.budget_ms:
+        print(f"FAIL: import took {result['total_import_ms']} ms, budget {args.budget_ms} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
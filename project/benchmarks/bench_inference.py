@@ -0,0 +1,106 @@
+"""Latency and throughput of model inference under concurrent requests.
+
+Runs ``--threads`` threads that each send ``--requests`` single-example
+predictions to one model and compares:
+
+* ``predict``: a ``model.predict`` call per request, the naive way
+* ``unbatched``: ``InferenceService`` with ``max_batch=1`` (one
+  ``predict_on_batch`` per request)
+* ``batched``: ``InferenceService`` micro-batching with the Keras runtime
+* ``batched_tflite``: the same through the TFLite export
+
+and reports requests/sec, p50/p99 latency and the mean batch size. Run it
+from the directory holding ``models/`` after ``python train.py``::
+
+    python benchmarks/bench_inference.py --model dqn --threads 16
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(predict, inputs, threads, requests):
+    """Per-request seconds and wall time with threads calling predict concurrently"""
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        mine = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            predict(inputs)
+            mine.append(time.perf_counter() - started)
+        with lock:
+            timings.extend(mine)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sorted(timings), time.perf_counter() - started
+
+
+def summary(timings, wall, stats=None):
+    result = {
+        'requests': len(timings),
+        'requests_per_sec': round(len(timings) / wall, 1),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'p99_ms': round(timings[int(len(timings) * 0.99)] * 1000, 3),
+    }
+    if stats:
+        result['mean_batch_size'] = stats['mean_batch_size']
+    return result
+
+
+def main(argv=None):
+    import numpy as np
+    from inference import InferenceService, SERVED_MODELS
+    from model_registry import load_artifact
+
+    parser = argparse.ArgumentParser(description='Micro-batched inference vs per-request calls')
+    parser.add_argument('--model', default='dqn', choices=[name for name, served in SERVED_MODELS.items()
+                                                             if served['batched']])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='requests per thread')
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--predict-requests', type=int, default=5,
+                        help='requests per thread for the slow model.predict baseline')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    results = {}
+
+    model = load_artifact(SERVED_MODELS[args.model]['artifact'])
+    inputs = rng.random(model.input_shape[1:], dtype=np.float32)
+    model_lock = threading.Lock()
+
+    def naive(x):
+        with model_lock:
+            return model.predict(x[np.newaxis], verbose=0)[0]
+
+    naive(inputs)
+    results['predict'] = summary(*run(naive, inputs, args.threads, args.predict_requests))
+
+    for name, runtime, max_batch in (('unbatched', 'keras', 1), ('batched', 'keras', args.max_batch),
+                                     ('batched_tflite', 'tflite', args.max_batch)):
+        service = InferenceService(max_batch=max_batch, max_wait=args.max_wait_ms / 1000, runtime=runtime)
+        expected = model.predict_on_batch(inputs[np.newaxis])[0]
+        output = service.predict(args.model, inputs)
+        results[name] = summary(*run(lambda x: service.predict(args.model, x), inputs, args.threads, args.requests),
+                                service.stats()['models'][args.model])
+        results[name]['max_abs_error'] = float(np.abs(output - expected).max())
+
+    print(json.dumps({'model': args.model, 'threads': args.threads, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
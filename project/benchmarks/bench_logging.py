@@ -0,0 +1,167 @@
+"""Per-request cost of logging, before and after the queue-backed pipeline.
+
+Replays the log calls one health-data POST and one chat request make, with
+realistic payloads (a health document, a 1.5 KB prompt, an Ollama response
+carrying a 1000-token context), and times them on the calling threads:
+
+* ``sync``: the old setup, ``logging.basicConfig(level=DEBUG)`` and the old
+  messages that include the full payloads
+* ``pipeline``: ``log_pipeline.LogPipeline`` at DEBUG with sampling and the
+  current messages
+
+Each runs against a file and against a slow sink that sleeps ``--sink-delay``
+ms per write (a full pipe or a slow disk), where the synchronous handler
+stalls every request and the pipeline drops records instead::
+
+    python benchmarks/bench_logging.py --requests 2000 --threads 4
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+URL = 'http://localhost:11434/api/generate'
+HEALTH = {'weight': 82.5, 'height': 178, 'blood_pressure_systolic': 135, 'blood_pressure_diastolic': 88,
+          'heart_rate': 74, 'glucose_level': 112, 'sleep_hours': 6.5, 'exercise_minutes': 20}
+PAYLOAD = {'model': 'llama2', 'prompt': 'Health summary: 41-year-old male, BMI 26.0 (82.5 kg, 178 cm)\n\n'
+           + 'User: How can I sleep better?\nAssistant: ' + 'Keep a regular schedule. ' * 50,
+           'stream': False, 'keep_alive': '10m', 'options': {'temperature': 0.7, 'top_p': 0.9},
+           'system': 'You are a healthcare assistant AI.'}
+RESPONSE = {'model': 'llama2', 'response': 'Try to go to bed at the same time every night. ' * 20, 'done': True,
+            'context': list(range(1000)), 'prompt_eval_count': 420, 'eval_count': 230}
+
+
+def describe_ollama_request(payload):
+    """Same as app.describe_ollama_request, without importing the app"""
+    return (f"model={payload['model']}, stream={payload['stream']}, prompt_chars={len(payload['prompt'])}, "
+            f"system={'system' in payload}, context_tokens={len(payload.get('context') or ())}")
+
+
+def sync_request(logger, user_id):
+    """The log calls of one health POST and one chat request before the pipeline"""
+    logger.debug(f"Handling health-data request for user_id: {user_id}")
+    logger.debug(f"Health data saved for user_id: {user_id}, data: {HEALTH}")
+    logger.debug(f"Sending request to Ollama: URL={URL}, Payload={PAYLOAD}")
+    logger.debug(f"Ollama response: {RESPONSE}")
+    logger.info(f"Ollama usage: prompt_tokens=420, prompt_eval=812.5ms, eval_tokens=230, eval=4301.2ms")
+    logger.debug(f"Chat history saved for user_id: {user_id}")
+
+
+def pipeline_request(logger, user_id):
+    """The same request with the current messages"""
+    logger.debug(f"Handling health-data request for user_id: {user_id}")
+    logger.debug(f"Health data saved for user_id: {user_id}, fields: {sorted(HEALTH)}")
+    logger.debug(f"Sending request to Ollama: URL={URL}, {describe_ollama_request(PAYLOAD)}")
+    logger.debug(f"Ollama response: {len(RESPONSE.get('response') or '')} chars, done={RESPONSE.get('done')}")
+    logger.info(f"Ollama usage: prompt_tokens=420, prompt_eval=812.5ms, eval_tokens=230, eval=4301.2ms")
+    logger.debug(f"Chat history saved for user_id: {user_id}")
+
+
+class SlowStream:
+    """File-like sink that takes delay seconds per write"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.writes += 1
+
+    def flush(self):
+        pass
+
+
+def run(request, logger, requests, threads):
+    """Per-request seconds on the calling threads"""
+    timings = []
+    lock = threading.Lock()
+
+    def worker(index):
+        mine = []
+        for i in range(requests // threads):
+            started = time.perf_counter()
+            request(logger, f"user-{index}-{i % 50}")
+            mine.append(time.perf_counter() - started)
+        with lock:
+            timings.extend(mine)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return timings, time.perf_counter() - started
+
+
+def summary(timings, wall):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'mean_us': round(sum(timings) / len(timings) * 1e6, 1),
+        'p50_us': round(timings[len(timings) // 2] * 1e6, 1),
+        'p99_us': round(timings[int(len(timings) * 0.99)] * 1e6, 1),
+        'max_us': round(timings[-1] * 1e6, 1),
+        'wall_seconds': round(wall, 3),
+    }
+
+
+def bench(name, sink, args):
+    from log_pipeline import LogPipeline
+
+    root = logging.getLogger()
+    logger = logging.getLogger('bench')
+    if name == 'sync':
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        try:
+            result = summary(*run(sync_request, logger, args.requests, args.threads))
+        finally:
+            root.removeHandler(handler)
+        return result
+
+    pipeline = LogPipeline(level='DEBUG', stream=sink, debug_sample=args.debug_sample,
+                           queue_size=args.queue_size).start()
+    try:
+        result = summary(*run(pipeline_request, logger, args.requests, args.threads))
+    finally:
+        pipeline.stop()
+    result['dropped'] = pipeline.handler.dropped
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Logging overhead per request, sync handler vs queue pipeline')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--sink-delay', type=float, default=2.0, help='ms per write on the slow sink')
+    parser.add_argument('--debug-sample', type=int, default=10)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('sync', 'pipeline'):
+            with open(os.path.join(tmp, f"{name}.log"), 'w') as sink:
+                results[f"{name}_file"] = bench(name, sink, args)
+                sink.flush()
+                results[f"{name}_file"]['bytes_written'] = os.path.getsize(sink.name)
+    # The slow sink makes the synchronous case take requests * calls * delay; keep it short
+    slow_args = argparse.Namespace(**{**vars(args), 'requests': min(args.requests, 200)})
+    for name in ('sync', 'pipeline'):
+        results[f"{name}_slow_sink"] = bench(name, SlowStream(args.sink_delay / 1000), slow_args)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Check the vectorized risk scorer against calculate_health_risk and time both.
+
+Generates random records around every threshold (with fractional values,
+missing fields and out-of-range values), plus a messy variant whose cells
+are also numeric strings (``' 120 '``, ``'145.5'``, ``'1e3'``), ``None``,
+empty strings, garbage, booleans, NaN and infinity. For every record, on
+both the JSON records path and the CSV path, ``risk.score_records`` must
+return the level ``calculate_health_risk`` returns, or an error exactly
+where it raises (empty strings count as absent keys).
+
+Then reports rows/sec (fastest of ``--repeat`` runs, on the clean records):
+
+* ``scalar``: ``calculate_health_risk`` per record, levels only
+* ``scalar_results``: the same loop building the result dict per record
+* ``records``: ``score_records`` over the record dicts (the JSON path)
+* ``columns``: the vectorized thresholds alone, on ready-made columns
+* ``csv``: ``score_records`` over a parsed CSV with whole-number int fields,
+  CSV parsing included
+
+Building the result dicts costs about as much as scoring, so the records
+path is not faster than the bare scalar loop. Exits with status 1 on any
+mismatch::
+
+    python benchmarks/bench_risk.py --rows 200000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MESSY_CELLS = (None, '', 'abc', ' 120 ', '145.5', '1e3', '+101', '1_000', True, False,
+               float('nan'), float('inf'), 0, 0.0, '0', 'nan', 'inf', 10 ** 400)
+
+
+def random_records(rows, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    columns = {
+        'weight': rng.uniform(35, 160, rows).round(1),
+        'height': rng.uniform(140, 205, rows).round(0),
+        'blood_pressure_systolic': rng.choice([120, 121, 130, 131, 140, 141], rows) + rng.choice([0, 0.5, 0.99], rows),
+        'heart_rate': rng.choice([59, 59.9, 60, 100, 100.5, 101], rows),
+        'glucose_level': rng.choice([100, 101, 126, 127, 140, 141], rows) + rng.choice([0, 0.4], rows),
+    }
+    records = []
+    for i in range(rows):
+        record = {'id': i}
+        for field, values in columns.items():
+            if rng.random() > 0.15:
+                record[field] = float(values[i])
+        records.append(record)
+    return records
+
+
+def messy_records(records, seed=1):
+    """Copies of records with about a tenth of the cells replaced or turned into strings"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    messy = []
+    for record in records:
+        record = dict(record)
+        for field in list(record):
+            if field == 'id':
+                continue
+            roll = rng.random()
+            if roll < 0.05:
+                record[field] = MESSY_CELLS[rng.integers(len(MESSY_CELLS))]
+            elif roll < 0.1:
+                value = record[field]
+                record[field] = str(int(value)) if rng.random() < 0.5 else str(value)
+        messy.append(record)
+    return messy
+
+
+def expected_level(record):
+    """calculate_health_risk's level with empty strings dropped, or None where it raises"""
+    from risk import calculate_health_risk
+
+    try:
+        return calculate_health_risk({k: v for k, v in record.items() if not (isinstance(v, str) and v == '')})
+    except (TypeError, ValueError, OverflowError, ZeroDivisionError):
+        return None
+
+
+def mismatches(results, records):
+    return sum(result.get('risk_level') != expected_level(record) for result, record in zip(results, records))
+
+
+def to_csv(records, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer
+
+
+def best_seconds(fn, repeat):
+    """(fastest wall time of repeat calls, last result)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    import numpy as np
+    from risk import (FIELDS, INT_FIELDS, _record_id, calculate_health_risk, read_csv_records, risk_levels, risk_scores,
+                      score_records)
+
+    parser = argparse.ArgumentParser(description='Vectorized risk scoring equivalence and throughput')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per path; the fastest is reported')
+    args = parser.parse_args(argv)
+
+    records = random_records(args.rows)
+    messy = messy_records(records)
+
+    # Equivalence, including the errors, on both input paths
+    checked = {}
+    for name, rows in (('clean', records), ('messy', messy)):
+        checked[f"{name}_records"] = mismatches(list(score_records(rows)), rows)
+        buffer = to_csv(rows, ('id',) + FIELDS)
+        buffer.seek(0)
+        csv_rows = list(read_csv_records(buffer))
+        checked[f"{name}_csv"] = mismatches(list(score_records(csv_rows)), csv_rows)
+    errors = sum(expected_level(record) is None for record in messy)
+
+    def scalar_results():
+        return [{'row': i, 'id': _record_id(record), 'risk_level': calculate_health_risk(record)}
+                for i, record in enumerate(records)]
+
+    scalar_seconds, expected = best_seconds(lambda: [calculate_health_risk(record) for record in records],
+                                            args.repeat)
+    scalar_results_seconds, _ = best_seconds(scalar_results, args.repeat)
+    records_seconds, _ = best_seconds(lambda: list(score_records(records)), args.repeat)
+
+    columns = [np.array([record.get(field, np.nan) for record in records]) for field in FIELDS]
+    column_seconds, _ = best_seconds(lambda: risk_levels(risk_scores(*columns)), args.repeat)
+
+    # A CSV of the same readings, with the int fields written as whole numbers
+    # (int() rejects '120.5', so fractional cells would time the error path)
+    buffer = to_csv([{field: int(value) if field in INT_FIELDS else value for field, value in record.items()}
+                     for record in records], ('id',) + FIELDS)
+
+    def score_csv():
+        buffer.seek(0)
+        return list(score_records(read_csv_records(buffer)))
+
+    csv_seconds, _ = best_seconds(score_csv, args.repeat)
+
+    total = sum(checked.values())
+    print(json.dumps({
+        'rows': args.rows,
+        'mismatches': checked,
+        'messy_rows_rejected': errors,
+        'levels': {level: expected.count(level) for level in ('Low', 'Medium', 'High')},
+        'scalar_rows_per_sec': round(args.rows / scalar_seconds),
+        'scalar_results_rows_per_sec': round(args.rows / scalar_results_seconds),
+        'records_rows_per_sec': round(args.rows / records_seconds),
+        'columns_rows_per_sec': round(args.rows / column_seconds),
+        'csv_rows_per_sec': round(args.rows / csv_seconds),
+    }, indent=2))
+    if total:
+        print(f"FAIL: {total} rows differ from calculate_health_risk", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Measure symptom prediction latency and batch throughput.
+
+Builds the index from ``datasets/symbipredict_2022.csv``, then times single
+predictions and batches of the dataset's own symptom sets with both scoring
+methods. It also reports top-1 and top-3 accuracy on those rows as a sanity
+check::
+
+    python benchmarks/bench_symptoms.py --batch-size 1000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+
+def read_cases(csv_path):
+    with open(csv_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return [([name for name, flag in zip(header[:-1], row[:-1]) if flag.strip() == '1'], row[-1].strip())
+                for row in reader if row]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def main(argv=None):
+    from symptom_index import SYMPTOM_CSV, SymptomIndex, load_symptom_index
+
+    parser = argparse.ArgumentParser(description='Symptom prediction benchmark')
+    parser.add_argument('--csv', default=os.path.join(PROJECT_DIR, SYMPTOM_CSV))
+    parser.add_argument('--singles', type=int, default=2000, help='single predictions to time')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    cases = read_cases(args.csv)
+    result = {'rows': len(cases)}
+    with tempfile.TemporaryDirectory() as workdir:
+        index_path = os.path.join(workdir, 'symptom_index.npz')
+        started = time.perf_counter()
+        index = load_symptom_index(args.csv, index_path)
+        result['build_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        started = time.perf_counter()
+        SymptomIndex.load(index_path)
+        result['load_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    for method in ('bayes', 'jaccard'):
+        latencies = []
+        for i in range(args.singles):
+            symptoms = cases[i % len(cases)][0]
+            started = time.perf_counter()
+            index.predict([symptoms], 5, method)
+            latencies.append((time.perf_counter() - started) * 1e6)
+
+        batch = [symptoms for symptoms, _ in cases[:args.batch_size]]
+        started = time.perf_counter()
+        predictions = index.predict(batch, 3, method)
+        batch_seconds = time.perf_counter() - started
+
+        labels = [label for _, label in cases[:args.batch_size]]
+        top1 = sum(p[0]['disease'] == label for p, label in zip(predictions, labels))
+        top3 = sum(label in [entry['disease'] for entry in p] for p, label in zip(predictions, labels))
+        result[method] = {
+            'single_p50_us': round(percentile(latencies, 50), 1),
+            'single_p99_us': round(percentile(latencies, 99), 1),
+            'batch_sets_per_sec': round(len(batch) / batch_seconds),
+            'top1_accuracy': round(top1 / len(batch), 3),
+            'top3_accuracy': round(top3 / len(batch), 3),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
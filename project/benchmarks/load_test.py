@@ -0,0 +1,368 @@
+"""Load-test the Flask routes against the fake Ollama server.
+
+Seeds a scratch data directory with synthetic users (health data and chat
+history included), starts the fake Ollama server and the app in a separate
+process, then drives each scenario from concurrent logged-in clients and
+prints p50/p95/p99 latency and requests/sec per scenario as JSON::
+
+    python benchmarks/load_test.py --users 10000 --duration 15 -o before.json
+    python benchmarks/load_test.py --users 10000 --duration 15 --compare before.json
+
+Seeding 100k users takes a while; pass ``--workdir`` to keep the seeded data
+and reuse it on later runs. ``--url`` targets an already running server
+(for example gunicorn started in a seeded ``--workdir``) instead of starting
+one. Chat messages are unique per request, so they miss the response cache
+and every chat reaches the fake backend.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+SCENARIOS = ('signup', 'login', 'health_post', 'chat', 'chat_stream', 'chat_history', 'health_history')
+PASSWORD = 'load-test-password'
+SEED_BATCH = 5000
+
+
+def user_email(i):
+    return f"load{i}@example.com"
+
+
+def seed(workdir, backend, users, chat_messages, seed_value=0):
+    """Populate workdir's storage with synthetic users unless already seeded"""
+    from werkzeug.security import generate_password_hash
+    from storage import JsonStorage, SQLiteStorage, JSON_FILES, CHAT_DIR
+
+    marker_path = os.path.join(workdir, 'seed.json')
+    marker = {'backend': backend, 'users': users, 'chat_messages': chat_messages, 'seed': seed_value}
+    if os.path.exists(marker_path):
+        with open(marker_path) as f:
+            if json.load(f) == marker:
+                return 0.0
+        raise SystemExit(f"{workdir} was seeded with different settings; use a fresh --workdir")
+
+    started = time.perf_counter()
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    if backend == 'json':
+        files = {table: os.path.join(workdir, path) for table, path in JSON_FILES.items()}
+        storage = JsonStorage(files, chat_dir=os.path.join(workdir, CHAT_DIR))
+    else:
+        storage = SQLiteStorage(os.path.join(data_dir, 'healthcare.db'))
+
+    rng = random.Random(seed_value)
+    # One hash for everyone: hashing is deliberately slow and would dominate seeding
+    password_hash = generate_password_hash(PASSWORD)
+    now = datetime.now()
+    for batch_start in range(0, users, SEED_BATCH):
+        with storage.transaction():
+            for i in range(batch_start, min(users, batch_start + SEED_BATCH)):
+                user_id = f"load-{i:06d}"
+                storage.put('users', user_id, {
+                    'name': f"Load User {i}",
+                    'email': user_email(i),
+                    'phone': f"555{i:07d}",
+                    'gender': rng.choice(['male', 'female']),
+                    'age': rng.randint(18, 80),
+                    'password_hash': password_hash,
+                    'created_at': (now - timedelta(days=rng.randint(1, 365))).isoformat(),
+                    'points': rng.randint(0, 500),
+                })
+                storage.put('health_data', user_id, {
+                    'weight': round(rng.uniform(50, 110), 1),
+                    'height': rng.randint(150, 195),
+                    'blood_pressure_systolic': rng.randint(100, 160),
+                    'blood_pressure_diastolic': rng.randint(60, 100),
+                    'heart_rate': rng.randint(55, 105),
+                    'glucose_level': rng.randint(80, 160),
+                    'last_updated': (now - timedelta(hours=rng.randint(1, 500))).isoformat(),
+                })
+                if chat_messages:
+                    storage.put('chat_history', user_id, [{
+                        'timestamp': (now - timedelta(minutes=chat_messages - n)).isoformat(),
+                        'user_message': f"Seeded question {n}",
+                        'ai_response': "Seeded answer. Please consult a healthcare professional.",
+                    } for n in range(chat_messages)])
+
+    with open(marker_path, 'w') as f:
+        json.dump(marker, f)
+    return time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(port):
+    """Run the app on a threaded WSGI server (the server process's entry point)"""
+    import logging
+    from werkzeug.serving import make_server
+    import app
+
+    logging.disable(logging.CRITICAL)
+    make_server('127.0.0.1', port, app.app, threaded=True).serve_forever()
+
+
+def start_server(workdir, backend, ollama_url, job_workers):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR, STORAGE_BACKEND=backend, OLLAMA_HOST=ollama_url,
+               JOB_WORKERS=str(job_workers))
+    env.pop('STORAGE_PATH', None)
+    env.pop('JOBS_PATH', None)
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_until_up(client, process=None, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"App server exited with status {process.returncode}")
+        try:
+            client.get('/')
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise SystemExit('App server did not come up')
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+    }
+
+
+def ok(response):
+    if response.status_code >= 400:
+        return False
+    if response.headers.get('content-type', '').startswith('application/json'):
+        body = response.json()
+        return not (isinstance(body, dict) and body.get('success') is False)
+    return True
+
+
+def make_request(scenario, client, state):
+    """Issue one request of a scenario and return whether it succeeded"""
+    state['n'] += 1
+    tag = f"{state['worker']}-{state['n']}"
+    if scenario == 'signup':
+        response = client.post('/signup', json={
+            'name': 'Signup User', 'email': f"signup-{state['run']}-{tag}@example.com",
+            'phone': '5550000000', 'gender': 'female', 'age': 30, 'password': PASSWORD,
+        })
+    elif scenario == 'login':
+        client.cookies.clear()
+        response = client.post('/login', json={
+            'email': user_email(state['rng'].randrange(state['users'])), 'password': PASSWORD,
+        })
+    elif scenario == 'health_post':
+        rng = state['rng']
+        response = client.post('/api/health-data', json={
+            'weight': round(rng.uniform(50, 110), 1), 'height': rng.randint(150, 195),
+            'blood_pressure_systolic': rng.randint(100, 160), 'heart_rate': rng.randint(55, 105),
+            'glucose_level': rng.randint(80, 160),
+        })
+    elif scenario == 'chat':
+        response = client.post('/api/chat', json={'message': f"How can I sleep better? ({state['run']}-{tag})"})
+    elif scenario == 'chat_stream':
+        with client.stream('POST', '/api/chat', json={
+                'message': f"How much water should I drink? ({state['run']}-{tag})", 'stream': True}) as response:
+            body = b''.join(response.iter_bytes())
+        return response.status_code == 200 and b'"done": true' in body
+    elif scenario == 'chat_history':
+        response = client.get('/api/chat/history?limit=50')
+    elif scenario == 'health_history':
+        response = client.get('/api/health-data/history?resolution=day')
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    return ok(response)
+
+
+def run_scenario(scenario, base_url, users, concurrency, duration, max_requests, run_id):
+    """Drive one scenario from concurrent clients, each logged in as a different seeded user"""
+    import httpx
+
+    rng = random.Random(scenario)
+    clients = []
+    for worker in range(concurrency):
+        client = httpx.Client(base_url=base_url, timeout=120.0)
+        if scenario not in ('signup', 'login'):
+            response = client.post('/login', json={'email': user_email(rng.randrange(users)), 'password': PASSWORD})
+            if not ok(response):
+                raise SystemExit(f"Could not log in a seeded user: {response.text[:200]}")
+        clients.append(client)
+
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    quota = [max_requests]
+    quota_lock = threading.Lock()
+
+    def work(worker):
+        client = clients[worker]
+        state = {'worker': worker, 'n': 0, 'run': run_id, 'users': users, 'rng': random.Random(f"{scenario}-{worker}")}
+        while time.perf_counter() < deadline:
+            if max_requests:
+                with quota_lock:
+                    if quota[0] <= 0:
+                        return
+                    quota[0] -= 1
+            started = time.perf_counter()
+            try:
+                success = make_request(scenario, client, state)
+            except Exception:
+                success = False
+            latencies[worker].append(time.perf_counter() - started)
+            if not success:
+                errors[worker] += 1
+
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        client.close()
+    return summarize([value for worker in latencies for value in worker], sum(errors), elapsed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(result, baseline):
+    """Table of p50/p99/rps changes against a previous run, on stderr"""
+    print(f"{'scenario':<16}{'p50 ms':>20}{'p99 ms':>20}{'rps':>20}", file=sys.stderr)
+    for scenario, current in result['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous:
+            continue
+        cells = []
+        for field in ('p50_ms', 'p99_ms', 'rps'):
+            old, new = previous.get(field), current.get(field)
+            change = f"{(new - old) / old:+.0%}" if old and new is not None else 'n/a'
+            cells.append(f"{old}->{new} {change}")
+        print(f"{scenario:<16}" + ''.join(f"{cell:>20}" for cell in cells), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the app against a fake Ollama backend')
+    parser.add_argument('--users', type=int, default=1000, help='seeded users (e.g. 1000, 10000, 100000)')
+    parser.add_argument('--chat-messages', type=int, default=20, help='seeded chat messages per user')
+    parser.add_argument('--backend', choices=['sqlite', 'json'], default='sqlite')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+    parser.add_argument('--requests', type=int, default=0, help='stop a scenario after this many requests')
+    parser.add_argument('--ollama-latency', type=float, default=0.2, help='fake Ollama seconds before the first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=200.0, help='fake Ollama generation rate')
+    parser.add_argument('--job-workers', type=int, default=2)
+    parser.add_argument('--workdir', help='data directory to seed and reuse (default: a temporary one)')
+    parser.add_argument('--url', help='load-test an already running server instead of starting one')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='also write the JSON result to this file')
+    parser.add_argument('--compare', help='previous JSON result to compare against')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    import httpx
+    from fake_ollama import FakeOllamaServer
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    temporary = None if args.workdir else tempfile.TemporaryDirectory()
+    workdir = os.path.abspath(args.workdir or temporary.name)
+    os.makedirs(workdir, exist_ok=True)
+    seed_seconds = seed(workdir, args.backend, args.users, args.chat_messages, args.seed)
+
+    ollama = process = None
+    try:
+        base_url = args.url
+        if not base_url:
+            ollama = FakeOllamaServer(port=0, latency=args.ollama_latency,
+                                      tokens_per_sec=args.tokens_per_sec).start()
+            process, base_url = start_server(workdir, args.backend, ollama.url, args.job_workers)
+        with httpx.Client(base_url=base_url, timeout=5.0) as client:
+            wait_until_up(client, process)
+
+        run_id = f"{int(time.time())}-{random.Random().randrange(10 ** 6)}"
+        result = {
+            'meta': {
+                'commit': git_commit(),
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'backend': args.backend,
+                'users': args.users,
+                'chat_messages': args.chat_messages,
+                'concurrency': args.concurrency,
+                'duration': args.duration,
+                'ollama_latency': args.ollama_latency,
+                'tokens_per_sec': args.tokens_per_sec,
+                'seed_seconds': round(seed_seconds, 1),
+            },
+            'scenarios': {},
+        }
+        for scenario in scenarios:
+            result['scenarios'][scenario] = run_scenario(scenario, base_url, args.users, args.concurrency,
+                                                         args.duration, args.requests, run_id)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if ollama is not None:
+            ollama.stop()
+        if temporary is not None:
+            temporary.cleanup()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(result, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
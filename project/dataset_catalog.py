@@ -0,0 +1,248 @@
+"""Typed columnar cache of the CSV datasets.
+
+``load_table(csv_path)`` parses a CSV once and writes each column to its own
+``.npy`` file under ``models/cache/datasets/<name>-<hash>/``, with a
+``table.json`` manifest. The directory name includes the CSV's content hash,
+so an edited CSV gets a new cache and the old one is deleted. Later loads
+memory-map only the columns that are asked for, with no text parsing, no
+type inference and no copies.
+
+Column types are inferred once, at conversion:
+
+* ``bool``: only 0/1, true/false or yes/no values, one byte per row
+* ``int``: whole numbers, int64
+* ``float``: other numbers, float64, with NaN for empty cells
+* ``category``: anything else, as int8/int16/int32 codes into the column's
+  distinct strings (kept in a JSON file read only when the column is decoded)
+
+Tables are memoized per process by path, size and modification time, so a
+CSV is hashed once per process and version.
+"""
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+
+from model_registry import file_sha256
+
+DATASET_CACHE_DIR = os.path.join('models', 'cache', 'datasets')
+FORMAT_VERSION = 1
+KINDS = ('bool', 'int', 'float', 'category')
+
+_BOOL_SPELLINGS = ({'0', '1'}, {'false', 'true'}, {'no', 'yes'})
+
+logger = logging.getLogger(__name__)
+
+
+def _infer(values):
+    """(kind, array, extra manifest fields) for one column of CSV strings"""
+    stripped = [value.strip() for value in values]
+    if stripped and all(stripped):
+        lowered = set(value.lower() for value in stripped)
+        for spelling in _BOOL_SPELLINGS:
+            if lowered <= spelling:
+                true_value = max(spelling)
+                array = np.array([value.lower() == true_value for value in stripped], dtype=bool)
+                # Yes/no columns are text to pandas; 0/1 and true/false are numbers
+                return 'bool', array, {'numeric': spelling != {'no', 'yes'}}
+        try:
+            return 'int', np.array([int(value) for value in stripped], dtype=np.int64), {}
+        except (ValueError, OverflowError):
+            pass
+    try:
+        return 'float', np.array([float(value) if value else np.nan for value in stripped], dtype=np.float64), {}
+    except ValueError:
+        pass
+    categories = sorted(set(values))
+    position = {value: i for i, value in enumerate(categories)}
+    code_type = np.int8 if len(categories) <= 127 else np.int16 if len(categories) <= 32767 else np.int32
+    return 'category', np.array([position[value] for value in values], dtype=code_type), {'categories': categories}
+
+
+def _unique_names(header):
+    """Header names made unique the way pandas does: a repeated 'x' becomes 'x.1'"""
+    seen = {}
+    names = []
+    for i, name in enumerate(header):
+        name = name.strip() or f"column_{i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def convert_csv(csv_path, directory, source_hash):
+    """Parse csv_path and write its columns and manifest into directory"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if row]
+    ragged = sum(len(row) != len(header) for row in rows)
+    if ragged:
+        raise ValueError(f"{ragged} rows of {csv_path} do not have {len(header)} fields")
+
+    tmp_dir = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, (raw_name, name) in enumerate(zip(header, _unique_names(header))):
+        kind, array, extra = _infer([row[i] for row in rows])
+        file_name = f"c{i:04d}"
+        np.save(os.path.join(tmp_dir, f"{file_name}.npy"), array)
+        column = {'name': name, 'header': raw_name, 'kind': kind, 'file': file_name, 'dtype': array.dtype.str}
+        if 'categories' in extra:
+            with open(os.path.join(tmp_dir, f"{file_name}.categories.json"), 'w', encoding='utf-8') as f:
+                json.dump(extra['categories'], f, ensure_ascii=False)
+            column['num_categories'] = len(extra['categories'])
+        if 'numeric' in extra:
+            column['numeric'] = extra['numeric']
+        columns.append(column)
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'source': os.path.basename(csv_path),
+        'source_hash': source_hash,
+        'rows': len(rows),
+        'columns': columns,
+    }
+    with open(os.path.join(tmp_dir, 'table.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    try:
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # Another process converted the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+class Table:
+    """Memory-mapped columns of one converted CSV"""
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.source = manifest['source']
+        self.source_hash = manifest['source_hash']
+        self.rows = manifest['rows']
+        self.columns = [column['name'] for column in manifest['columns']]
+        self.header = [column['header'] for column in manifest['columns']]
+        self._meta = {column['name']: column for column in manifest['columns']}
+        self._arrays = {}
+        self._categories = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.rows
+
+    def kind(self, name):
+        return self._meta[name]['kind']
+
+    def is_numeric(self, name):
+        """True where pandas would infer a numeric dtype: numbers and 0/1 or true/false flags"""
+        meta = self._meta[name]
+        return meta['kind'] in ('int', 'float') or meta.get('numeric', False)
+
+    def column(self, name):
+        """Read-only memmap of a column; codes for category columns"""
+        array = self._arrays.get(name)
+        if array is None:
+            path = os.path.join(self.directory, f"{self._meta[name]['file']}.npy")
+            array = np.load(path, mmap_mode='r')
+            with self._lock:
+                array = self._arrays.setdefault(name, array)
+        return array
+
+    def categories(self, name):
+        """The distinct strings of a category column, indexed by its codes"""
+        categories = self._categories.get(name)
+        if categories is None:
+            meta = self._meta[name]
+            if meta['kind'] != 'category':
+                raise ValueError(f"Column {name} of {self.source} is not a category column")
+            with open(os.path.join(self.directory, f"{meta['file']}.categories.json"), encoding='utf-8') as f:
+                categories = np.array(json.load(f), dtype=object)
+            with self._lock:
+                categories = self._categories.setdefault(name, categories)
+        return categories
+
+    def values(self, name):
+        """A column's values, with category codes decoded to strings"""
+        if self.kind(name) == 'category':
+            return self.categories(name)[self.column(name)]
+        return self.column(name)
+
+    def project(self, names):
+        """{name: column} for a subset of the columns, without reading the others"""
+        return {name: self.column(name) for name in names}
+
+    def matrix(self, names, dtype=np.float64):
+        """(rows, len(names)) array of numeric or bool columns"""
+        out = np.empty((self.rows, len(names)), dtype=dtype)
+        for i, name in enumerate(names):
+            if self.kind(name) == 'category':
+                raise ValueError(f"Column {name} of {self.source} is not numeric")
+            out[:, i] = self.column(name)
+        return out
+
+
+def _cache_name(csv_path, source_hash):
+    stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(csv_path))[0])
+    return stem, f"{stem}-{source_hash[:16]}"
+
+
+def _prune_stale(cache_dir, stem, current):
+    """Delete caches of older versions of the same CSV"""
+    for name in os.listdir(cache_dir):
+        if name != current and name.rsplit('-', 1)[0] == stem and os.path.isdir(os.path.join(cache_dir, name)):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            logger.info(f"Removed stale dataset cache {name}")
+
+
+def open_table(csv_path, cache_dir=DATASET_CACHE_DIR):
+    """Table for csv_path, converting the CSV if this version has no cache yet"""
+    source_hash = file_sha256(csv_path)
+    stem, name = _cache_name(csv_path, source_hash)
+    directory = os.path.join(cache_dir, name)
+    manifest_file = os.path.join(directory, 'table.json')
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == FORMAT_VERSION and manifest.get('source_hash') == source_hash:
+                return Table(directory, manifest)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable dataset cache {directory}: {str(e)}")
+        shutil.rmtree(directory, ignore_errors=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = convert_csv(csv_path, directory, source_hash)
+    logger.info(f"Converted {csv_path} to {len(manifest['columns'])} columns x {manifest['rows']} rows in {directory}")
+    _prune_stale(cache_dir, stem, name)
+    return Table(directory, manifest)
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def load_table(csv_path, cache_dir=DATASET_CACHE_DIR):
+    """Process-wide Table for csv_path, checked against the file's size and mtime on each call"""
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), os.path.abspath(cache_dir))
+    version = (stat.st_size, stat.st_mtime_ns)
+    cached = _tables.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _tables_lock:
+        cached = _tables.get(key)
+        if cached is None or cached[0] != version:
+            cached = _tables[key] = (version, open_table(csv_path, cache_dir))
+    return cached[1]
@@ -0,0 +1,173 @@
+"""Local stand-in for the Ollama API, for development and tests.
+
+Serves ``POST /api/generate`` in both streaming (NDJSON) and non-streaming
+mode with a canned answer, so the chat routes can be exercised without a
+model. Run it where the app expects Ollama::
+
+    python fake_ollama.py --port 5001 --latency 0.5 --tokens-per-sec 20
+
+or start it in-process with ``FakeOllamaServer(port=0).start()``.
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = (
+    "Staying active, eating a balanced diet and sleeping well all help keep "
+    "your health on track. Please consult a healthcare professional for any "
+    "serious concerns."
+)
+
+
+def tokenize(text):
+    """Split text into word-sized tokens that join back to the original"""
+    words = text.split(' ')
+    return [word if i == 0 else ' ' + word for i, word in enumerate(words)]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, body):
+        data = (json.dumps(body) + '\n').encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json(200, {'models': [{'name': f"{self.server.model}:latest"}]})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': 'invalid JSON'})
+            return
+        if self.path != '/api/generate':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        self.server.request_count += 1
+        model = payload.get('model', self.server.model)
+        prompt = payload.get('prompt', '')
+        tokens = tokenize(self.server.response_text)
+        token_delay = 1.0 / self.server.tokens_per_sec if self.server.tokens_per_sec else 0.0
+        started = time.perf_counter()
+        time.sleep(self.server.latency)
+        prompt_eval_done = time.perf_counter()
+
+        final = {
+            'model': model,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'done': True,
+            # Like Ollama, the returned context extends the one sent with the request
+            'context': list(payload.get('context') or []) + list(range(len(prompt.split()) + len(tokens))),
+            'prompt_eval_count': len(payload.get('system', '').split()) + len(prompt.split()),
+            'prompt_eval_duration': int((prompt_eval_done - started) * 1e9),
+            'eval_count': len(tokens),
+        }
+
+        if not payload.get('stream', True):
+            time.sleep(token_delay * len(tokens))
+            final['response'] = ''.join(tokens)
+            final['eval_duration'] = int((time.perf_counter() - prompt_eval_done) * 1e9)
+            final['total_duration'] = int((time.perf_counter() - started) * 1e9)
+            self._send_json(200, final)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(token_delay)
+                self._write_chunk({
+                    'model': model,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'response': token,
+                    'done': False,
+                })
+            final['response'] = ''
+            final['eval_duration'] = int((time.perf_counter() - prompt_eval_done) * 1e9)
+            final['total_duration'] = int((time.perf_counter() - started) * 1e9)
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """Threaded fake Ollama server with configurable latency and token rate"""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=5001, response_text=DEFAULT_RESPONSE,
+                 latency=0.0, tokens_per_sec=0.0, model='llama2', verbose=False):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.response_text = response_text
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.model = model
+        self.verbose = verbose
+        self.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake Ollama server for local testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds of simulated prompt evaluation before the first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=0.0,
+                        help='simulated generation rate (0 = as fast as possible)')
+    parser.add_argument('--response', default=DEFAULT_RESPONSE, help='canned answer text')
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(args.host, args.port, args.response, args.latency,
+                              args.tokens_per_sec, verbose=True)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
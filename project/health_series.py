@@ -0,0 +1,254 @@
+"""Append-only per-user time series of health readings.
+
+Every health-data submission appends one reading (timestamp plus the vital
+signs in ``METRICS``) instead of overwriting the previous values. Readings
+are kept column-wise in the ``health_series`` storage table as packed NumPy
+arrays, base64-encoded inside the JSON documents:
+
+* ``{user}``                 head: reading count and each chunk's first timestamp
+* ``{user}/raw/{n}``         chunk ``n``: up to ``CHUNK_SIZE`` readings
+* ``{user}/day/{year}``      daily count/sum/min/max per metric for one year
+* ``{user}/week/{year}``     the same per ISO week (Monday start)
+
+An append rewrites only the head, the last raw chunk and the two rollup
+documents it falls into, so its cost does not grow with the history. Range
+queries read only the chunks overlapping the range, and chart queries read
+the pre-aggregated rollups.
+"""
+import base64
+import bisect
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+METRICS = ('weight', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'heart_rate', 'glucose_level')
+RESOLUTIONS = ('day', 'week')
+CHUNK_SIZE = 512
+TABLE = 'health_series'
+# Range accepted by parse_time: the epoch up to a year short of datetime's limit,
+# so bucket and year arithmetic on either bound stays representable
+MIN_TIME = 0
+MAX_TIME = int(datetime(9999, 1, 1).timestamp())
+
+
+def pack(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+
+
+def unpack(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+
+def bucket_start(timestamp, resolution):
+    """Local midnight starting the day or ISO week containing timestamp"""
+    day = datetime.fromtimestamp(timestamp).date()
+    if resolution == 'week':
+        day -= timedelta(days=day.weekday())
+    return datetime.combine(day, datetime.min.time())
+
+
+def _rollup_key(user_id, resolution, year):
+    return f"{user_id}/{resolution}/{year}"
+
+
+def _years(start, end):
+    return range(datetime.fromtimestamp(start).year, datetime.fromtimestamp(end).year + 1)
+
+
+class Rollup:
+    """Columnar count/sum/min/max per metric for consecutive buckets"""
+
+    def __init__(self, doc=None):
+        doc = doc or {}
+        self.starts = unpack(doc['start'], np.int64) if doc else np.zeros(0, np.int64)
+        self.columns = {}
+        for metric in METRICS:
+            if doc and metric in doc:
+                # Copies, since add() updates the decoded (read-only) buffers in place
+                column = doc[metric]
+                self.columns[metric] = {
+                    'count': unpack(column['count'], np.int32).copy(),
+                    'sum': unpack(column['sum'], np.float64).copy(),
+                    'min': unpack(column['min'], np.float32).copy(),
+                    'max': unpack(column['max'], np.float32).copy(),
+                }
+            else:
+                n = len(self.starts)
+                self.columns[metric] = {
+                    'count': np.zeros(n, np.int32),
+                    'sum': np.zeros(n, np.float64),
+                    'min': np.full(n, np.nan, np.float32),
+                    'max': np.full(n, np.nan, np.float32),
+                }
+
+    def add(self, start, values):
+        """Fold one reading into the bucket beginning at ``start`` (epoch seconds)"""
+        i = int(np.searchsorted(self.starts, start))
+        if i == len(self.starts) or self.starts[i] != start:
+            self.starts = np.insert(self.starts, i, start)
+            for column in self.columns.values():
+                column['count'] = np.insert(column['count'], i, 0)
+                column['sum'] = np.insert(column['sum'], i, 0.0)
+                column['min'] = np.insert(column['min'], i, np.nan)
+                column['max'] = np.insert(column['max'], i, np.nan)
+        for metric, value in values.items():
+            column = self.columns[metric]
+            column['count'][i] += 1
+            column['sum'][i] += value
+            column['min'][i] = np.fmin(column['min'][i], value)
+            column['max'][i] = np.fmax(column['max'][i], value)
+
+    def to_doc(self):
+        doc = {'start': pack(self.starts)}
+        for metric, column in self.columns.items():
+            if column['count'].any():
+                doc[metric] = {name: pack(values) for name, values in column.items()}
+        return doc
+
+
+class HealthSeries:
+    """Time series of health readings on top of a Storage backend"""
+
+    def __init__(self, storage, chunk_size=CHUNK_SIZE):
+        self.storage = storage
+        self.chunk_size = chunk_size
+
+    def _head(self, user_id):
+        return self.storage.get(TABLE, user_id) or {'count': 0, 'chunk_starts': [], 'last': None}
+
+    def count(self, user_id):
+        return self._head(user_id)['count']
+
+    def append(self, user_id, reading, timestamp=None):
+        """Record the METRICS present in ``reading``; returns False if there were none"""
+        values = {}
+        for metric in METRICS:
+            try:
+                if reading.get(metric) not in (None, ''):
+                    values[metric] = float(reading[metric])
+            except (TypeError, ValueError):
+                continue
+        if not values:
+            return False
+
+        with self.storage.transaction():
+            head = self._head(user_id)
+            timestamp = int(time.time() if timestamp is None else timestamp)
+            # Keep each user's series ordered even if the clock steps back
+            if head['last'] is not None:
+                timestamp = max(timestamp, head['last'])
+
+            chunk_no = len(head['chunk_starts']) - 1
+            chunk = self.storage.get(TABLE, f"{user_id}/raw/{chunk_no}") if chunk_no >= 0 else None
+            if chunk is None or chunk['n'] >= self.chunk_size:
+                chunk_no += 1
+                head['chunk_starts'].append(timestamp)
+                chunk = {'n': 0, 't': pack(np.zeros(0, np.int64))}
+                chunk.update({metric: pack(np.zeros(0, np.float32)) for metric in METRICS})
+            chunk['t'] = pack(np.append(unpack(chunk['t'], np.int64), timestamp))
+            for metric in METRICS:
+                column = np.append(unpack(chunk[metric], np.float32), values.get(metric, np.nan))
+                chunk[metric] = pack(column.astype(np.float32))
+            chunk['n'] += 1
+            self.storage.put(TABLE, f"{user_id}/raw/{chunk_no}", chunk)
+
+            for resolution in RESOLUTIONS:
+                start = bucket_start(timestamp, resolution)
+                key = _rollup_key(user_id, resolution, start.year)
+                rollup = Rollup(self.storage.get(TABLE, key))
+                rollup.add(int(start.timestamp()), values)
+                self.storage.put(TABLE, key, rollup.to_doc())
+
+            head['count'] += 1
+            head['last'] = timestamp
+            self.storage.put(TABLE, user_id, head)
+        return True
+
+    def readings(self, user_id, start=None, end=None):
+        """Raw readings with start <= timestamp < end as {'t': int64 array, metric: float32 array}"""
+        head = self._head(user_id)
+        starts = head['chunk_starts']
+        first = 0 if start is None else max(bisect.bisect_right(starts, start) - 1, 0)
+        last = len(starts) if end is None else bisect.bisect_left(starts, end)
+        parts = {name: [] for name in ('t',) + METRICS}
+        for chunk_no in range(first, last):
+            chunk = self.storage.get(TABLE, f"{user_id}/raw/{chunk_no}")
+            if chunk is None:
+                continue
+            parts['t'].append(unpack(chunk['t'], np.int64))
+            for metric in METRICS:
+                parts[metric].append(unpack(chunk[metric], np.float32))
+
+        t = np.concatenate(parts['t']) if parts['t'] else np.zeros(0, np.int64)
+        mask = np.ones(len(t), dtype=bool)
+        if start is not None:
+            mask &= t >= start
+        if end is not None:
+            mask &= t < end
+        result = {'t': t[mask]}
+        for metric in METRICS:
+            column = np.concatenate(parts[metric]) if parts[metric] else np.zeros(0, np.float32)
+            result[metric] = column[mask]
+        return result
+
+    def rollups(self, user_id, resolution, start, end):
+        """Buckets starting in [start, end) as {'start': int64 array, metric: {stat: array}}"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        # Include the bucket that start falls in
+        start = int(bucket_start(start, resolution).timestamp())
+        merged = Rollup()
+        parts = [Rollup(self.storage.get(TABLE, _rollup_key(user_id, resolution, year)))
+                 for year in _years(start, end)] or [Rollup()]
+        merged.starts = np.concatenate([part.starts for part in parts])
+        mask = (merged.starts >= start) & (merged.starts < end)
+        merged.starts = merged.starts[mask]
+        for metric in METRICS:
+            for name in ('count', 'sum', 'min', 'max'):
+                merged.columns[metric][name] = np.concatenate(
+                    [part.columns[metric][name] for part in parts])[mask]
+        result = {'start': merged.starts}
+        for metric, column in merged.columns.items():
+            count = column['count']
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, column['sum'] / np.maximum(count, 1), np.nan)
+            result[metric] = {'count': count, 'mean': mean, 'min': column['min'], 'max': column['max']}
+        return result
+
+
+def default_range(resolution, now=None):
+    """Default chart window: 30 days of daily buckets or 26 weeks of weekly ones"""
+    now = now or time.time()
+    span = timedelta(days=30) if resolution == 'day' else timedelta(weeks=26)
+    end = bucket_start(now, resolution)
+    end += timedelta(days=1) if resolution == 'day' else timedelta(weeks=1)
+    return int((end - span).timestamp()), int(end.timestamp())
+
+
+def parse_time(value):
+    """Epoch seconds from an ISO date/datetime string or a number; None if empty
+
+    Raises ValueError for unparseable, non-finite or out-of-range values
+    (before 1970 or from year 9999 on).
+    """
+    if value in (None, ''):
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = datetime.fromisoformat(value).timestamp()
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"Time out of range: {value}") from e
+    if not MIN_TIME <= seconds < MAX_TIME:
+        # Also rejects inf and nan, for which every comparison is False
+        raise ValueError(f"Time out of range: {value}")
+    return int(seconds)
+
+
+def to_json_list(array, digits=2):
+    """Array as a JSON-friendly list with NaN mapped to None"""
+    if array.dtype.kind == 'f':
+        return [None if np.isnan(v) else round(float(v), digits) for v in array]
+    return array.tolist()
@@ -0,0 +1,441 @@
+"""Micro-batched CPU inference for the trained models.
+
+``InferenceService.predict(name, inputs)`` runs one example through a model
+from ``models/`` and returns its output row. Each model is loaded once per
+process through ``ModelRegistry.load`` and served by its own batching
+thread: requests wait in a queue, and the thread runs them through the model
+together as soon as ``max_batch`` are waiting or the oldest has waited
+``max_wait`` seconds. Concurrent requests share one forward pass instead of
+each paying for their own, and a model is only ever called from one thread.
+Requests that arrive while a batch is running are picked up by the next one,
+so batches grow with load even when ``max_wait`` is 0.
+
+Keras models run with ``predict_on_batch``; ``model.predict`` builds a
+dataset pipeline on every call and costs tens of milliseconds even for one
+row. With ``runtime='tflite'`` each Keras model is exported once to
+``models/tflite/<name>.tflite`` (again whenever the Keras artifact is newer)
+and run in the TFLite interpreter, which needs only the small
+``ai-edge-litert`` or ``tflite-runtime`` package when the export already
+exists. Models TFLite cannot convert with a dynamic batch size (LSTMs) are
+exported with a fixed batch of ``max_batch`` rows and padded. The SARSA
+Q-table is a numpy row lookup, cheaper than the hand-off to a batching
+thread, so it is answered on the calling thread.
+
+``stats()`` reports requests, batches, the batch size distribution and
+queue wait and run time percentiles per model. Batch sizes are exported at
+``/metrics`` as ``inference_batch_size`` and run times as the ``inference``
+subsystem.
+
+Configured from the environment: ``INFERENCE_MAX_BATCH`` (default 32),
+``INFERENCE_MAX_WAIT_MS`` (2), ``INFERENCE_MAX_QUEUE`` pending requests per
+model (1024), ``INFERENCE_TIMEOUT`` seconds (10) and ``INFERENCE_RUNTIME``
+('keras' or 'tflite').
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from metrics import histogram, observe, span
+from model_registry import MODELS_DIR, ModelRegistry, load_artifact
+
+logger = logging.getLogger(__name__)
+
+TFLITE_DIR = os.path.join(MODELS_DIR, 'tflite')
+RUNTIMES = ('keras', 'tflite')
+
+# Artifacts produced by train.py; 'batched' is False for models cheaper than a queue hand-off
+SERVED_MODELS = {
+    'rnn': {'artifact': os.path.join(MODELS_DIR, 'rnn_model.h5'), 'batched': True},
+    'dqn': {'artifact': os.path.join(MODELS_DIR, 'dqn_model.h5'), 'batched': True},
+    'sarsa': {'artifact': os.path.join(MODELS_DIR, 'sarsa_qtable.npy'), 'batched': False},
+}
+
+BATCH_SIZES = histogram('inference_batch_size', 'Requests served per model call', ('model',),
+                        (1, 2, 4, 8, 16, 32, 64, 128))
+
+
+class UnknownModelError(ValueError):
+    """Raised for model names that are not served"""
+
+
+class InferenceOverloaded(Exception):
+    """Raised when a model's request queue is full"""
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class KerasRunner:
+    """Batch -> outputs through a Keras model, without model.predict's per-call setup"""
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = tuple(model.input_shape[1:])
+        # Trace for two batch sizes at load time, so later sizes reuse a shape-generic graph
+        for size in (1, 2):
+            self(np.zeros((size,) + self.input_shape, dtype=np.float32))
+
+    def __call__(self, batch):
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class QTableRunner:
+    """Batch of states in [0, 1] -> their Q-value rows"""
+
+    input_shape = (1,)
+
+    def __init__(self, q_table):
+        self.q_table = q_table
+
+    def __call__(self, batch):
+        # Same discretization as ml.train_sarsa.state_index
+        states = np.clip(batch[:, 0], 0.0, 1.0)
+        return self.q_table[(states * (len(self.q_table) - 1)).astype(np.int64)]
+
+
+def _tflite_interpreter(path):
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path)
+
+
+class TFLiteRunner:
+    """Batch -> outputs through a TFLite interpreter, padding to a fixed batch size if the model has one"""
+
+    def __init__(self, path):
+        self.path = path
+        self.interpreter = _tflite_interpreter(path)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(dim) for dim in self._input['shape'][1:])
+        self.dtype = self._input['dtype']
+        signature = self._input.get('shape_signature', self._input['shape'])
+        self.fixed_batch = None if signature[0] == -1 else int(self._input['shape'][0])
+        self._allocated = None
+        self._lock = threading.Lock()
+
+    def _invoke(self, batch):
+        if len(batch) != self._allocated:
+            if self.fixed_batch is None:
+                self.interpreter.resize_tensor_input(self._input['index'], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._allocated = len(batch)
+        self.interpreter.set_tensor(self._input['index'], batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output['index'])
+
+    def __call__(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=self.dtype)
+        with self._lock:
+            if self.fixed_batch is None:
+                return self._invoke(batch)
+            outputs = []
+            for start in range(0, len(batch), self.fixed_batch):
+                chunk = batch[start:start + self.fixed_batch]
+                rows = len(chunk)
+                if rows < self.fixed_batch:
+                    padding = np.zeros((self.fixed_batch - rows,) + chunk.shape[1:], dtype=self.dtype)
+                    chunk = np.concatenate([chunk, padding])
+                outputs.append(self._invoke(chunk)[:rows])
+            return np.concatenate(outputs)
+
+
+def export_tflite(model, path, batch_size=32):
+    """Convert a Keras model to a TFLite file at path"""
+    import tensorflow as tf
+    from tensorflow import keras
+
+    try:
+        content = tf.lite.TFLiteConverter.from_keras_model(model).convert()
+    except Exception as e:
+        # Recurrent layers only lower to builtin TFLite ops with a static batch size
+        logger.info(f"Exporting {path} with a fixed batch of {batch_size} ({type(e).__name__})")
+        inputs = keras.Input(batch_size=batch_size, shape=model.input_shape[1:])
+        content = tf.lite.TFLiteConverter.from_keras_model(keras.Model(inputs, model(inputs))).convert()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def tflite_loader(name, batch_size=32, tflite_dir=TFLITE_DIR):
+    """Registry loader that serves a Keras artifact through its TFLite export"""
+    def load(artifact):
+        path = os.path.join(tflite_dir, f"{name}.tflite")
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(artifact):
+            logger.info(f"Exporting model {name} to {path}")
+            export_tflite(load_artifact(artifact), path, batch_size)
+        return TFLiteRunner(path)
+    return load
+
+
+def serving_registry(runtime='keras', max_batch=32, models=SERVED_MODELS):
+    """Registry of the served artifacts; training is registered separately in ml (see train.py)"""
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown inference runtime: {runtime}")
+    registry = ModelRegistry()
+    for name, served in models.items():
+        artifact = served['artifact']
+        if artifact.endswith('.npy'):
+            loader = lambda path: QTableRunner(load_artifact(path))
+        elif runtime == 'tflite':
+            loader = tflite_loader(name, max_batch)
+        else:
+            loader = lambda path: KerasRunner(load_artifact(path))
+        registry.register(name, artifact, trainer=None, loader=loader)
+    return registry
+
+
+class _Request:
+    __slots__ = ('inputs', 'queued_at', 'done', 'result', 'error')
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.queued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ModelStats:
+    """Request, batch and latency counters for one model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batch_sizes = Counter()
+        self._waits = deque(maxlen=1000)
+        self._runs = deque(maxlen=1000)
+
+    def record_batch(self, size, waits, seconds, failed=False):
+        with self._lock:
+            self.requests += size
+            self.batches += 1
+            self.errors += size if failed else 0
+            self.batch_sizes[size] += 1
+            self._waits.extend(waits)
+            self._runs.append(seconds)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            runs = sorted(self._runs)
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'queue_wait_seconds': {
+                    'p50': _percentile(waits, 0.5),
+                    'p95': _percentile(waits, 0.95),
+                    'max': waits[-1] if waits else 0.0,
+                },
+                'run_seconds': {
+                    'p50': _percentile(runs, 0.5),
+                    'p95': _percentile(runs, 0.95),
+                    'max': runs[-1] if runs else 0.0,
+                },
+            }
+
+
+class ModelBatcher:
+    """Request queue and batching thread for one model"""
+
+    def __init__(self, name, runner, max_batch=32, max_wait=0.002, max_queue=1024, timeout=10.0):
+        self.name = name
+        self.runner = runner
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.stats = ModelStats()
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._work, name=f"inference-{name}", daemon=True)
+        self._thread.start()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def submit(self, inputs):
+        """Queue one example and wait for its output row"""
+        request = _Request(inputs)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.stats.reject()
+            raise InferenceOverloaded(f"Too many pending requests for model {self.name}")
+        if not request.done.wait(self.timeout):
+            raise TimeoutError(f"Model {self.name} did not answer within {self.timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        """Block for the first request, then take more until the batch is full or max_wait passed"""
+        batch = [self._queue.get()]
+        deadline = batch[0].queued_at + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            waits = [started - request.queued_at for request in batch]
+            try:
+                outputs = self.runner(np.stack([request.inputs for request in batch]))
+                for request, output in zip(batch, outputs):
+                    request.result = output
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} failed for model {self.name}: {str(e)}")
+                for request in batch:
+                    request.error = e
+            seconds = time.perf_counter() - started
+            for request in batch:
+                request.done.set()
+            self.stats.record_batch(len(batch), waits, seconds, failed=batch[0].error is not None)
+            BATCH_SIZES.observe(len(batch), self.name)
+            observe('inference', f"{self.name}_batch", seconds)
+
+
+class InferenceService:
+    """Serves the registered models, micro-batching concurrent requests per model"""
+
+    def __init__(self, registry=None, max_batch=32, max_wait=0.002, max_queue=1024, timeout=10.0,
+                 runtime='keras', models=SERVED_MODELS):
+        self.registry = registry or serving_registry(runtime, max_batch, models)
+        self.models = models
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.runtime = runtime
+        self._batchers = {}
+        self._inline_stats = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_batch=int(os.getenv('INFERENCE_MAX_BATCH', 32)),
+            max_wait=float(os.getenv('INFERENCE_MAX_WAIT_MS', 2)) / 1000,
+            max_queue=int(os.getenv('INFERENCE_MAX_QUEUE', 1024)),
+            timeout=float(os.getenv('INFERENCE_TIMEOUT', 10)),
+            runtime=os.getenv('INFERENCE_RUNTIME', 'keras'),
+        )
+
+    def _batcher(self, name, runner):
+        if self._pid != os.getpid():
+            # Batching threads do not survive fork(); start new ones in the child
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._batchers = {}
+                    self._pid = os.getpid()
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.get(name)
+                if batcher is None:
+                    batcher = ModelBatcher(name, runner, self.max_batch, self.max_wait, self.max_queue,
+                                           self.timeout)
+                    self._batchers[name] = batcher
+        return batcher
+
+    def _run_inline(self, name, runner, inputs):
+        stats = self._inline_stats.get(name)
+        if stats is None:
+            stats = self._inline_stats.setdefault(name, ModelStats())
+        started = time.perf_counter()
+        try:
+            output = runner(inputs[np.newaxis])[0]
+        except Exception:
+            stats.record_batch(1, [0.0], time.perf_counter() - started, failed=True)
+            raise
+        stats.record_batch(1, [0.0], time.perf_counter() - started)
+        return output
+
+    def predict(self, name, inputs):
+        """Output row of model name for one example, batched with concurrent requests
+
+        Raises UnknownModelError, FileNotFoundError if the model has not been
+        trained, ValueError for inputs of the wrong shape, InferenceOverloaded
+        and TimeoutError.
+        """
+        if name not in self.models:
+            raise UnknownModelError(f"Unknown model: {name}")
+        with span('inference', name):
+            runner = self.registry.load(name)
+            inputs = np.asarray(inputs, dtype=np.float32)
+            if inputs.shape != runner.input_shape:
+                raise ValueError(f"Model {name} expects inputs of shape {runner.input_shape}, got {inputs.shape}")
+            if not self.models[name]['batched'] or self.max_batch <= 1:
+                return self._run_inline(name, runner, inputs)
+            return self._batcher(name, runner).submit(inputs)
+
+    def stats(self):
+        """Per-model request, batch size and latency statistics for the models used so far"""
+        stats = {name: batcher.stats.snapshot() for name, batcher in list(self._batchers.items())}
+        stats.update({name: model_stats.snapshot() for name, model_stats in list(self._inline_stats.items())})
+        for name, batcher in list(self._batchers.items()):
+            stats[name]['queue_depth'] = batcher.depth()
+        return {
+            'runtime': self.runtime,
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'models': stats,
+        }
+
+    def queue_depths(self):
+        return {(name,): batcher.depth() for name, batcher in list(self._batchers.items())}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export the served Keras models to TFLite')
+    parser.add_argument('models', nargs='*', help='models to export (default: all Keras models)')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('INFERENCE_MAX_BATCH', 32)),
+                        help='fixed batch size for models that cannot be exported with a dynamic one')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    names = args.models or [name for name, served in SERVED_MODELS.items() if not served['artifact'].endswith('.npy')]
+    for name in names:
+        artifact = SERVED_MODELS[name]['artifact']
+        path = export_tflite(load_artifact(artifact), os.path.join(TFLITE_DIR, f"{name}.tflite"), args.batch_size)
+        print(f"{name}: {artifact} -> {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""Durable background job queue with per-user coalescing.
+
+Jobs are rows in a small SQLite database (``data/jobs.db``) so queued work
+survives a restart, and a pool of worker threads in each app process runs
+them. Enqueueing a job of a kind that is already queued (not yet running)
+for the same user folds the new payload into the queued one with the kind's
+``merge`` function and returns the existing job id, so a burst of updates
+costs one run.
+
+A claimed job holds a lease that its worker renews while the handler runs;
+if the process dies the lease expires and another worker picks it up. Jobs
+for a user run one at a time. A failing job is retried with exponential
+backoff up to ``max_attempts`` times, and a job whose lease expired on its
+last attempt is marked failed rather than claimed again. A handler can run
+more than once for the same job (after a crash mid-run), so handlers get the
+job id to make their side effects idempotent.
+Finished jobs are pruned after ``keep_seconds``. Functions added with
+``add_maintenance`` run with the prune, when a worker starts and hourly
+after that; the app uses this to re-enqueue work recorded in its own database
+whose enqueue failed.
+
+Configured from the environment: ``JOBS_PATH`` (default ``data/jobs.db``),
+``JOB_WORKERS`` (2, 0 disables the workers), ``JOB_LEASE`` seconds (60),
+``JOB_MAX_ATTEMPTS`` (3) and ``JOB_KEEP`` seconds (86400).
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOBS_FILE = os.path.join('data', 'jobs.db')
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class UnknownJobKind(ValueError):
+    """Raised when enqueueing a kind without a registered handler"""
+
+
+def replace_payload(queued, new):
+    return new
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by in-process worker threads"""
+
+    def __init__(self, path=JOBS_FILE, workers=2, lease=60.0, max_attempts=3,
+                 keep_seconds=86400.0, poll_interval=1.0):
+        self.path = path
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.keep_seconds = keep_seconds
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.maintenance = []
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._stopping = False
+        self._start_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, user_id TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, coalesced INTEGER NOT NULL DEFAULT 1, "
+            "result TEXT, error TEXT, run_after REAL NOT NULL, lease_until REAL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_user_kind ON jobs (user_id, kind, status)")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv('JOBS_PATH', JOBS_FILE),
+            workers=int(os.getenv('JOB_WORKERS', 2)),
+            lease=float(os.getenv('JOB_LEASE', 60)),
+            max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+            keep_seconds=float(os.getenv('JOB_KEEP', 86400)),
+        )
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, statements):
+        """Run statements(conn) inside an IMMEDIATE transaction and return its result"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def register(self, kind, handler, merge=replace_payload):
+        """Run handler(user_id, payload, job_id) for jobs of kind; merge(queued, new) coalesces payloads"""
+        self.handlers[kind] = (handler, merge)
+
+    def add_maintenance(self, fn):
+        """Call fn() from an idle worker at start and then hourly"""
+        self.maintenance.append(fn)
+
+    def enqueue(self, kind, user_id, payload=None):
+        """Queue a job, or fold it into the user's queued job of the same kind; returns the job id"""
+        if kind not in self.handlers:
+            raise UnknownJobKind(f"No handler registered for job kind: {kind}")
+        payload = payload or {}
+        merge = self.handlers[kind][1]
+
+        def statements(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE user_id = ? AND kind = ? AND status = 'queued' "
+                "ORDER BY created_at LIMIT 1", (user_id, kind)
+            ).fetchone()
+            if row:
+                merged = merge(json.loads(row[1]), payload)
+                conn.execute("UPDATE jobs SET payload = ?, coalesced = coalesced + 1, updated_at = ? WHERE id = ?",
+                             (json.dumps(merged), now, row[0]))
+                return row[0], True
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, payload, status, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, user_id, json.dumps(payload), now, now, now)
+            )
+            return job_id, False
+
+        job_id, coalesced = self._write(statements)
+        logger.debug(f"{'Coalesced' if coalesced else 'Queued'} {kind} job {job_id} for user_id: {user_id}")
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Job status dict, or None if the id is unknown (or was pruned)"""
+        row = self._connection().execute(
+            "SELECT id, kind, user_id, status, attempts, coalesced, result, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, user_id, status, attempts, coalesced, result, error, created_at, updated_at = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'user_id': user_id,
+            'status': status,
+            'attempts': attempts,
+            'coalesced': coalesced,
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        }
+
+    def counts(self):
+        """Number of jobs per status"""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def claim(self):
+        """Lease the next runnable job, skipping users with a job in progress"""
+        def statements(conn):
+            now = time.time()
+            # A job that lost its lease on the last attempt has crashed or hung its worker every time
+            expired = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired on the last attempt', "
+                "lease_until = NULL, updated_at = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, now, self.max_attempts)
+            ).rowcount
+            if expired:
+                logger.error(f"Marked {expired} job(s) failed after their lease expired on the last attempt")
+            row = conn.execute(
+                "SELECT id, kind, user_id, payload, attempts FROM jobs AS j "
+                "WHERE ((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?)) "
+                "AND NOT EXISTS (SELECT 1 FROM jobs WHERE user_id = j.user_id AND id != j.id "
+                "AND status = 'running' AND lease_until >= ?) "
+                "ORDER BY run_after LIMIT 1", (now, now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                         "updated_at = ? WHERE id = ?", (now + self.lease, now, row[0]))
+            return row
+
+        return self._write(statements)
+
+    def _renew(self, job_id, done):
+        """Extend job_id's lease every third of the lease until done is set"""
+        while not done.wait(self.lease / 3):
+            try:
+                self._write(lambda conn: conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running'",
+                    (time.time() + self.lease, job_id)
+                ))
+            except sqlite3.Error as e:
+                logger.error(f"Could not renew the lease of job {job_id}: {str(e)}")
+
+    def run_one(self):
+        """Claim and run one job; returns False when nothing was runnable"""
+        row = self.claim()
+        if row is None:
+            return False
+        job_id, kind, user_id, payload, attempts = row
+        attempts += 1
+        started = time.perf_counter()
+        done = threading.Event()
+        renewer = threading.Thread(target=self._renew, args=(job_id, done), name=f"job-lease-{job_id[:8]}",
+                                   daemon=True)
+        renewer.start()
+        try:
+            handler = self.handlers[kind][0]
+            result = handler(user_id, json.loads(payload), job_id)
+        except Exception as e:
+            retry = attempts < self.max_attempts
+            logger.error(f"Job {job_id} ({kind}) failed on attempt {attempts}: {str(e)}")
+            logger.debug(traceback.format_exc())
+            self._write(lambda conn: conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ?",
+                ('queued' if retry else 'failed', str(e), time.time() + 2 ** attempts, time.time(), job_id)
+            ))
+            return True
+        finally:
+            done.set()
+            renewer.join()
+        self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ?", (json.dumps(result), time.time(), job_id)
+        ))
+        logger.debug(f"Job {job_id} ({kind}) done in {time.perf_counter() - started:.3f}s")
+        return True
+
+    def prune(self):
+        """Delete finished jobs older than keep_seconds"""
+        cutoff = time.time() - self.keep_seconds
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (cutoff,)
+        ).rowcount)
+
+    def drain(self):
+        """Run jobs in the calling thread until none is runnable"""
+        count = 0
+        while self.run_one():
+            count += 1
+        return count
+
+    def _work(self):
+        last_prune = 0.0
+        while not self._stopping:
+            try:
+                if self.run_one():
+                    continue
+                if time.time() - last_prune > 3600:
+                    last_prune = time.time()
+                    self.prune()
+                    self._run_maintenance()
+            except sqlite3.Error as e:
+                logger.error(f"Job worker database error: {str(e)}")
+            # Idle: wait for an enqueue in this process, or poll for other processes' jobs
+            with self._wakeup:
+                self._wakeup.wait(self.poll_interval)
+
+    def _run_maintenance(self):
+        for fn in self.maintenance:
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Job maintenance {getattr(fn, '__name__', fn)} failed: {str(e)}")
+
+    def start(self):
+        """Start the worker threads in this process (again after a fork)"""
+        if self.workers <= 0 or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping = False
+            self._threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                             for i in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+            logger.info(f"Started {self.workers} job workers on {self.path}")
+
+    def stop(self, timeout=5.0):
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
@@ -0,0 +1,244 @@
+"""Gateway between the Flask workers and the Ollama server.
+
+All LLM traffic goes through one ``httpx.AsyncClient`` running on a private
+event loop thread, so calls share pooled keep-alive connections instead of
+opening a new TCP connection per message. At most ``max_in_flight`` requests
+are sent to Ollama at once; up to ``max_queue`` more may wait for a slot.
+Anything beyond that is rejected immediately with ``GatewayOverloaded`` so
+slow generations cannot tie up every worker thread.
+
+Limits are per process and are read from the environment:
+``LLM_MAX_IN_FLIGHT`` (default 4), ``LLM_MAX_QUEUE`` (16),
+``LLM_QUEUE_TIMEOUT`` seconds (30), ``LLM_TIMEOUT`` seconds (240) and
+``LLM_RETRY_AFTER`` seconds (5).
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_STREAM_END = object()
+
+
+class GatewayOverloaded(Exception):
+    """Raised when the gateway sheds a request because its queue is full"""
+
+    def __init__(self, retry_after, message='The AI assistant is busy, please try again shortly.'):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LLMGateway:
+    """Pooled, concurrency-limited async client for the Ollama HTTP API"""
+
+    def __init__(self, base_url, max_in_flight=4, max_queue=16, queue_timeout=30.0,
+                 timeout=240.0, connect_timeout=10.0, retry_after=5):
+        self.base_url = base_url.rstrip('/')
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='llm-gateway', daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._client = self._call(self._open_client(timeout, connect_timeout))
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv('OLLAMA_HOST', 'http://localhost:5001'),
+            max_in_flight=int(os.getenv('LLM_MAX_IN_FLIGHT', 4)),
+            max_queue=int(os.getenv('LLM_MAX_QUEUE', 16)),
+            queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', 30)),
+            timeout=float(os.getenv('LLM_TIMEOUT', 240)),
+            retry_after=int(os.getenv('LLM_RETRY_AFTER', 5)),
+        )
+
+    async def _open_client(self, timeout, connect_timeout):
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=self.max_in_flight,
+                                max_keepalive_connections=self.max_in_flight),
+        )
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _admit(self):
+        """Reserve a queue position or shed the request immediately"""
+        with self._lock:
+            if self._in_flight + self._waiting >= self.max_in_flight + self.max_queue:
+                self._rejected += 1
+                raise GatewayOverloaded(self.retry_after)
+            self._waiting += 1
+        return {'queued': True, 'queued_at': time.perf_counter()}
+
+    def _leave_queue(self, ticket):
+        with self._lock:
+            if ticket['queued']:
+                ticket['queued'] = False
+                self._waiting -= 1
+                return True
+        return False
+
+    def _submit(self, coro, ticket):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        # Covers requests cancelled before their coroutine ever ran
+        future.add_done_callback(lambda _: self._leave_queue(ticket))
+        return future
+
+    @asynccontextmanager
+    async def _slot(self, ticket):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._leave_queue(ticket)
+            with self._lock:
+                self._rejected += 1
+            raise GatewayOverloaded(self.retry_after)
+        except BaseException:
+            self._leave_queue(ticket)
+            raise
+
+        started = time.perf_counter()
+        with self._lock:
+            self._queue_waits.append(started - ticket['queued_at'])
+            self._in_flight += 1
+        self._leave_queue(ticket)
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            self._semaphore.release()
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies.append(time.perf_counter() - started)
+                if succeeded:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    async def _post(self, ticket, path, payload):
+        async with self._slot(ticket):
+            response = await self._client.post(path, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    async def _stream_into(self, ticket, path, payload, chunks):
+        try:
+            async with self._slot(ticket):
+                async with self._client.stream('POST', path, json=payload) as response:
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line:
+                            chunks.put(json.loads(line))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_STREAM_END)
+
+    def post(self, path, payload):
+        """Send a JSON request and return the decoded JSON response"""
+        ticket = self._admit()
+        return self._submit(self._post(ticket, path, payload), ticket).result()
+
+    def stream(self, path, payload):
+        """Send a streaming request and return an iterator over its NDJSON chunks
+
+        Admission happens here, before iteration starts, so an overloaded
+        gateway is reported before any response is sent to the client.
+        """
+        ticket = self._admit()
+        chunks = queue.Queue()
+        future = self._submit(self._stream_into(ticket, path, payload, chunks), ticket)
+        return self._drain(chunks, future)
+
+    def _drain(self, chunks, future):
+        try:
+            while True:
+                item = chunks.get()
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Stop generating if the consumer went away early
+            future.cancel()
+
+    def metrics(self):
+        """Snapshot of queue depth, throughput and latency statistics"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = sorted(self._queue_waits)
+            return {
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'latency_seconds': {
+                    'p50': _percentile(latencies, 0.5),
+                    'p95': _percentile(latencies, 0.95),
+                    'max': latencies[-1] if latencies else 0.0,
+                },
+                'queue_wait_seconds': {
+                    'p50': _percentile(waits, 0.5),
+                    'p95': _percentile(waits, 0.95),
+                    'max': waits[-1] if waits else 0.0,
+                },
+            }
+
+    def close(self):
+        self._call(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide gateway, creating it on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway.from_env()
+    return _gateway
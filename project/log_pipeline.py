@@ -0,0 +1,257 @@
+"""Non-blocking structured logging.
+
+``configure_logging()`` gives the root logger a single ``QueueHandler``: the
+thread that logs only merges the message with its arguments and puts the
+record on a bounded in-memory queue, and a ``QueueListener`` thread writes it
+out as one JSON object per line. A request thread never waits on log I/O:
+when the queue is full the record is dropped and counted, and the listener
+reports how many were dropped once it catches up.
+
+Before a record is written, values of health and credential fields
+(``weight``, ``glucose_level``, ``password_hash``, ...) that appear in the
+message as ``key: value`` or ``key=value`` are replaced with ``[redacted]``,
+prompt and response text is replaced by its length, and what is left is cut
+to ``max_chars``. This runs on the listener thread, not the request.
+
+DEBUG records are sampled per call site: the first one and then every
+``debug_sample``-th are kept, carrying ``"sampled": N`` so counts can be
+scaled back up. Sampling happens before the record is queued, so skipped
+debug lines cost a dictionary lookup.
+
+Configured from the environment: ``LOG_LEVEL`` (default INFO),
+``LOG_DEBUG_SAMPLE`` (10, 1 keeps every debug record), ``LOG_MAX_CHARS``
+(2000), ``LOG_QUEUE_SIZE`` records (10000) and ``LOG_FILE`` (stderr when
+unset).
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+
+REDACTED_FIELDS = (
+    'weight', 'height', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'heart_rate',
+    'glucose_level', 'sleep_hours', 'exercise_minutes', 'symptoms', 'medical_conditions', 'medications',
+    'password', 'password_hash', 'current_password', 'new_password', 'email', 'phone',
+)
+TEXT_FIELDS = ('prompt', 'system', 'response', 'ai_response', 'user_message', 'message', 'context')
+
+_VALUE = r"""(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|\[[^\]]*\]|\{[^}]*\}|[^,;}\s)]+)"""
+_REDACT_RE = re.compile(r"""(['"]?)\b(%s)\1(\s*[:=]\s*)%s""" % ('|'.join(REDACTED_FIELDS), _VALUE))
+_TEXT_RE = re.compile(r"""(['"])(%s)\1(\s*:\s*)(%s)""" % ('|'.join(TEXT_FIELDS), _VALUE))
+
+# Attributes every LogRecord has; anything else was passed in extra= and is logged as a field
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sampled'}
+
+
+def scrub(text, max_chars=2000):
+    """Redact health and credential values, replace payload text by its length and cap the size"""
+    text = _REDACT_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{m.group(1)}{m.group(3)}'[redacted]'", text)
+    text = _TEXT_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{m.group(1)}{m.group(3)}'[{len(m.group(4))} chars]'",
+                        text)
+    if max_chars and len(text) > max_chars:
+        text = f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+    return text
+
+
+def _field_value(name, value, max_chars):
+    if name in REDACTED_FIELDS:
+        return '[redacted]'
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    value = value if isinstance(value, str) else str(value)
+    if name in TEXT_FIELDS:
+        return f"[{len(value)} chars]"
+    return scrub(value, max_chars)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, thread, message, extra fields, exc"""
+
+    def __init__(self, max_chars=2000):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': scrub(record.getMessage(), self.max_chars),
+        }
+        sampled = getattr(record, 'sampled', None)
+        if sampled:
+            entry['sampled'] = sampled
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS:
+                entry[name] = _field_value(name, value, self.max_chars)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep the first and then every Nth DEBUG record of each call site"""
+
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = every
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every <= 1:
+            return True
+        site = (record.pathname, record.lineno)
+        counter = self._counters.get(site)
+        if counter is None:
+            counter = self._counters.setdefault(site, itertools.count())
+        if next(counter) % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of waiting"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Only what has to happen on the calling thread: merge the arguments
+        # (they may change once we return) and render the traceback. Merging
+        # in place is invisible to other handlers; dropping exc_info is not.
+        if record.exc_info or record.stack_info:
+            record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if record.stack_info:
+            record.exc_text = '\n'.join(filter(None, (record.exc_text, record.stack_info)))
+            record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that reports records the handler had to drop"""
+
+    def __init__(self, log_queue, handler, source):
+        super().__init__(log_queue, handler, respect_handler_level=True)
+        self.source = source
+        self.reported = 0
+
+    def handle(self, record):
+        super().handle(record)
+        self.report_dropped()
+
+    def report_dropped(self):
+        dropped = self.source.dropped
+        if dropped > self.reported:
+            notice = logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Dropped {dropped - self.reported} log records, the log queue was full",
+            })
+            self.reported = dropped
+            super().handle(notice)
+
+
+class LogPipeline:
+    """Root logger -> bounded queue -> listener thread -> JSON lines on a stream or file"""
+
+    def __init__(self, level='INFO', path=None, stream=None, debug_sample=10, max_chars=2000,
+                 queue_size=10000):
+        self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        self.path = path
+        self.stream = stream
+        self.debug_sample = debug_sample
+        self.max_chars = max_chars
+        self.queue_size = queue_size
+        self.handler = None
+        self.listener = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            level=os.getenv('LOG_LEVEL', 'INFO'),
+            path=os.getenv('LOG_FILE') or None,
+            debug_sample=int(os.getenv('LOG_DEBUG_SAMPLE', 10)),
+            max_chars=int(os.getenv('LOG_MAX_CHARS', 2000)),
+            queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+        )
+
+    def _writer(self):
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Reopens the file if logrotate moved it
+            writer = logging.handlers.WatchedFileHandler(self.path, encoding='utf-8')
+        else:
+            writer = logging.StreamHandler(self.stream or sys.stderr)
+        writer.setFormatter(JsonLinesFormatter(self.max_chars))
+        return writer
+
+    def _start_listener(self):
+        log_queue = queue.Queue(self.queue_size)
+        self.handler.queue = log_queue
+        self.listener = _Listener(log_queue, self._writer(), self.handler)
+        self.listener.start()
+
+    def start(self):
+        """Replace the root logger's handlers with this pipeline"""
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        self.handler = NonBlockingQueueHandler(None)
+        self.handler.addFilter(DebugSampler(self.debug_sample))
+        self._start_listener()
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        return self
+
+    def restart_after_fork(self):
+        """The listener thread does not survive fork(); give the child its own"""
+        if self.listener is not None:
+            self._start_listener()
+
+    def stop(self):
+        """Write out everything still queued and detach from the root logger"""
+        if self.listener is None:
+            return
+        try:
+            self.listener.stop()
+        except queue.Full:
+            pass  # No room for the stop sentinel; the daemon thread goes down with the process
+        self.listener.report_dropped()
+        for handler in self.listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(self.handler)
+        self.listener = None
+
+
+_pipeline = None
+
+
+def configure_logging():
+    """Install the pipeline configured from the environment, once per process"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline.from_env().start()
+        atexit.register(_pipeline.stop)
+        os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
+    return _pipeline
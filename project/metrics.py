@@ -0,0 +1,223 @@
+"""Request and subsystem latency metrics in Prometheus text format.
+
+``instrument_app`` times every request into ``http_request_duration_seconds``
+(labelled by method, route rule and status; streamed responses are timed
+until the body is fully sent) and serves the registry at ``/metrics``.
+Code inside a request records subsystem time with ``span`` or ``timed``::
+
+    with span('ollama', 'generate'):
+        ...
+
+    @timed('storage', 'load_json')
+    def load_json_file(...):
+
+Spans feed ``subsystem_duration_seconds`` and, when ``METRICS_SERVER_TIMING``
+is set, a ``Server-Timing`` header that totals each subsystem's time for the
+request (visible in the browser's network panel). ``/metrics`` answers only
+requests from the loopback address unless ``METRICS_TOKEN`` is set, in which
+case it answers any client sending ``Authorization: Bearer <token>``.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request {(subsystem, operation): [seconds, count]}, None outside a request
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Cumulative latency histogram per label set"""
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Values read from a callback at scrape time: fn() -> {label values tuple: value}"""
+
+    def __init__(self, name, help, labels, fn):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.fn = fn
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.fn().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency by route',
+                            ('method', 'route', 'status'))
+SUBSYSTEM_SECONDS = Histogram('subsystem_duration_seconds', 'Time spent in storage, Ollama and templates',
+                              ('subsystem', 'operation'))
+_registry = [REQUEST_SECONDS, SUBSYSTEM_SECONDS]
+
+
+def histogram(name, help, labels=(), buckets=BUCKETS):
+    """Create and register a histogram, e.g. for sizes rather than latencies"""
+    metric = Histogram(name, help, labels, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def register_gauge(name, help, labels, fn):
+    """Export fn()'s values as a gauge on every scrape"""
+    _registry.append(Gauge(name, help, labels, fn))
+
+
+def observe(subsystem, operation, seconds):
+    """Record time spent in a subsystem, also crediting the current request"""
+    SUBSYSTEM_SECONDS.observe(seconds, subsystem, operation)
+    spans = _request_spans.get()
+    if spans is not None:
+        totals = spans.setdefault((subsystem, operation), [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+
+@contextmanager
+def span(subsystem, operation):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(subsystem, operation, time.perf_counter() - started)
+
+
+def timed(subsystem, operation=None):
+    """Decorator form of span, defaulting the operation to the function name"""
+    def decorator(f):
+        name = operation or f.__name__
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                observe(subsystem, name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def render():
+    """The whole registry in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(spans, total):
+    """Server-Timing header value: one entry per subsystem plus the app total"""
+    by_subsystem = {}
+    for (subsystem, _), (seconds, _) in spans.items():
+        by_subsystem[subsystem] = by_subsystem.get(subsystem, 0.0) + seconds
+    entries = [f"{subsystem};dur={seconds * 1000:.1f}" for subsystem, seconds in sorted(by_subsystem.items())]
+    entries.append(f"app;dur={total * 1000:.1f}")
+    return ', '.join(entries)
+
+
+def instrument_app(app, server_timing_header=None, token=None):
+    """Time every request of a Flask app, record template rendering and serve /metrics"""
+    from flask import Response, g, request
+    from flask.signals import before_render_template, template_rendered
+
+    if server_timing_header is None:
+        server_timing_header = os.getenv('METRICS_SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+    token = token if token is not None else os.getenv('METRICS_TOKEN')
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        _request_spans.set({})
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        spans = _request_spans.get() or {}
+        if server_timing_header:
+            response.headers['Server-Timing'] = server_timing(spans, time.perf_counter() - started)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = (request.method, route, str(response.status_code))
+        # Runs once the body has been sent, so streamed responses count in full
+        response.call_on_close(lambda: REQUEST_SECONDS.observe(time.perf_counter() - started, *labels))
+        return response
+
+    @app.teardown_request
+    def stop_request_timer(exc=None):
+        _request_spans.set(None)
+
+    def template_started(sender, template, context, **extra):
+        g.setdefault('metrics_templates', []).append(time.perf_counter())
+
+    def template_finished(sender, template, context, **extra):
+        starts = g.get('metrics_templates')
+        if starts:
+            observe('template', template.name or 'string', time.perf_counter() - starts.pop())
+
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if token:
+            if request.headers.get('Authorization') != f"Bearer {token}":
+                return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        elif request.remote_addr not in LOOPBACK_ADDRESSES:
+            return Response('Forbidden: set METRICS_TOKEN to scrape from other hosts\n', status=403,
+                            mimetype='text/plain')
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+    return app
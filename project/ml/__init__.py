@@ -0,0 +1,29 @@
+"""Model training for the healthcare assistant.
+
+The web application never imports this package. Every trainer imports
+TensorFlow, Keras, OpenCV and pandas inside the function body, so importing
+``ml`` itself stays cheap.
+"""
+from model_registry import ModelRegistry
+from ml.data import IMAGE_EXTENSIONS, dataset_paths
+from ml.env import HealthEnv
+from ml.train_cnn import CNN_PARAMS, train_cnn
+from ml.train_gan import GAN_PARAMS, train_gan
+from ml.train_rl import DQN_PARAMS, train_rl
+from ml.train_rnn import RNN_PARAMS, rnn_csv_path, train_rnn
+from ml.train_sarsa import SARSA_PARAMS, train_sarsa
+
+model_registry = ModelRegistry()
+model_registry.register('cnn', 'models/cnn_model.h5', train_cnn,
+                        inputs=lambda: dataset_paths(IMAGE_EXTENSIONS), params=CNN_PARAMS)
+model_registry.register('rnn', 'models/rnn_model.h5', train_rnn,
+                        inputs=lambda: [path for path in [rnn_csv_path()] if path], params=RNN_PARAMS)
+model_registry.register('gan', 'models/generator.h5', train_gan,
+                        inputs=lambda: dataset_paths(IMAGE_EXTENSIONS), params=GAN_PARAMS)
+model_registry.register('dqn', 'models/dqn_model.h5', train_rl, params=DQN_PARAMS)
+model_registry.register('sarsa', 'models/sarsa_qtable.npy', train_sarsa, params=SARSA_PARAMS)
+
+
+def train_models(names=None, force=False):
+    """Train registered models whose inputs changed since their last training"""
+    return model_registry.train_all(names, force)
@@ -0,0 +1,14 @@
+"""Dataset discovery shared by the trainers"""
+import os
+
+DATASETS_DIR = 'datasets'
+IMAGE_EXTENSIONS = ('.jpg', '.png')
+
+
+def dataset_files(extensions):
+    """Sorted names of files in datasets/ with one of the given extensions"""
+    return sorted(f for f in os.listdir(DATASETS_DIR) if f.lower().endswith(extensions))
+
+
+def dataset_paths(extensions):
+    return [os.path.join(DATASETS_DIR, f) for f in dataset_files(extensions)]
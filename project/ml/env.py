@@ -0,0 +1,76 @@
+"""Toy health environment used by the reinforcement learning trainers"""
+import numpy as np
+
+
+class HealthEnv:
+    def __init__(self):
+        self.state = np.array([0.5])
+        self.actions = [0, 1, 2]
+
+    def step(self, action):
+        if action == 0:
+            reward = np.random.normal(0.1, 0.05)
+        elif action == 1:
+            reward = np.random.normal(0.2, 0.1)
+        else:
+            reward = np.random.normal(0.05, 0.03)
+        self.state += reward
+        self.state = np.clip(self.state, 0, 1)
+        done = self.state >= 1
+        return self.state, reward, done, {}
+
+    def reset(self):
+        self.state = np.array([0.5])
+        return self.state
+
+
+class VectorHealthEnv:
+    """``num_envs`` copies of HealthEnv stepped together with array-backed state
+
+    ``step`` takes one action per environment and returns ``(states, rewards,
+    dones, info)`` as arrays. Finished environments are reset automatically;
+    their terminal states are available in ``info['final_states']`` and
+    their total rewards and lengths in ``info['episode_returns']`` and
+    ``info['episode_lengths']`` (meaningful where ``dones`` is set). All
+    randomness comes from one seeded ``np.random.Generator``, so a given
+    seed and action sequence always reproduces the same trajectories.
+    """
+
+    REWARD_MEAN = np.array([0.1, 0.2, 0.05])
+    REWARD_STD = np.array([0.05, 0.1, 0.03])
+    INITIAL_STATE = 0.5
+
+    def __init__(self, num_envs, seed=None):
+        self.num_envs = num_envs
+        self.actions = [0, 1, 2]
+        self.rng = np.random.default_rng(seed)
+        self.state = np.full((num_envs, 1), self.INITIAL_STATE)
+        self.returns = np.zeros(num_envs)
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+
+    def reset(self):
+        self.state = np.full((self.num_envs, 1), self.INITIAL_STATE)
+        self.returns[:] = 0
+        self.lengths[:] = 0
+        return self.state.copy()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rewards = self.rng.normal(self.REWARD_MEAN[actions], self.REWARD_STD[actions])
+        final_states = np.clip(self.state + rewards[:, None], 0, 1)
+        dones = final_states[:, 0] >= 1
+        self.state = np.where(dones[:, None], self.INITIAL_STATE, final_states)
+
+        self.returns += rewards
+        self.lengths += 1
+        info = {
+            'final_states': final_states,
+            'episode_returns': self.returns.copy(),
+            'episode_lengths': self.lengths.copy(),
+        }
+        self.returns[dones] = 0
+        self.lengths[dones] = 0
+        return self.state.copy(), rewards, dones, info
+
+    def sample_actions(self):
+        return self.rng.integers(0, len(self.actions), self.num_envs)
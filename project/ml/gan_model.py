@@ -0,0 +1,64 @@
+"""GAN model with a compiled training step.
+
+Imported by ``ml.train_gan`` inside the trainer so that importing ``ml``
+does not pull in TensorFlow.
+"""
+import tensorflow as tf
+from keras.models import Sequential
+from keras.layers import Dense, Flatten, Input, Reshape
+
+
+def build_generator(image_size, latent_dim):
+    return Sequential([
+        Input((latent_dim,)),
+        Dense(256, activation='relu'),
+        Dense(512, activation='relu'),
+        Dense(1024, activation='relu'),
+        Dense(image_size * image_size * 3, activation='sigmoid'),
+        Reshape((image_size, image_size, 3))
+    ])
+
+
+def build_discriminator(image_size):
+    return Sequential([
+        Input((image_size, image_size, 3)),
+        Flatten(),
+        Dense(1024, activation='relu'),
+        Dense(512, activation='relu'),
+        Dense(256, activation='relu'),
+        Dense(1, activation='sigmoid')
+    ])
+
+
+class GAN(tf.keras.Model):
+    """Generator and discriminator trained together in one graph call per batch"""
+
+    def __init__(self, image_size, latent_dim, learning_rate=0.001, **kwargs):
+        super().__init__(**kwargs)
+        self.latent_dim = latent_dim
+        self.generator = build_generator(image_size, latent_dim)
+        self.discriminator = build_discriminator(image_size)
+        self.g_optimizer = tf.keras.optimizers.Adam(learning_rate)
+        self.d_optimizer = tf.keras.optimizers.Adam(learning_rate)
+        self.loss_fn = tf.keras.losses.BinaryCrossentropy()
+
+    def call(self, noise, training=False):
+        return self.generator(noise, training=training)
+
+    @tf.function
+    def train_step(self, real_images):
+        batch_size = tf.shape(real_images)[0]
+        noise = tf.random.normal((batch_size, self.latent_dim))
+        ones = tf.ones((batch_size, 1))
+        zeros = tf.zeros((batch_size, 1))
+        with tf.GradientTape() as d_tape, tf.GradientTape() as g_tape:
+            fake_images = self.generator(noise, training=True)
+            real_scores = self.discriminator(real_images, training=True)
+            fake_scores = self.discriminator(fake_images, training=True)
+            d_loss = self.loss_fn(ones, real_scores) + self.loss_fn(zeros, fake_scores)
+            g_loss = self.loss_fn(ones, fake_scores)
+        d_gradients = d_tape.gradient(d_loss, self.discriminator.trainable_variables)
+        g_gradients = g_tape.gradient(g_loss, self.generator.trainable_variables)
+        self.d_optimizer.apply_gradients(zip(d_gradients, self.discriminator.trainable_variables))
+        self.g_optimizer.apply_gradients(zip(g_gradients, self.generator.trainable_variables))
+        return {'d_loss': d_loss, 'g_loss': g_loss}
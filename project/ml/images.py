@@ -0,0 +1,167 @@
+"""Image dataset loader shared by the CNN and GAN trainers.
+
+Images are decoded and resized in a thread pool (OpenCV releases the GIL)
+straight into a uint8 ``.npy`` memory map under ``models/cache/images/``.
+The cache file name is derived from the content hash of every source image
+and the target size, so repeated runs and both trainers reuse an existing
+cache and a changed image produces a new one. Training reads shuffled
+batches from the memory map through ``tf.data`` and converts them to float32
+on the fly, so only a few batches are ever resident in memory.
+"""
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_registry import file_sha256
+from ml.data import IMAGE_EXTENSIONS, dataset_paths
+
+IMAGE_CACHE_DIR = os.path.join('models', 'cache', 'images')
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """Decoded images of one size as a read-only (N, size, size, 3) uint8 memmap
+
+    ``rows`` lists the rows that hold a successfully decoded image.
+    """
+
+    def __init__(self, images, paths, rows):
+        self.images = images
+        self.paths = paths
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def labels(self, keyword='healthy'):
+        """Per-row 1 for images whose file name contains ``keyword``, else 0"""
+        return np.array([1 if keyword in os.path.basename(p).lower() else 0 for p in self.paths],
+                        dtype=np.int32)
+
+
+def cache_key(paths, size, hashes):
+    digest = hashlib.sha256(f"size={size}".encode())
+    for path, file_hash in zip(paths, hashes):
+        digest.update(f"\n{os.path.basename(path)}:{file_hash}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _decode(path, size):
+    import cv2
+
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    return cv2.resize(img, (size, size))
+
+
+def load_image_cache(size, paths=None, cache_dir=IMAGE_CACHE_DIR, workers=None):
+    """Return the ImageCache for ``paths`` at ``size``, decoding only if it is missing"""
+    paths = dataset_paths(IMAGE_EXTENSIONS) if paths is None else list(paths)
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(file_sha256, paths))
+        key = cache_key(paths, size, hashes)
+        array_file = os.path.join(cache_dir, f"{key}.npy")
+        index_file = os.path.join(cache_dir, f"{key}.json")
+
+        if os.path.exists(array_file) and os.path.exists(index_file):
+            with open(index_file) as f:
+                index = json.load(f)
+            logger.info(f"Reusing image cache {array_file} ({len(index['rows'])} images)")
+            return ImageCache(np.load(array_file, mmap_mode='r'), index['paths'], index['rows'])
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{array_file}.tmp.npy"
+        images = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.uint8,
+                                           shape=(len(paths), size, size, 3))
+        decoded = np.zeros(len(paths), dtype=bool)
+
+        def decode_into(i):
+            img = _decode(paths[i], size)
+            if img is not None:
+                images[i] = img
+                decoded[i] = True
+
+        list(pool.map(decode_into, range(len(paths))))
+
+    images.flush()
+    del images
+    os.replace(tmp_file, array_file)
+
+    # Unreadable files keep an all-zero row that is simply never indexed
+    rows = np.flatnonzero(decoded).tolist()
+    with open(f"{index_file}.tmp", 'w') as f:
+        json.dump({'size': size, 'paths': paths, 'rows': rows}, f)
+    os.replace(f"{index_file}.tmp", index_file)
+    logger.info(f"Decoded {len(rows)}/{len(paths)} images into {array_file}")
+    _prune_stale(cache_dir, size, key)
+    return ImageCache(np.load(array_file, mmap_mode='r'), paths, rows)
+
+
+def _prune_stale(cache_dir, size, current_key):
+    """Delete caches of the same size built from an older version of the dataset"""
+    for name in os.listdir(cache_dir):
+        key, ext = os.path.splitext(name)
+        if ext != '.json' or key == current_key:
+            continue
+        try:
+            with open(os.path.join(cache_dir, name)) as f:
+                stale = json.load(f).get('size') == size
+        except (OSError, ValueError):
+            continue
+        if stale:
+            for path in (os.path.join(cache_dir, name), os.path.join(cache_dir, f"{key}.npy")):
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"Removed stale image cache {key}")
+
+
+def image_batches(images, indices=None, targets=None, batch_size=32, shuffle=True,
+                  seed=None, repeat=False, drop_remainder=False):
+    """tf.data pipeline of float32 batches in [0, 1] read from a uint8 image array
+
+    Yields ``images`` batches, or ``(images, targets)`` batches when ``targets``
+    (aligned with ``images``) is given. Only ``indices`` are used if given.
+    """
+    import tensorflow as tf
+
+    indices = np.arange(len(images)) if indices is None else np.asarray(indices)
+    rng = np.random.default_rng(seed)
+    if drop_remainder:
+        num_batches = len(indices) // batch_size
+    else:
+        num_batches = -(-len(indices) // batch_size)
+
+    def batches():
+        while True:
+            order = rng.permutation(indices) if shuffle else indices
+            for b in range(num_batches):
+                # Sorted indices turn the gather into mostly sequential reads
+                idx = np.sort(order[b * batch_size:(b + 1) * batch_size])
+                if targets is None:
+                    yield images[idx]
+                else:
+                    yield images[idx], targets[idx]
+            if not repeat:
+                return
+
+    image_spec = tf.TensorSpec((None,) + images.shape[1:], tf.uint8)
+    if targets is None:
+        signature = image_spec
+    else:
+        signature = (image_spec, tf.TensorSpec((None,) + np.shape(targets)[1:], tf.as_dtype(targets.dtype)))
+
+    def to_float(batch, *rest):
+        batch = tf.cast(batch, tf.float32) / 255.0
+        return (batch,) + rest if rest else batch
+
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    if not repeat:
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(num_batches))
+    return dataset.map(to_float, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,47 @@
+"""CNN image classifier trainer"""
+from ml.data import IMAGE_EXTENSIONS, dataset_paths
+from ml.images import image_batches, load_image_cache
+
+CNN_PARAMS = {'image_size': 128, 'epochs': 10, 'validation_split': 0.2, 'batch_size': 32, 'seed': 0}
+
+
+def train_cnn():
+    """Train CNN on image datasets if available"""
+    import numpy as np
+    import tensorflow as tf
+    from keras.models import Sequential
+    from keras.layers import Dense, Conv2D, MaxPooling2D, Flatten
+
+    params = CNN_PARAMS
+    size = params['image_size']
+    image_paths = dataset_paths(IMAGE_EXTENSIONS)
+    if not image_paths:
+        print("No image files found for CNN training.")
+        return
+
+    cache = load_image_cache(size, image_paths)
+    if len(cache) < 2:
+        print("Insufficient images for CNN training.")
+        return
+
+    y = tf.keras.utils.to_categorical(cache.labels(), 2)
+    # Hold out a random validation slice instead of the tail of the sorted file list
+    rows = np.random.default_rng(params['seed']).permutation(cache.rows)
+    num_val = int(len(rows) * params['validation_split'])
+    train_rows, val_rows = rows[num_val:], rows[:num_val]
+    train_ds = image_batches(cache.images, train_rows, y, params['batch_size'], seed=params['seed'])
+    val_ds = None
+    if num_val:
+        val_ds = image_batches(cache.images, val_rows, y, params['batch_size'], shuffle=False)
+
+    model = Sequential([
+        Conv2D(32, (3, 3), activation='relu', input_shape=(size, size, 3)),
+        MaxPooling2D(2, 2),
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dense(2, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.fit(train_ds, validation_data=val_ds, epochs=params['epochs'], verbose=0)
+    model.save('models/cnn_model.h5')
+    print("CNN model trained and saved.")
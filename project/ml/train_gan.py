@@ -0,0 +1,102 @@
+"""GAN image generator trainer.
+
+Each step runs ``GAN.train_step``, a single compiled graph call that updates
+the discriminator and the generator from one batch. Training state is
+checkpointed every ``checkpoint_every`` steps under ``models/checkpoints/``;
+an interrupted run resumes from the latest checkpoint, and the checkpoints
+are removed once the generator has been saved.
+"""
+import logging
+import os
+import shutil
+
+from ml.data import IMAGE_EXTENSIONS, dataset_paths
+from ml.images import image_batches, load_image_cache
+
+GAN_PARAMS = {'image_size': 64, 'latent_dim': 100, 'steps': 100, 'batch_size': 32,
+              'learning_rate': 0.001, 'checkpoint_every': 25, 'seed': 0}
+CHECKPOINT_DIR = os.path.join('models', 'checkpoints')
+
+logger = logging.getLogger(__name__)
+
+
+def gan_checkpoint_dir(params):
+    return os.path.join(CHECKPOINT_DIR, f"gan_{params['image_size']}_{params['latent_dim']}")
+
+
+def run_gan(images, rows, params=None, checkpoint_dir=None):
+    """Train a GAN on ``images[rows]`` and return (gan, stats)
+
+    With ``checkpoint_dir`` the run resumes from, and periodically saves to,
+    a checkpoint there.
+    """
+    import time
+    import tensorflow as tf
+    from ml.gan_model import GAN
+
+    params = dict(GAN_PARAMS, **(params or {}))
+    tf.random.set_seed(params['seed'])
+    gan = GAN(params['image_size'], params['latent_dim'], params['learning_rate'])
+    step = tf.Variable(0, dtype=tf.int64)
+
+    manager = None
+    if checkpoint_dir:
+        checkpoint = tf.train.Checkpoint(generator=gan.generator, discriminator=gan.discriminator,
+                                         g_optimizer=gan.g_optimizer, d_optimizer=gan.d_optimizer,
+                                         step=step)
+        manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=2)
+        if manager.latest_checkpoint:
+            # Optimizer slots are created lazily; build them so they can be restored
+            gan.g_optimizer.build(gan.generator.trainable_variables)
+            gan.d_optimizer.build(gan.discriminator.trainable_variables)
+            checkpoint.restore(manager.latest_checkpoint)
+            logger.info(f"Resuming GAN training at step {int(step)} from {manager.latest_checkpoint}")
+
+    batch_size = min(params['batch_size'], len(rows))
+    remaining = max(params['steps'] - int(step), 0)
+    batches = iter(image_batches(images, rows, batch_size=batch_size, seed=params['seed'] + int(step),
+                                 repeat=True, drop_remainder=True))
+
+    losses = {}
+    started = None
+    for _ in range(remaining):
+        losses = gan.train_step(next(batches))
+        step.assign_add(1)
+        if started is None:
+            # The first call traces the graph; time the steady state only
+            started = time.perf_counter()
+        if manager and int(step) % params['checkpoint_every'] == 0:
+            manager.save(checkpoint_number=int(step))
+
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    timed_steps = remaining - 1
+    stats = {
+        'steps': int(step),
+        'batch_size': batch_size,
+        'seconds': elapsed,
+        'images_per_sec': timed_steps * batch_size / elapsed if elapsed > 0 else 0.0,
+        'd_loss': float(losses['d_loss']) if losses else None,
+        'g_loss': float(losses['g_loss']) if losses else None,
+    }
+    return gan, stats
+
+
+def train_gan():
+    """Train GAN on image datasets if available"""
+    params = GAN_PARAMS
+    image_paths = dataset_paths(IMAGE_EXTENSIONS)
+    if not image_paths:
+        print("No image files found for GAN training.")
+        return
+
+    cache = load_image_cache(params['image_size'], image_paths)
+    if len(cache) < 32:
+        print("Insufficient images for GAN training.")
+        return
+
+    checkpoint_dir = gan_checkpoint_dir(params)
+    gan, stats = run_gan(cache.images, cache.rows, params, checkpoint_dir)
+    gan.generator.save('models/generator.h5')
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    print(f"GAN model trained and saved ({stats['steps']} steps, "
+          f"{stats['images_per_sec']:.0f} images/sec).")
@@ -0,0 +1,147 @@
+"""Deep Q-Learning (DQN) trainer.
+
+Many environments are stepped together as one ``VectorHealthEnv`` so action
+selection is a single batched forward pass. Transitions go into a fixed-size
+NumPy ring buffer, and the network learns from sampled minibatches against a
+periodically synced target network inside a compiled ``tf.function``.
+"""
+import numpy as np
+
+from ml.env import VectorHealthEnv
+
+DQN_PARAMS = {
+    'gamma': 0.95, 'epsilon_min': 0.01, 'epsilon_decay': 0.995, 'episodes': 1000,
+    'num_envs': 32, 'buffer_size': 10000, 'batch_size': 64, 'learning_starts': 256,
+    'updates_per_step': 4, 'target_update_interval': 100, 'learning_rate': 0.001, 'seed': 0,
+}
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions stored in preallocated arrays"""
+
+    def __init__(self, capacity, state_dim, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.position = (self.position + len(actions)) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size):
+        idx = self.rng.integers(0, self.size, batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
+
+    def __len__(self):
+        return self.size
+
+
+def build_q_network():
+    from keras.models import Sequential
+    from keras.layers import Dense
+
+    model = Sequential([
+        Dense(24, input_dim=1, activation='relu'),
+        Dense(24, activation='relu'),
+        Dense(3, activation='linear')
+    ])
+    model.compile(loss='mse', optimizer='adam')
+    return model
+
+
+def run_dqn(params=None, max_env_steps=None):
+    """Train a Q-network and return (model, stats)
+
+    Stops after ``params['episodes']`` finished episodes, or earlier once
+    ``max_env_steps`` single-environment steps have been taken.
+    """
+    import time
+    import tensorflow as tf
+
+    params = dict(DQN_PARAMS, **(params or {}))
+    rng = np.random.default_rng(params['seed'])
+    tf.random.set_seed(params['seed'])
+    env = VectorHealthEnv(params['num_envs'], seed=params['seed'])
+    buffer = ReplayBuffer(params['buffer_size'], 1, rng)
+
+    model = build_q_network()
+    target_model = build_q_network()
+    target_model.set_weights(model.get_weights())
+    optimizer = tf.keras.optimizers.Adam(learning_rate=params['learning_rate'])
+    gamma = params['gamma']
+
+    @tf.function
+    def train_step(states, actions, rewards, next_states, dones):
+        next_q = tf.reduce_max(target_model(next_states, training=False), axis=1)
+        targets = rewards + gamma * (1.0 - dones) * next_q
+        with tf.GradientTape() as tape:
+            q_values = model(states, training=True)
+            q_taken = tf.gather(q_values, actions, axis=1, batch_dims=1)
+            loss = tf.reduce_mean(tf.square(targets - q_taken))
+        gradients = tape.gradient(loss, model.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+        return loss
+
+    @tf.function
+    def greedy_actions(states):
+        return tf.argmax(model(states, training=False), axis=1, output_type=tf.int32)
+
+    epsilon = 1.0
+    episodes_done = 0
+    env_steps = 0
+    updates = 0
+    states = env.reset().astype(np.float32)
+    started = time.perf_counter()
+
+    while episodes_done < params['episodes']:
+        if max_env_steps is not None and env_steps >= max_env_steps:
+            break
+        actions = greedy_actions(states).numpy()
+        explore = rng.random(env.num_envs) < epsilon
+        actions = np.where(explore, env.sample_actions(), actions)
+
+        next_states, rewards, dones, info = env.step(actions)
+        buffer.add_batch(states, actions, rewards, info['final_states'], dones)
+        states = next_states.astype(np.float32)
+        env_steps += env.num_envs
+
+        finished = int(dones.sum())
+        episodes_done += finished
+        epsilon = max(params['epsilon_min'], epsilon * params['epsilon_decay'] ** finished)
+
+        if len(buffer) >= params['learning_starts']:
+            for _ in range(params['updates_per_step']):
+                train_step(*buffer.sample(params['batch_size']))
+                updates += 1
+                if updates % params['target_update_interval'] == 0:
+                    target_model.set_weights(model.get_weights())
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        'episodes': episodes_done,
+        'env_steps': env_steps,
+        'updates': updates,
+        'seconds': elapsed,
+        'steps_per_sec': env_steps / elapsed if elapsed > 0 else 0.0,
+    }
+    return model, stats
+
+
+def train_rl():
+    """Train Deep Q-Learning (DQN) for continuous learning"""
+    model, stats = run_dqn(DQN_PARAMS)
+    model.save('models/dqn_model.h5')
+    print(f"DQN model trained and saved ({stats['episodes']} episodes, "
+          f"{stats['steps_per_sec']:.0f} env steps/sec).")
@@ -0,0 +1,116 @@
+"""LSTM time-series trainer.
+
+Training windows are a zero-copy ``sliding_window_view`` over the series;
+a ``tf.data`` pipeline gathers one shuffled batch at a time from that view
+and prefetches it while the previous batch trains, so memory stays at one
+copy of the series instead of ``seq_length`` copies.
+
+``RNN_PARAMS['csv_file']`` selects any CSV in ``datasets/`` (default: the
+first one) and ``RNN_PARAMS['columns']`` any of its numeric columns (default:
+the first numeric column after the first). The model predicts the next
+value of the first selected column from all selected columns.
+"""
+import os
+
+import numpy as np
+
+from dataset_catalog import load_table
+from ml.data import DATASETS_DIR, dataset_files
+
+RNN_PARAMS = {'csv_file': None, 'columns': None, 'seq_length': 10, 'epochs': 10,
+              'batch_size': 32, 'seed': 0}
+
+
+def rnn_csv_path(params=None):
+    """Path of the CSV the RNN trains on, or None if there is none"""
+    params = params or RNN_PARAMS
+    if params.get('csv_file'):
+        return os.path.join(DATASETS_DIR, params['csv_file'])
+    csv_files = dataset_files('.csv')
+    return os.path.join(DATASETS_DIR, csv_files[0]) if csv_files else None
+
+
+def load_series(path, columns=None):
+    """Read the selected numeric columns as a float32 (rows, columns) array"""
+    table = load_table(path)
+    if columns is None:
+        numeric = [c for c in table.columns[1:] if table.is_numeric(c)]
+        if not numeric:
+            raise ValueError(f"No numeric columns in {path}")
+        columns = numeric[:1]
+    else:
+        missing = [c for c in columns if c not in table.columns]
+        if missing:
+            raise ValueError(f"Column(s) not in {path}: {', '.join(missing)}")
+        non_numeric = [c for c in columns if not table.is_numeric(c)]
+        if non_numeric:
+            raise ValueError(f"Non-numeric column(s) in {path}: {', '.join(non_numeric)}")
+    data = table.matrix(columns)
+    return data[~np.isnan(data).any(axis=1)].astype(np.float32), list(columns)
+
+
+def make_windows(data, seq_length):
+    """Zero-copy (windows, seq_length, features) view and next-step targets"""
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    windows = sliding_window_view(data[:-1], seq_length, axis=0).transpose(0, 2, 1)
+    targets = data[seq_length:, 0]
+    return windows, targets
+
+
+def window_dataset(windows, targets, batch_size, seed=None):
+    """tf.data pipeline of shuffled batches gathered from the window view"""
+    import tensorflow as tf
+
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        order = rng.permutation(len(targets))
+        for start in range(0, len(order), batch_size):
+            idx = np.sort(order[start:start + batch_size])
+            yield windows[idx], targets[idx]
+
+    signature = (
+        tf.TensorSpec((None,) + windows.shape[1:], tf.float32),
+        tf.TensorSpec((None,), tf.float32),
+    )
+    num_batches = -(-len(targets) // batch_size)
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    return dataset.apply(tf.data.experimental.assert_cardinality(num_batches)).prefetch(tf.data.AUTOTUNE)
+
+
+def train_rnn():
+    """Train RNN (LSTM) on CSV datasets if available"""
+    from keras.models import Sequential
+    from keras.layers import Dense, LSTM
+
+    params = RNN_PARAMS
+    path = rnn_csv_path(params)
+    if path is None:
+        print("No CSV files found for RNN training.")
+        return
+
+    try:
+        data, columns = load_series(path, params['columns'])
+    except (ValueError, KeyError) as e:
+        print(f"Invalid CSV format for RNN training: {e}")
+        return
+
+    if len(data) < 20:
+        print("Insufficient data for RNN training.")
+        return
+
+    data = (data - data.min(axis=0)) / (data.max(axis=0) - data.min(axis=0) + 1e-7)
+
+    seq_length = params['seq_length']
+    windows, targets = make_windows(data, seq_length)
+    dataset = window_dataset(windows, targets, params['batch_size'], params['seed'])
+
+    model = Sequential([
+        LSTM(50, input_shape=(seq_length, len(columns))),
+        Dense(1)
+    ])
+    model.compile(loss='mse', optimizer='adam')
+    model.fit(dataset, epochs=params['epochs'], verbose=0)
+    model.save('models/rnn_model.h5')
+    print(f"RNN model trained and saved ({os.path.basename(path)}: {', '.join(columns)}).")
@@ -0,0 +1,218 @@
+"""Registry of trained model artifacts.
+
+Each model is registered with its artifact path, the trainer that produces
+it, the input files it reads and its hyperparameters. A fingerprint of the
+input file hashes, hyperparameters and trainer source is recorded in
+``models/registry.json`` after training; training is skipped while the
+artifact exists and the fingerprint still matches. The trainer source is its
+whole module plus every project module it imports, directly or through
+other project modules (including imports inside functions), so editing a
+helper such as ``ml/env.py`` retrains the models built on it. Artifacts are loaded
+lazily, once per process, the first time a model is used for inference.
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = 'models'
+MANIFEST_FILE = os.path.join(MODELS_DIR, 'registry.json')
+# Modules under this directory count as trainer source; libraries do not
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_artifact(path):
+    """Load a model artifact according to its file type"""
+    if path.endswith('.npy'):
+        import numpy as np
+        return np.load(path)
+    if path.endswith(('.h5', '.keras')):
+        from tensorflow import keras
+        return keras.models.load_model(path, compile=False)
+    raise ValueError(f"Don't know how to load model artifact {path}")
+
+
+def _project_module_file(name):
+    """Source file of module name if it lives in PROJECT_DIR, else None
+
+    Resolved on the file system, since importing a module to locate it would
+    pull in TensorFlow for the trainers.
+    """
+    base = os.path.join(PROJECT_DIR, *name.split('.'))
+    for path in (f"{base}.py", os.path.join(base, '__init__.py')):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _imported_names(path, module_name):
+    """Modules (and possible submodules) named by the import statements anywhere in a source file"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    package = module_name if path.endswith('__init__.py') else module_name.rpartition('.')[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                parts = package.split('.')
+                parent = '.'.join(parts[:len(parts) - node.level + 1])
+                base = f"{parent}.{base}" if base else parent
+            yield base
+            # 'from ml import env' imports a submodule
+            yield from (f"{base}.{alias.name}" for alias in node.names)
+
+
+def source_files(module_name):
+    """Paths of module_name and of every project module it imports, transitively"""
+    # The registry itself does not shape any artifact
+    seen = {os.path.abspath(__file__)}
+    files = []
+    visited = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in visited:
+            continue
+        visited.add(name)
+        path = _project_module_file(name)
+        if path and path not in seen:
+            seen.add(path)
+            files.append(path)
+            pending.extend(_imported_names(path, name))
+    return sorted(files)
+
+
+class ModelSpec:
+    def __init__(self, name, artifact, trainer, inputs=None, params=None, loader=load_artifact):
+        self.name = name
+        self.artifact = artifact
+        self.trainer = trainer
+        self.inputs = inputs or (lambda: [])
+        self.params = params or {}
+        self.loader = loader
+
+    def fingerprint(self):
+        """Hash of everything that determines the trained artifact"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.params, sort_keys=True).encode())
+        digest.update(getattr(self.trainer, '__qualname__', repr(self.trainer)).encode())
+        module = getattr(self.trainer, '__module__', None)
+        for path in source_files(module) if module else []:
+            digest.update(os.path.relpath(path, PROJECT_DIR).encode())
+            digest.update(file_sha256(path).encode())
+        for path in sorted(self.inputs()):
+            digest.update(os.path.basename(path).encode())
+            digest.update(file_sha256(path).encode())
+        return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, manifest_file=MANIFEST_FILE):
+        self.manifest_file = manifest_file
+        self.specs = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, artifact, trainer, inputs=None, params=None, loader=load_artifact):
+        self.specs[name] = ModelSpec(name, artifact, trainer, inputs, params, loader)
+        return self.specs[name]
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable model manifest {self.manifest_file}: {str(e)}")
+            return {}
+
+    def _write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_file)
+
+    def is_current(self, name, fingerprint=None):
+        """True if the artifact exists and was trained from the current inputs"""
+        spec = self.specs[name]
+        entry = self._read_manifest().get(name)
+        if entry is None or not os.path.exists(spec.artifact):
+            return False
+        return entry.get('fingerprint') == (fingerprint or spec.fingerprint())
+
+    def train(self, name, force=False):
+        """Train one model unless its artifact is current; returns a status string"""
+        spec = self.specs[name]
+        if spec.trainer is None:
+            # Registered for serving only (see inference.py)
+            logger.warning(f"Model {name} has no trainer in this registry")
+            return 'skipped'
+        fingerprint = spec.fingerprint()
+        if not force and self.is_current(name, fingerprint):
+            logger.info(f"Model {name} is up to date, skipping training")
+            return 'up-to-date'
+
+        before = os.path.getmtime(spec.artifact) if os.path.exists(spec.artifact) else None
+        spec.trainer()
+        if not os.path.exists(spec.artifact) or os.path.getmtime(spec.artifact) == before:
+            logger.warning(f"Trainer for {name} did not produce {spec.artifact}")
+            return 'skipped'
+
+        manifest = self._read_manifest()
+        manifest[name] = {
+            'artifact': spec.artifact,
+            'fingerprint': fingerprint,
+            'params': spec.params,
+            'trained_at': datetime.now().isoformat(),
+        }
+        self._write_manifest(manifest)
+        with self._lock:
+            self._loaded.pop(name, None)
+        return 'trained'
+
+    def train_all(self, names=None, force=False):
+        return {name: self.train(name, force) for name in (names or self.specs)}
+
+    def load(self, name):
+        """Return the loaded model, loading its artifact on first use"""
+        model = self._loaded.get(name)
+        if model is None:
+            with self._lock:
+                model = self._loaded.get(name)
+                if model is None:
+                    spec = self.specs[name]
+                    if not os.path.exists(spec.artifact):
+                        raise FileNotFoundError(f"Model {name} has not been trained: {spec.artifact}")
+                    logger.info(f"Loading model {name} from {spec.artifact}")
+                    model = spec.loader(spec.artifact)
+                    self._loaded[name] = model
+        return model
+
+    def status(self):
+        manifest = self._read_manifest()
+        return {
+            name: {
+                'artifact': spec.artifact,
+                'exists': os.path.exists(spec.artifact),
+                'trained_at': manifest.get(name, {}).get('trained_at'),
+                'current': self.is_current(name),
+                'loaded': name in self._loaded,
+            }
+            for name, spec in self.specs.items()
+        }
@@ -0,0 +1,176 @@
+"""Prompt construction for the chat assistant.
+
+A chat prompt is made of:
+
+* the system prompt, sent in Ollama's ``system`` field
+* a one-line summary of the user's health data (``health_summary``) instead
+  of the raw JSON document
+* the most recent conversation turns that fit in ``history_tokens``
+  (estimated at four characters per token), if the last turn is within
+  ``memory_window`` seconds
+* the new message
+
+When the previous answer for a user came from Ollama, its returned
+``context`` (the evaluated token sequence) is kept in a small per-process
+LRU. If nothing changed since (no other turn was saved and the health
+summary is the same), the next request sends that context plus only the
+new message, and ``keep_alive`` keeps the model loaded, so Ollama does not
+evaluate the shared prefix again.
+
+Configured from the environment: ``CHAT_HISTORY_TOKENS`` (default 512),
+``CHAT_MEMORY_WINDOW`` seconds (1800, 0 disables memory),
+``CHAT_MAX_CONTEXT`` tokens of reused context (2048), ``CHAT_CONTEXTS``
+users kept in the LRU (1024) and ``OLLAMA_KEEP_ALIVE`` ('10m').
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+SYSTEM_PROMPT = """You are a healthcare assistant AI. Provide helpful, accurate health advice while always recommending users consult healthcare professionals for serious concerns. Be supportive, informative, and encouraging about healthy lifestyle choices."""
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting; real counts come back from Ollama"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number == int(number) else round(number, 1)
+
+
+def health_summary(health_data, user_info=None):
+    """Compact one-line description of the user and their latest readings"""
+    health_data = health_data or {}
+    user_info = user_info or {}
+    parts = []
+    age, gender = _number(user_info.get('age')), user_info.get('gender')
+    if age or gender:
+        parts.append(' '.join(str(part) for part in (f"{age}-year-old" if age else None, gender) if part))
+
+    weight, height = _number(health_data.get('weight')), _number(health_data.get('height'))
+    if weight and height:
+        parts.append(f"BMI {weight / (height / 100) ** 2:.1f} ({weight} kg, {height} cm)")
+    elif weight:
+        parts.append(f"weight {weight} kg")
+    systolic = _number(health_data.get('blood_pressure_systolic'))
+    diastolic = _number(health_data.get('blood_pressure_diastolic'))
+    if systolic:
+        parts.append(f"BP {systolic}/{diastolic}" if diastolic else f"systolic BP {systolic}")
+    for field, label, unit in (('heart_rate', 'heart rate', 'bpm'), ('glucose_level', 'glucose', 'mg/dL'),
+                               ('sleep_hours', 'sleep', 'h/night')):
+        value = _number(health_data.get(field))
+        if value:
+            parts.append(f"{label} {value} {unit}")
+    if health_data.get('risk_level'):
+        parts.append(f"{health_data['risk_level'].lower()} risk")
+    return ', '.join(parts) if parts else 'No health data available'
+
+
+def format_turn(entry):
+    return f"User: {entry.get('user_message', '')}\nAssistant: {entry.get('ai_response', '')}\n"
+
+
+def select_turns(history, budget, window, now=None):
+    """Newest turns (oldest first) that fit in budget tokens, if the conversation is recent"""
+    if not history or budget <= 0 or window <= 0:
+        return []
+    now = now or datetime.now()
+    try:
+        last_at = datetime.fromisoformat(history[-1]['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        return []
+    if (now - last_at).total_seconds() > window:
+        return []
+    turns = []
+    used = 0
+    for entry in reversed(history):
+        cost = estimate_tokens(format_turn(entry))
+        if used + cost > budget:
+            break
+        turns.append(entry)
+        used += cost
+    return turns[::-1]
+
+
+class PromptBuilder:
+    """Builds chat prompts and remembers each user's last Ollama context"""
+
+    def __init__(self, history_tokens=512, memory_window=1800.0, max_context=2048,
+                 max_users=1024, keep_alive='10m'):
+        self.history_tokens = history_tokens
+        self.memory_window = memory_window
+        self.max_context = max_context
+        self.max_users = max_users
+        self.keep_alive = keep_alive
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            history_tokens=int(os.getenv('CHAT_HISTORY_TOKENS', 512)),
+            memory_window=float(os.getenv('CHAT_MEMORY_WINDOW', 1800)),
+            max_context=int(os.getenv('CHAT_MAX_CONTEXT', 2048)),
+            max_users=int(os.getenv('CHAT_CONTEXTS', 1024)),
+            keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '10m'),
+        )
+
+    def build(self, user_id, message, health_data, user_info=None, history=None):
+        """Prompt dict: system, prompt, context, turns, memory, summary_key, estimated_tokens
+
+        ``memory`` is True when the answer depends on earlier turns, in which
+        case it must not be served from or stored in the shared response cache.
+        """
+        summary = health_summary(health_data, user_info)
+        summary_key = hashlib.sha1(summary.encode('utf-8')).hexdigest()[:16]
+        history = history or []
+        turns = select_turns(history, self.history_tokens, self.memory_window)
+        question = f"User: {message}\nAssistant:"
+
+        context = None
+        if turns:
+            with self._lock:
+                saved = self._contexts.get(user_id)
+            # Reusable only if the saved context ends with the latest saved turn
+            if saved and saved['chat_id'] == history[-1].get('id') and saved['summary_key'] == summary_key:
+                context = saved['context']
+
+        if context is not None:
+            prompt = {'system': None, 'prompt': question}
+        else:
+            conversation = ''.join(format_turn(entry) for entry in turns)
+            body = f"Health summary: {summary}\n\n"
+            if conversation:
+                body += f"Conversation so far:\n{conversation}\n"
+            prompt = {'system': SYSTEM_PROMPT, 'prompt': body + question}
+        prompt.update({
+            'context': context,
+            'turns': len(turns),
+            'memory': bool(turns),
+            'summary_key': summary_key,
+            'estimated_tokens': estimate_tokens((prompt['system'] or '') + prompt['prompt']),
+        })
+        return prompt
+
+    def remember(self, user_id, context, chat_id, summary_key):
+        """Keep the context Ollama returned for the answer saved as chat_id"""
+        with self._lock:
+            if not context or self.memory_window <= 0 or len(context) > self.max_context:
+                # Too long to keep extending; the next turn starts from the text history
+                self._contexts.pop(user_id, None)
+                return
+            self._contexts[user_id] = {'context': context, 'chat_id': chat_id, 'summary_key': summary_key}
+            self._contexts.move_to_end(user_id)
+            while len(self._contexts) > self.max_users:
+                self._contexts.popitem(last=False)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._contexts.pop(user_id, None)
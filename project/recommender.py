@@ -0,0 +1,377 @@
+"""Health recommendations from similar profiles in the bundled datasets.
+
+Three CSVs in ``datasets/`` are encoded into normalized NumPy matrices:
+
+* ``diet_recommendations_dataset.csv``: patient profiles (age, gender, BMI,
+  blood pressure, glucose, activity level) and the diet plan each followed
+* ``exercise_dataset.csv``: profiles (age, gender, BMI, weight) with exercise
+  duration, intensity and calories burned
+* ``megaGymDataset.csv``: exercises with type, level, body part and rating
+
+A user's profile is z-scored with the dataset statistics and matched against
+every row at once (brute-force k-NN; the datasets are a few thousand rows).
+Metrics the user has not entered are left out of the distance. The diet plan
+is a distance-weighted vote of the nearest patients, the exercise volume is
+the neighbours' median, and gym exercises are the catalog entries nearest to
+the type/level the profile calls for.
+
+The encoded matrices are saved to ``models/recommender_index.npz`` and
+rebuilt when any CSV changes. ``rule_recommendations`` holds the original
+threshold rules, used for lifestyle advice and whenever the index cannot be
+loaded.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from dataset_catalog import load_table
+from model_registry import file_sha256
+
+DATASETS_DIR = 'datasets'
+DIET_CSV = os.path.join(DATASETS_DIR, 'diet_recommendations_dataset.csv')
+EXERCISE_CSV = os.path.join(DATASETS_DIR, 'exercise_dataset.csv')
+GYM_CSV = os.path.join(DATASETS_DIR, 'megaGymDataset.csv')
+INDEX_FILE = os.path.join('models', 'recommender_index.npz')
+INDEX_VERSION = 1
+
+DIET_FEATURES = ('age', 'gender', 'bmi', 'systolic', 'glucose', 'activity')
+EXERCISE_FEATURES = ('age', 'gender', 'bmi', 'weight')
+GYM_TYPES = ('Strength', 'Stretching', 'Plyometrics', 'Powerlifting', 'Cardio',
+             'Olympic Weightlifting', 'Strongman')
+GYM_LEVELS = ('Beginner', 'Intermediate', 'Expert')
+ACTIVITY_LEVELS = {'sedentary': 0.0, 'light': 0.5, 'moderate': 1.0, 'active': 2.0, 'very_active': 2.0}
+
+DIET_PLAN_ADVICE = {
+    'Balanced': [
+        "Build meals from vegetables, whole grains, lean protein and healthy fats in balanced portions",
+        "Keep portions consistent and limit processed foods and added sugars",
+    ],
+    'Low_Carb': [
+        "Replace refined carbohydrates with vegetables, legumes and whole grains in small portions",
+        "Pair carbohydrates with protein or fiber to keep blood sugar steady",
+    ],
+    'Low_Sodium': [
+        "Keep sodium under 2300mg per day by cooking fresh and checking labels",
+        "Favor potassium-rich foods like bananas, beans and leafy greens",
+    ],
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _per_value(table, name, fn, dtype=np.float64):
+    """fn of each row's value, computed once per distinct value of a category column"""
+    if table.kind(name) == 'category':
+        return np.array([fn(value) for value in table.categories(name)], dtype=dtype)[table.column(name)]
+    return np.array([fn(str(value)) for value in table.column(name).tolist()], dtype=dtype)
+
+
+def _numbers(table, name):
+    """A column as float64, NaN where a text cell is not a number"""
+    if table.kind(name) == 'category':
+        return _per_value(table, name, _float)
+    return table.column(name).astype(np.float64)
+
+
+def _gender(value):
+    value = str(value or '').strip().lower()
+    if value in ('male', 'm'):
+        return 1.0
+    if value in ('female', 'f'):
+        return 0.0
+    return np.nan
+
+
+def profile_features(user_info, health_data):
+    """Named features of a user; NaN where the user has not provided the value"""
+    weight = _float(health_data.get('weight'))
+    height = _float(health_data.get('height')) / 100
+    bmi = weight / (height * height) if height > 0 else np.nan
+    return {
+        'age': _float((user_info or {}).get('age')),
+        'gender': _gender((user_info or {}).get('gender')),
+        'bmi': bmi,
+        'weight': weight,
+        'systolic': _float(health_data.get('blood_pressure_systolic')),
+        'glucose': _float(health_data.get('glucose_level')),
+        'activity': ACTIVITY_LEVELS.get(str(health_data.get('activity_level', '')).lower(), np.nan),
+    }
+
+
+def profile_key(features):
+    """Stable key of the features, rounded so tiny edits do not invalidate the cache"""
+    rounded = {name: None if np.isnan(v) else round(float(v), 1) for name, v in sorted(features.items())}
+    return hashlib.sha256(json.dumps(rounded).encode()).hexdigest()[:16]
+
+
+def zscore(matrix):
+    mean = np.nanmean(matrix, axis=0)
+    std = np.nanstd(matrix, axis=0)
+    std[std == 0] = 1.0
+    return ((matrix - mean) / std).astype(np.float32), mean.astype(np.float32), std.astype(np.float32)
+
+
+def nearest(matrix, mean, std, query, k):
+    """Indices and distances of the k rows nearest to query, ignoring NaN features"""
+    mask = ~np.isnan(query)
+    if not mask.any():
+        return None, None
+    q = ((query[mask] - mean[mask]) / std[mask]).astype(np.float32)
+    distances = np.sqrt(np.square(matrix[:, mask] - q).sum(axis=1))
+    k = min(k, len(distances))
+    idx = np.argpartition(distances, k - 1)[:k]
+    order = np.argsort(distances[idx])
+    return idx[order], distances[idx[order]]
+
+
+class Recommender:
+    """Normalized feature matrices of the recommendation datasets"""
+
+    def __init__(self, arrays, k=15):
+        self.arrays = arrays
+        self.k = k
+        self.diet_plans = arrays['diet_plans'].tolist()
+        self.gym_titles = arrays['gym_titles'].tolist()
+        self.gym_body_parts = arrays['gym_body_parts'].tolist()
+
+    @staticmethod
+    def source_hashes():
+        return [file_sha256(path) for path in (DIET_CSV, EXERCISE_CSV, GYM_CSV)]
+
+    @classmethod
+    def build(cls):
+        diet = load_table(DIET_CSV)
+        diet_matrix = np.column_stack([
+            _numbers(diet, 'Age'), _per_value(diet, 'Gender', _gender), _numbers(diet, 'BMI'),
+            _numbers(diet, 'Blood_Pressure_mmHg'), _numbers(diet, 'Glucose_mg/dL'),
+            _per_value(diet, 'Physical_Activity_Level', lambda value: ACTIVITY_LEVELS.get(value.strip().lower(), np.nan)),
+        ])
+        diet_plans = sorted({plan.strip() for plan in diet.categories('Diet_Recommendation')})
+        diet_labels = _per_value(diet, 'Diet_Recommendation', lambda plan: diet_plans.index(plan.strip()), np.int64)
+
+        exercise = load_table(EXERCISE_CSV)
+        exercise_matrix = np.column_stack([
+            _numbers(exercise, 'Age'), _per_value(exercise, 'Gender', _gender), _numbers(exercise, 'BMI'),
+            _numbers(exercise, 'Actual Weight'),
+        ])
+        exercise_targets = np.column_stack([
+            _numbers(exercise, 'Duration'), _numbers(exercise, 'Exercise Intensity'),
+            _numbers(exercise, 'Calories Burn'),
+        ]).astype(np.float32)
+
+        gym = load_table(GYM_CSV)
+        # One-hot type and level plus a rating term, so a target vector picks
+        # the best-rated exercises of the wanted kind
+        gym_matrix = np.zeros((len(gym), len(GYM_TYPES) + len(GYM_LEVELS) + 1), dtype=np.float32)
+        types = _per_value(gym, 'Type', lambda value: GYM_TYPES.index(value) if value in GYM_TYPES else -1, np.int64)
+        levels = _per_value(gym, 'Level', lambda value: GYM_LEVELS.index(value) if value in GYM_LEVELS else -1,
+                            np.int64)
+        rows = np.arange(len(gym))
+        gym_matrix[rows[types >= 0], types[types >= 0]] = 1.0
+        gym_matrix[rows[levels >= 0], len(GYM_TYPES) + levels[levels >= 0]] = 1.0
+        ratings = _numbers(gym, 'Rating')
+        gym_matrix[:, -1] = np.where(np.isnan(ratings), 0.0, ratings / 10.0)
+
+        diet_z, diet_mean, diet_std = zscore(diet_matrix)
+        exercise_z, exercise_mean, exercise_std = zscore(exercise_matrix)
+        arrays = {
+            'version': np.array(INDEX_VERSION),
+            'source_hashes': np.array(cls.source_hashes()),
+            'diet_matrix': np.nan_to_num(diet_z), 'diet_mean': diet_mean, 'diet_std': diet_std,
+            'diet_labels': diet_labels, 'diet_plans': np.array(diet_plans),
+            'exercise_matrix': exercise_z, 'exercise_mean': exercise_mean, 'exercise_std': exercise_std,
+            'exercise_targets': exercise_targets,
+            'gym_matrix': gym_matrix,
+            'gym_titles': np.array([title.strip() for title in gym.values('Title')]),
+            'gym_body_parts': np.array([part.strip() for part in gym.values('BodyPart')]),
+        }
+        return cls(arrays)
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @property
+    def fingerprint(self):
+        """Identifies the dataset versions, so cached results can be told apart"""
+        return hashlib.sha256(''.join(self.arrays['source_hashes'].tolist()).encode()).hexdigest()[:12]
+
+    def is_current(self):
+        return (int(self.arrays['version']) == INDEX_VERSION
+                and self.arrays['source_hashes'].tolist() == self.source_hashes())
+
+    def diet_plan(self, features):
+        """(plan, share of neighbours weighted toward it) for the nearest patients"""
+        a = self.arrays
+        query = np.array([features[name] for name in DIET_FEATURES])
+        idx, distances = nearest(a['diet_matrix'], a['diet_mean'], a['diet_std'], query, self.k)
+        if idx is None:
+            return None, 0.0
+        votes = np.bincount(a['diet_labels'][idx], weights=1.0 / (distances + 1e-3),
+                            minlength=len(self.diet_plans))
+        best = int(np.argmax(votes))
+        return self.diet_plans[best], float(votes[best] / votes.sum())
+
+    def exercise_volume(self, features):
+        """Median (minutes, intensity, calories) per session of the nearest profiles"""
+        a = self.arrays
+        query = np.array([features[name] for name in EXERCISE_FEATURES])
+        idx, _ = nearest(a['exercise_matrix'], a['exercise_mean'], a['exercise_std'], query, self.k)
+        if idx is None:
+            return None
+        return np.median(a['exercise_targets'][idx], axis=0)
+
+    def gym_exercises(self, features, count=3):
+        """Titles of top-rated catalog exercises matching the profile, one per body part"""
+        target = np.zeros(self.arrays['gym_matrix'].shape[1], dtype=np.float32)
+        wanted = ['Strength']
+        bmi, systolic, glucose = features['bmi'], features['systolic'], features['glucose']
+        if bmi > 25 or glucose > 100:
+            wanted.append('Cardio')
+        if systolic > 130:
+            wanted = ['Stretching', 'Cardio']
+        for exercise_type in wanted:
+            target[GYM_TYPES.index(exercise_type)] = 1.0
+        beginner = features['age'] > 60 or features['activity'] == 0.0 or bmi > 30
+        target[len(GYM_TYPES) + GYM_LEVELS.index('Beginner' if beginner else 'Intermediate')] = 1.0
+        target[-1] = 1.0
+
+        scores = self.arrays['gym_matrix'] @ target
+        picked, seen = [], set()
+        for i in np.argsort(-scores, kind='stable'):
+            if self.gym_body_parts[i] in seen:
+                continue
+            seen.add(self.gym_body_parts[i])
+            picked.append(f"{self.gym_titles[i]} ({self.gym_body_parts[i].lower()})")
+            if len(picked) == count:
+                break
+        return picked
+
+    def recommend(self, features, health_data):
+        """Diet and exercise advice from similar profiles; lifestyle advice from the rules"""
+        recommendations = {'diet': [], 'exercise': [], 'lifestyle': rule_recommendations(health_data)['lifestyle']}
+        plan, share = self.diet_plan(features)
+        if plan:
+            recommendations['diet'].append(
+                f"Follow a {plan.replace('_', '-').lower()} diet, the plan of {share:.0%} of patients with profiles like yours")
+            recommendations['diet'].extend(DIET_PLAN_ADVICE.get(plan, []))
+        volume = self.exercise_volume(features)
+        if volume is not None:
+            minutes, intensity, calories = volume
+            recommendations['exercise'].append(
+                f"Aim for about {minutes:.0f}-minute sessions at intensity {intensity:.0f}/10 "
+                f"(around {calories:.0f} kcal), typical for people with your profile")
+        exercises = self.gym_exercises(features)
+        if exercises:
+            recommendations['exercise'].append(f"Try: {', '.join(exercises)}")
+        return recommendations
+
+
+def rule_recommendations(health_data):
+    """Threshold rules on BMI, blood pressure and glucose"""
+    recommendations = {
+        'diet': [],
+        'exercise': [],
+        'lifestyle': []
+    }
+
+    if 'weight' in health_data and 'height' in health_data:
+        weight = float(health_data['weight'])
+        height = float(health_data['height']) / 100
+        bmi = weight / (height * height)
+
+        if bmi > 25:
+            recommendations['diet'].extend([
+                "Reduce caloric intake by 300-500 calories per day",
+                "Increase fiber intake with whole grains and vegetables",
+                "Limit processed foods and added sugars"
+            ])
+            recommendations['exercise'].extend([
+                "30 minutes of cardio exercise 5 times per week",
+                "Include strength training 2-3 times per week"
+            ])
+        elif bmi < 18.5:
+            recommendations['diet'].extend([
+                "Increase healthy caloric intake",
+                "Include protein-rich foods in every meal",
+                "Add healthy fats like nuts and avocados"
+            ])
+
+    if 'blood_pressure_systolic' in health_data:
+        systolic = int(health_data['blood_pressure_systolic'])
+        if systolic > 130:
+            recommendations['diet'].extend([
+                "Reduce sodium intake to less than 2300mg per day",
+                "Increase potassium-rich foods like bananas and spinach"
+            ])
+            recommendations['lifestyle'].extend([
+                "Practice stress management techniques",
+                "Ensure 7-8 hours of quality sleep"
+            ])
+
+    if 'glucose_level' in health_data:
+        glucose = int(health_data['glucose_level'])
+        if glucose > 100:
+            recommendations['diet'].extend([
+                "Choose low glycemic index foods",
+                "Limit refined carbohydrates and sugary drinks",
+                "Include cinnamon and other blood sugar-friendly spices"
+            ])
+            recommendations['exercise'].extend([
+                "Regular post-meal walks",
+                "Include resistance training to improve insulin sensitivity"
+            ])
+
+    return recommendations
+
+
+def load_recommender(index_path=INDEX_FILE):
+    """Load the saved index, rebuilding and saving it if a dataset changed"""
+    if os.path.exists(index_path):
+        try:
+            recommender = Recommender.load(index_path)
+            if recommender.is_current():
+                return recommender
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable recommender index {index_path}: {str(e)}")
+    recommender = Recommender.build()
+    recommender.save(index_path)
+    logger.info(f"Built recommender index from {DIET_CSV}, {EXERCISE_CSV} and {GYM_CSV}")
+    return recommender
+
+
+_recommender = None
+_recommender_failed = False
+_recommender_lock = threading.Lock()
+
+
+def get_recommender():
+    """Process-wide recommender, or None if the datasets cannot be loaded"""
+    global _recommender, _recommender_failed
+    if _recommender is None and not _recommender_failed:
+        with _recommender_lock:
+            if _recommender is None and not _recommender_failed:
+                try:
+                    _recommender = load_recommender()
+                except (OSError, KeyError, ValueError) as e:
+                    _recommender_failed = True
+                    logger.warning(f"Recommender index unavailable, using rule-based recommendations: {str(e)}")
+    return _recommender
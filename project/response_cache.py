@@ -0,0 +1,215 @@
+"""Cache of assistant answers for repeated health questions.
+
+Answers are keyed on the normalized question plus a coarse bucket of the
+user's health context (risk level and BMI, blood pressure and glucose
+bands), so users with similar profiles share answers to the same question.
+Lookups try an exact match first and, when an embedding model is
+configured, fall back to the most similar cached question in the same
+bucket. Entries are evicted least-recently-used beyond ``max_entries`` and
+expire after ``ttl`` seconds.
+
+Configured from the environment: ``RESPONSE_CACHE_SIZE`` (default 1024),
+``RESPONSE_CACHE_TTL`` seconds (3600), ``RESPONSE_CACHE_EMBED_MODEL``
+(unset disables similarity lookup) and ``RESPONSE_CACHE_SIMILARITY`` (0.92).
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Lower-case the prompt and strip punctuation and repeated whitespace"""
+    text = _PUNCTUATION.sub(' ', prompt.lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _band(value, bounds, labels):
+    for bound, label in zip(bounds, labels):
+        if value <= bound:
+            return label
+    return labels[-1]
+
+
+def health_bucket(health_data):
+    """Coarse, shareable summary of the health context sent with a prompt"""
+    if not health_data:
+        return 'none'
+
+    parts = [f"risk={health_data.get('risk_level', 'unknown')}"]
+    try:
+        height = float(health_data['height']) / 100
+        bmi = float(health_data['weight']) / (height * height)
+        if bmi < 18.5:
+            parts.append('bmi=under')
+        else:
+            parts.append('bmi=' + _band(bmi, [25, 30], ['normal', 'over', 'obese']))
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        parts.append('bmi=unknown')
+    try:
+        systolic = int(health_data['blood_pressure_systolic'])
+        parts.append('bp=' + _band(systolic, [120, 130, 140], ['normal', 'elevated', 'high', 'very_high']))
+    except (KeyError, TypeError, ValueError):
+        parts.append('bp=unknown')
+    try:
+        glucose = int(health_data['glucose_level'])
+        parts.append('glucose=' + _band(glucose, [100, 126, 140], ['normal', 'elevated', 'high', 'very_high']))
+    except (KeyError, TypeError, ValueError):
+        parts.append('glucose=unknown')
+    return '|'.join(parts)
+
+
+def ollama_embedder(model):
+    """Embedding function that calls Ollama's embeddings API through the gateway"""
+    from llm_gateway import get_gateway
+
+    def embed(text):
+        return get_gateway().post('/api/embeddings', {'model': model, 'prompt': text})['embedding']
+    return embed
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers with optional embedding-similarity lookup"""
+
+    def __init__(self, max_entries=1024, ttl=3600.0, embed=None, similarity_threshold=0.92,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # (bucket, normalized prompt) -> (response, expires_at)
+        self._entries = OrderedDict()
+        # bucket -> {normalized prompt: unit embedding}, plus a stacked matrix per bucket
+        self._vectors = {}
+        self._matrices = {}
+        self._embeddings = OrderedDict()
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0,
+                      'evictions': 0, 'expirations': 0, 'embedding_errors': 0}
+
+    @classmethod
+    def from_env(cls):
+        model = os.getenv('RESPONSE_CACHE_EMBED_MODEL')
+        return cls(
+            max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', 1024)),
+            ttl=float(os.getenv('RESPONSE_CACHE_TTL', 3600)),
+            embed=ollama_embedder(model) if model else None,
+            similarity_threshold=float(os.getenv('RESPONSE_CACHE_SIMILARITY', 0.92)),
+        )
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        bucket, prompt = key
+        vectors = self._vectors.get(bucket)
+        if vectors is not None and vectors.pop(prompt, None) is not None:
+            self._matrices.pop(bucket, None)
+
+    def _embedding(self, prompt):
+        """Unit-length embedding of a normalized prompt, memoized"""
+        import numpy as np
+
+        with self._lock:
+            vector = self._embeddings.get(prompt)
+            if vector is not None:
+                self._embeddings.move_to_end(prompt)
+                return vector
+        try:
+            vector = np.asarray(self.embed(prompt), dtype=np.float32)
+        except Exception as e:
+            with self._lock:
+                self.stats['embedding_errors'] += 1
+            logger.warning(f"Response cache embedding failed: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        with self._lock:
+            self._embeddings[prompt] = vector
+            if len(self._embeddings) > 256:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def _most_similar(self, bucket, vector):
+        import numpy as np
+
+        vectors = self._vectors.get(bucket)
+        if not vectors:
+            return None
+        if bucket not in self._matrices:
+            self._matrices[bucket] = (list(vectors), np.stack(list(vectors.values())))
+        prompts, matrix = self._matrices[bucket]
+        if matrix.shape[1] != vector.shape[0]:
+            return None
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.similarity_threshold:
+            return prompts[best]
+        return None
+
+    def get(self, prompt, bucket):
+        """Return a cached answer for the prompt in this health bucket, or None"""
+        normalized = normalize_prompt(prompt)
+        now = self.clock()
+        with self._lock:
+            key = (bucket, normalized)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                self._drop(key)
+                self.stats['expirations'] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return entry[0]
+
+        if self.embed is not None:
+            # Embedding runs outside the lock; it may be a network call
+            vector = self._embedding(normalized)
+            with self._lock:
+                match = self._most_similar(bucket, vector) if vector is not None else None
+                entry = self._entries.get((bucket, match)) if match is not None else None
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end((bucket, match))
+                    self.stats['semantic_hits'] += 1
+                    return entry[0]
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, prompt, bucket, response):
+        """Cache an answer for the prompt in this health bucket"""
+        normalized = normalize_prompt(prompt)
+        vector = self._embedding(normalized) if self.embed is not None else None
+        with self._lock:
+            key = (bucket, normalized)
+            self._entries[key] = (response, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            if vector is not None:
+                self._vectors.setdefault(bucket, {})[normalized] = vector
+                self._matrices.pop(bucket, None)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrices.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['exact_hits'] + self.stats['semantic_hits'] + self.stats['misses']
+            hits = lookups - self.stats['misses']
+            return dict(self.stats, size=len(self._entries), max_entries=self.max_entries,
+                        hit_rate=hits / lookups if lookups else 0.0)
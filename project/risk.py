@@ -0,0 +1,295 @@
+"""Health risk scoring for one record or many.
+
+``calculate_health_risk`` scores a single health-data dict. ``risk_scores``
+applies the same thresholds to whole columns with ``np.select``, and
+``score_records`` runs it over CSV rows or JSON records chunk by chunk so a
+large upload is scored and streamed back without holding every result.
+
+Batch input uses the health-data field names (``weight``, ``height``,
+``blood_pressure_systolic``, ``heart_rate``, ``glucose_level``); an ``id``,
+``patient_id`` or ``user_id`` column is echoed back. Cells are parsed as
+numbers the way ``calculate_health_risk`` parses them, so a record it would
+reject (``None``, a blood pressure, heart rate or glucose string that is not
+a whole number such as ``'145.5'``, a zero height) gets an ``error`` instead of
+a score. Empty strings count as missing,
+exactly like an absent key, since that is how a CSV leaves a value out.
+
+Command line::
+
+    python risk.py patients.csv -o risk.csv
+    python risk.py patients.json --format ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from itertools import compress, repeat
+from operator import is_, is_not, ne
+
+import numpy as np
+
+FIELDS = ('weight', 'height', 'blood_pressure_systolic', 'heart_rate', 'glucose_level')
+ID_FIELDS = ('id', 'patient_id', 'user_id')
+OUTPUT_FIELDS = ('row', 'id', 'risk_score', 'risk_level', 'error')
+CHUNK_ROWS = 10000
+# Fields calculate_health_risk reads with int(); the rest use float()
+INT_FIELDS = ('blood_pressure_systolic', 'heart_rate', 'glucose_level')
+# Default for absent keys, told apart from NaN cells by identity
+_ABSENT = float('nan')
+_NUMBER_TYPES = {float, int, bool}
+# Level for each possible score (0 to 9)
+LEVELS = np.array(['Low'] * 3 + ['Medium'] * 3 + ['High'] * 4, dtype=object)
+
+
+def calculate_health_risk(health_data):
+    """Calculate health risk level based on health metrics"""
+    risk_score = 0
+
+    if 'weight' in health_data and 'height' in health_data:
+        weight = float(health_data['weight'])
+        height = float(health_data['height']) / 100
+        bmi = weight / (height * height)
+
+        if bmi < 18.5 or bmi > 30:
+            risk_score += 2
+        elif bmi > 25:
+            risk_score += 1
+
+    if 'blood_pressure_systolic' in health_data:
+        systolic = int(health_data['blood_pressure_systolic'])
+        if systolic > 140:
+            risk_score += 3
+        elif systolic > 130:
+            risk_score += 2
+        elif systolic > 120:
+            risk_score += 1
+
+    if 'heart_rate' in health_data:
+        heart_rate = int(health_data['heart_rate'])
+        if heart_rate > 100 or heart_rate < 60:
+            risk_score += 1
+
+    if 'glucose_level' in health_data:
+        glucose = int(health_data['glucose_level'])
+        if glucose > 140:
+            risk_score += 3
+        elif glucose > 126:
+            risk_score += 2
+        elif glucose > 100:
+            risk_score += 1
+
+    if risk_score >= 6:
+        return "High"
+    elif risk_score >= 3:
+        return "Medium"
+    else:
+        return "Low"
+
+
+def risk_scores(weight, height, systolic, heart_rate, glucose):
+    """Risk points per row for float64 columns, NaN meaning the value is missing"""
+    # Same operation order as calculate_health_risk so BMI rounds identically
+    height_m = height / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = weight / (height_m * height_m)
+    has_bmi = ~np.isnan(weight) & ~np.isnan(height)
+    bmi_points = np.select([has_bmi & ((bmi < 18.5) | (bmi > 30)), has_bmi & (bmi > 25)], [2, 1], 0)
+
+    # int() truncates toward zero; comparisons with NaN are False, so missing scores 0
+    systolic = np.trunc(systolic)
+    bp_points = np.select([systolic > 140, systolic > 130, systolic > 120], [3, 2, 1], 0)
+    heart_rate = np.trunc(heart_rate)
+    hr_points = ((heart_rate > 100) | (heart_rate < 60)).astype(int)
+    glucose = np.trunc(glucose)
+    glucose_points = np.select([glucose > 140, glucose > 126, glucose > 100], [3, 2, 1], 0)
+    return bmi_points + bp_points + hr_points + glucose_points
+
+
+def risk_levels(scores):
+    return LEVELS[scores]
+
+
+def parse_cells(cells, parse, keep):
+    """float64 values of the cells selected by keep parsed with parse (NaN elsewhere) and a mask of invalid cells"""
+    values = np.full(len(cells), np.nan)
+    bad = np.zeros(len(cells), dtype=bool)
+    try:
+        values[keep] = np.fromiter(map(parse, compress(cells, keep)), np.float64, int(keep.sum()))
+        return values, bad
+    except (TypeError, ValueError, OverflowError):
+        pass
+    # Some cell does not parse: parse each, with None marking the failures
+    parsed = list(map(_parse_or_none, repeat(parse), compress(cells, keep)))
+    kept = np.flatnonzero(keep)
+    failed = np.fromiter(map(is_, parsed, repeat(None)), bool, len(parsed))
+    bad[kept[failed]] = True
+    numbers = [np.nan if number is None else number for number in parsed]
+    try:
+        values[kept] = np.array(numbers, dtype=np.float64)
+    except OverflowError:
+        # An int too large for a float still compares like one
+        values[kept] = [number if abs(number) < 1e308 else np.inf if number > 0 else -np.inf for number in numbers]
+    return values, bad
+
+
+def _parse_or_none(parse, cell):
+    try:
+        return parse(cell)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def record_column(records, field):
+    """(values, present, bad) for one field of a list of dicts
+
+    Cells are read the way calculate_health_risk reads them, with int() for
+    INT_FIELDS and float() otherwise, so a cell it would reject is flagged in
+    ``bad``. An absent key or an empty string is missing (not ``present``).
+    Columns without strings or None skip the per-cell parse.
+    """
+    # map(dict.get, ...) reads the field without a Python-level loop
+    cells = list(map(dict.get, records, repeat(field), repeat(_ABSENT)))
+    integral = field in INT_FIELDS
+    values = None
+    # fromiter converts with float() semantics, which is also right for
+    # int() on numbers (the thresholds truncate) but not on strings
+    if not integral or set(map(type, cells)) <= _NUMBER_TYPES:
+        try:
+            values = np.fromiter(cells, np.float64, len(cells))
+        except (TypeError, ValueError, OverflowError):
+            pass
+    if values is not None:
+        present = np.ones(len(cells), dtype=bool)
+        missing = np.flatnonzero(np.isnan(values))
+        if len(missing):
+            # NaN is either an absent key or a NaN cell, which int() rejects
+            present[missing] = np.fromiter(map(is_not, map(cells.__getitem__, missing.tolist()), repeat(_ABSENT)),
+                                           bool, len(missing))
+        bad = present & ~np.isfinite(values) if integral else np.zeros(len(cells), dtype=bool)
+        return values, present, bad
+    present = np.fromiter(map(is_not, cells, repeat(_ABSENT)), bool, len(cells))
+    present &= np.fromiter(map(ne, cells, repeat('')), bool, len(cells))
+    values, bad = parse_cells(cells, int if integral else float, present)
+    return values, present, bad
+
+
+def _record_id(record):
+    for field in ID_FIELDS:
+        if record.get(field) not in (None, ''):
+            return record[field]
+    return None
+
+
+def score_chunk(records, first_row=0):
+    """Result dicts for a list of records"""
+    errors = [None] * len(records)
+    if not all(map(isinstance, records, repeat(dict))):
+        errors = ["record must be an object" if not isinstance(record, dict) else None for record in records]
+        records = [record if isinstance(record, dict) else {} for record in records]
+    columns = {}
+    present = {}
+    bad = {}
+    for field in FIELDS:
+        columns[field], present[field], bad[field] = record_column(records, field)
+    # Reported in the order calculate_health_risk would raise: BMI first (only
+    # when both fields are given), then the int fields
+    weight, height = columns['weight'], columns['height']
+    has_bmi = present['weight'] & present['height']
+    checks = [(has_bmi & bad['weight'], "invalid weight"), (has_bmi & bad['height'], "invalid height")]
+    with np.errstate(over='ignore', under='ignore', invalid='ignore'):
+        zero = has_bmi & ~bad['weight'] & ~bad['height'] & ((height / 100) * (height / 100) == 0)
+    checks.append((zero, "height must not be zero"))
+    checks.extend((bad[field], f"invalid {field}") for field in INT_FIELDS)
+    for mask, message in checks:
+        for i in np.flatnonzero(mask):
+            errors[i] = errors[i] or message
+
+    scores = risk_scores(weight, height, columns['blood_pressure_systolic'],
+                         columns['heart_rate'], columns['glucose_level'])
+    levels = risk_levels(scores).tolist()
+    scores = scores.tolist()
+    ids = list(map(dict.get, records, repeat('id')))
+    for i, record_id in enumerate(ids):
+        if record_id is None or record_id == '':
+            ids[i] = _record_id(records[i])
+    rows = range(first_row, first_row + len(records))
+    if not any(errors):
+        return [{'row': row, 'id': record_id, 'risk_score': score, 'risk_level': level}
+                for row, record_id, score, level in zip(rows, ids, scores, levels)]
+    return [{'row': row, 'id': record_id, 'error': error} if error else
+            {'row': row, 'id': record_id, 'risk_score': score, 'risk_level': level}
+            for row, record_id, score, level, error in zip(rows, ids, scores, levels, errors)]
+
+
+def score_records(records, chunk_rows=CHUNK_ROWS):
+    """Score an iterable of record dicts, yielding one result dict per record"""
+    chunk = []
+    first_row = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_rows:
+            yield from score_chunk(chunk, first_row)
+            first_row += len(chunk)
+            chunk = []
+    if chunk:
+        yield from score_chunk(chunk, first_row)
+
+
+def read_csv_records(text_stream):
+    """DictReader over a CSV text stream; raises ValueError if no risk column is present"""
+    reader = csv.DictReader(text_stream)
+    fieldnames = [name.strip() for name in reader.fieldnames or []]
+    if not any(field in fieldnames for field in FIELDS):
+        raise ValueError(f"CSV needs at least one of the columns: {', '.join(FIELDS)}")
+    reader.fieldnames = fieldnames
+    return reader
+
+
+def read_json_records(data):
+    """Records from a JSON list or a {"records": [...]} object"""
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError('JSON input must be a list of records or {"records": [...]}')
+    return data
+
+
+def ndjson_lines(results):
+    for result in results:
+        yield json.dumps(result) + '\n'
+
+
+def csv_lines(results):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, OUTPUT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for count, result in enumerate(results, 1):
+        writer.writerow(result)
+        if count % 1000 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score health risk for a CSV or JSON file of records')
+    parser.add_argument('input', help="CSV or JSON file, or '-' for CSV on stdin")
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    args = parser.parse_args(argv)
+
+    with open(args.input, newline='') if args.input != '-' else sys.stdin as source:
+        if args.input.lower().endswith('.json'):
+            records = read_json_records(json.load(source))
+        else:
+            records = read_csv_records(source)
+        lines = (csv_lines if args.format == 'csv' else ndjson_lines)(score_records(records))
+        with open(args.output, 'w', newline='') if args.output else sys.stdout as out:
+            for line in lines:
+                out.write(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -83,14 +83,26 @@ async function handleChatSubmit(e) {
     showTypingIndicator();
     
     try {
-        const response = await apiRequest('/api/chat', {
-            method: 'POST',
-            body: JSON.stringify({ message })
+        let streamedText = '';
+        let messageBubble = null;
+        const response = await streamChatResponse(message, function(token) {
+            if (!messageBubble) {
+                removeTypingIndicator();
+                addMessageToChat('', 'assistant');
+                messageBubble = document.querySelector('#chatMessages .assistant-message:last-child .message-bubble');
+            }
+            streamedText += token;
+            messageBubble.innerHTML = formatMessage(sanitizeHTML(streamedText));
+            scrollToBottom();
         });
         
-        if (response.success) {
-            removeTypingIndicator();
-            addMessageToChat(sanitizeHTML(response.response), 'assistant');
+        if (response && response.success) {
+            if (!messageBubble) {
+                removeTypingIndicator();
+                addMessageToChat(sanitizeHTML(response.response), 'assistant');
+            } else {
+                chatMessages[chatMessages.length - 1].message = sanitizeHTML(response.response);
+            }
             saveChatToStorage();
             if (isVoiceActive && synthesis && 'speechSynthesis' in window) {
                 speakText(response.response);
@@ -106,6 +118,40 @@ async function handleChatSubmit(e) {
     }
 }
 
+// Stream the assistant's answer as NDJSON lines, calling onToken for each token.
+// Resolves with the final {done, success, response, timestamp} line.
+async function streamChatResponse(message, onToken) {
+    const response = await fetch('/api/chat', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message, stream: true })
+    });
+    
+    if (!response.ok || !response.body) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const event = JSON.parse(line);
+            if (event.token) onToken(event.token);
+            if (event.done) result = event;
+        }
+    }
+    return result;
+}
+
 function handleInputChange(e) {
     const input = e.target;
     const charCount = input.value.length;
@@ -410,11 +456,11 @@ async function loadChatHistory() {
     }
     
     try {
-        const response = await apiRequest('/api/chat/history');
-        if (response && response.length > 0) {
-            chatMessages = response;
+        const response = await apiRequest('/api/chat/history?limit=50');
+        if (response && response.messages && response.messages.length > 0) {
+            chatMessages = response.messages;
             saveChatToStorage();
-            displayChatHistory(response.slice(-20));
+            displayChatHistory(response.messages.slice(-20));
         }
     } catch (error) {
         console.error('Error loading chat history:', error);
@@ -289,6 +289,8 @@ async function handleHealthDataSubmit(e) {
         if (response.success) {
             showNotification(`${response.message}${response.points_earned ? ` (+${response.points_earned} points!)` : ''}`, 'success');
             closeModal('healthDataModal');
+            removeFromStorage('health_data');
+            healthHistory = null;
             loadHealthData(); // Reload to show updated data
             loadUserProfile(); // Reload to show updated points
         } else {
@@ -350,35 +352,52 @@ async function handleProfileSubmit(e) {
 }
 
 // Chart Creation with Accessibility
-function createHealthCharts(data) {
-    createBloodPressureChart(data);
-    createWeightChart(data);
+let healthHistory = null;
+
+// Daily rollups for both charts come from a single request
+async function createHealthCharts(data) {
+    if (!window.Chart) return;
+    try {
+        if (!healthHistory) {
+            healthHistory = await apiRequest('/api/health-data/history?resolution=day');
+        }
+    } catch (error) {
+        console.error('Error loading health history:', error);
+        return;
+    }
+    if (!healthHistory || !healthHistory.success) return;
+    createBloodPressureChart(data, healthHistory);
+    createWeightChart(data, healthHistory);
 }
 
-function createBloodPressureChart(data) {
+// Dates and per-day means of the given metrics, skipping days without readings
+function historyPoints(history, metrics) {
+    const dates = [];
+    const values = metrics.map(() => []);
+    history.timestamps.forEach((timestamp, i) => {
+        if (metrics.every(metric => history.metrics[metric].mean[i] === null)) return;
+        dates.push(new Date(timestamp).toLocaleDateString());
+        metrics.forEach((metric, j) => values[j].push(history.metrics[metric].mean[i]));
+    });
+    return { dates, values };
+}
+
+function createBloodPressureChart(data, history) {
     const ctx = document.getElementById('bpChart');
-    if (!ctx || !data.blood_pressure_systolic) return;
+    if (!ctx) return;
+    
+    const points = historyPoints(history, ['blood_pressure_systolic', 'blood_pressure_diastolic']);
+    if (!points.dates.length) return;
     
     // Destroy existing chart
     if (healthChart) {
         healthChart.destroy();
     }
     
-    // Generate sample trend data (replace with server-side historical data in production)
-    const dates = [];
-    const systolicData = [];
-    const diastolicData = [];
-    
-    for (let i = 6; i >= 0; i--) {
-        const date = new Date();
-        date.setDate(date.getDate() - i);
-        dates.push(date.toLocaleDateString());
-        const variation = (Math.random() - 0.5) * 20;
-        systolicData.push(Math.max(90, parseInt(data.blood_pressure_systolic) + variation));
-        diastolicData.push(Math.max(60, parseInt(data.blood_pressure_diastolic || 80) + variation * 0.7));
-    }
+    const dates = points.dates;
+    const [systolicData, diastolicData] = points.values;
     
-    ctx.setAttribute('aria-label', 'Blood Pressure Trend Chart for Last 7 Days');
+    ctx.setAttribute('aria-label', 'Blood Pressure Trend Chart for Last 30 Days');
     ctx.setAttribute('role', 'img');
     
     healthChart = new Chart(ctx, {
@@ -404,7 +423,7 @@ function createBloodPressureChart(data) {
             plugins: {
                 title: {
                     display: true,
-                    text: 'Blood Pressure Trend (Last 7 Days)'
+                    text: 'Blood Pressure Trend (Last 30 Days)'
                 },
                 tooltip: {
                     callbacks: {
@@ -433,38 +452,31 @@ function createBloodPressureChart(data) {
     const description = document.createElement('div');
     description.id = 'bpChartDescription';
     description.style.display = 'none';
-    description.textContent = 'Line chart showing systolic and diastolic blood pressure trends over the last 7 days, measured in mmHg.';
+    description.textContent = 'Line chart showing systolic and diastolic blood pressure trends over the last 30 days (daily averages), measured in mmHg.';
     ctx.parentNode.appendChild(description);
 }
 
-function createWeightChart(data) {
+function createWeightChart(data, history) {
     const ctx = document.getElementById('weightChart');
-    if (!ctx || !data.weight) return;
+    if (!ctx) return;
+    
+    const points = historyPoints(history, ['weight']);
+    if (!points.dates.length) return;
     
     // Destroy existing chart
     if (trendChart) {
         trendChart.destroy();
     }
     
-    // Generate sample trend data
-    const dates = [];
-    const weightData = [];
+    const dates = points.dates;
+    const weightData = points.values[0];
     const bmiData = [];
-    
-    for (let i = 6; i >= 0; i--) {
-        const date = new Date();
-        date.setDate(date.getDate() - i);
-        dates.push(date.toLocaleDateString());
-        const variation = (Math.random() - 0.5) * 4;
-        const weight = Math.max(30, parseFloat(data.weight) + variation);
-        weightData.push(weight);
-        if (data.height) {
-            const height = parseFloat(data.height) / 100;
-            bmiData.push(weight / (height * height));
-        }
+    if (data.height) {
+        const height = parseFloat(data.height) / 100;
+        weightData.forEach(weight => bmiData.push(weight === null ? null : weight / (height * height)));
     }
     
-    ctx.setAttribute('aria-label', 'Weight and BMI Trend Chart for Last 7 Days');
+    ctx.setAttribute('aria-label', 'Weight and BMI Trend Chart for Last 30 Days');
     ctx.setAttribute('role', 'img');
     
     trendChart = new Chart(ctx, {
@@ -492,7 +504,7 @@ function createWeightChart(data) {
             plugins: {
                 title: {
                     display: true,
-                    text: 'Weight & BMI Trend (Last 7 Days)'
+                    text: 'Weight & BMI Trend (Last 30 Days)'
                 },
                 tooltip: {
                     callbacks: {
@@ -535,7 +547,7 @@ function createWeightChart(data) {
     const description = document.createElement('div');
     description.id = 'weightChartDescription';
     description.style.display = 'none';
-    description.textContent = 'Line chart showing weight and BMI trends over the last 7 days, with weight in kilograms and BMI in kg/m².';
+    description.textContent = 'Line chart showing weight and BMI trends over the last 30 days (daily averages), with weight in kilograms and BMI in kg/m².';
     ctx.parentNode.appendChild(description);
 }
 
@@ -0,0 +1,669 @@
+"""Pluggable storage layer for users, health data, chat history and recommendations.
+
+Two backends are available:
+
+* ``SQLiteStorage`` (default) keeps one keyed table per data set in an
+  embedded SQLite database running in WAL mode, so a request only reads and
+  writes the rows of the user it is serving.
+* ``JsonStorage`` keeps the original whole-file JSON layout in ``data/``.
+  Every read parses a whole table file, so its operations, including the
+  email lookup behind login and signup, are O(users).
+
+Chat history is an append-only log per user rather than one document: a
+``chat_messages`` table in SQLite, or one JSONL file per user in
+``data/chat/`` for the JSON backend. Each message gets a per-user sequence
+id that serves as the pagination cursor, appends never rewrite earlier
+messages, and every ``CHAT_COMPACT_EVERY`` appends the log is compacted to
+the newest ``CHAT_KEEP`` messages.
+
+The JSON files remain the import/export format. Migrate existing data with::
+
+    python storage.py migrate
+    python storage.py export
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+
+from metrics import span, timed
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'data'
+JSON_FILES = {
+    'users': os.path.join(DATA_DIR, 'users.json'),
+    'health_data': os.path.join(DATA_DIR, 'health_data.json'),
+    'chat_history': os.path.join(DATA_DIR, 'chat_history.json'),
+    'recommendations': os.path.join(DATA_DIR, 'recommendations.json'),
+    'health_series': os.path.join(DATA_DIR, 'health_series.json'),
+    'job_outbox': os.path.join(DATA_DIR, 'job_outbox.json'),
+}
+SQLITE_FILE = os.path.join(DATA_DIR, 'healthcare.db')
+CHAT_DIR = os.path.join(DATA_DIR, 'chat')
+CHAT_TABLE = 'chat_history'
+CHAT_KEEP = 1000
+CHAT_COMPACT_EVERY = 100
+CHAT_PAGE_SIZE = 50
+# Writes to these tables bump the user's version (see get_version)
+VERSIONED_TABLES = ('users', 'health_data', 'recommendations')
+
+
+class StorageError(Exception):
+    """Raised when a storage backend fails to persist data"""
+
+
+class DuplicateEmailError(StorageError):
+    """Raised when an email address is already registered to another user"""
+
+
+def normalize_email(email):
+    """Canonical form of an email address used for lookups and uniqueness"""
+    return (email or '').strip().lower()
+
+
+@timed('storage', 'load_json')
+def load_json_file(filepath, default=None):
+    """Load JSON file with error handling"""
+    if default is None:
+        default = {}
+    try:
+        if os.path.exists(filepath):
+            with open(filepath, 'r') as f:
+                return json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Corrupted JSON file {filepath}: {str(e)}")
+        return default
+    except Exception as e:
+        logger.error(f"Error loading {filepath}: {str(e)}")
+        return default
+    return default
+
+
+@timed('storage', 'save_json')
+def save_json_file(filepath, data):
+    """Save data to JSON file, replacing it atomically"""
+    tmp_path = f"{filepath}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, filepath)
+        logger.debug(f"Successfully saved data to {filepath}")
+        return True
+    except Exception as e:
+        logger.error(f"Error saving {filepath}: {str(e)}")
+        return False
+
+
+def _parse_chat_line(line):
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        # Blank or partially written line
+        return None
+    return entry if isinstance(entry, dict) and 'id' in entry else None
+
+
+def _chat_entry(id, value):
+    return dict(json.loads(value), id=id)
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+class Storage:
+    """Keyed storage of one JSON document per user and table"""
+
+    tables = tuple(JSON_FILES)
+    # Whether get_version sees writes made by other processes
+    shared_versions = True
+
+    def _check_table(self, table):
+        if table not in self.tables:
+            raise ValueError(f"Unknown storage table: {table}")
+
+    def get(self, table, key, default=None):
+        """Return the document stored under key, or default"""
+        raise NotImplementedError
+
+    def put(self, table, key, value):
+        """Store value under key, replacing any previous document"""
+        raise NotImplementedError
+
+    def delete(self, table, key):
+        """Remove the document stored under key if present"""
+        raise NotImplementedError
+
+    def load_all(self, table):
+        """Return every document of a table as a dict keyed by user"""
+        raise NotImplementedError
+
+    def transaction(self):
+        """Context manager grouping several writes so they are applied atomically"""
+        raise NotImplementedError
+
+    def append_chat(self, user_id, entry):
+        """Append one chat exchange to the user's log, returning it with its id"""
+        raise NotImplementedError
+
+    def get_version(self, key):
+        """(version, updated_at) of a user's documents in VERSIONED_TABLES, bumped on every write"""
+        raise NotImplementedError
+
+    def chat_page(self, user_id, before=None, limit=CHAT_PAGE_SIZE):
+        """Up to limit messages with an id below before (the newest if None), oldest first"""
+        raise NotImplementedError
+
+    def find_user_by_email(self, email):
+        """Return (user_id, user_info) for an email address, or (None, None)"""
+        # Scans every user; SQLiteStorage overrides this with its email index
+        email = normalize_email(email)
+        for user_id, user_info in self.load_all('users').items():
+            if normalize_email(user_info.get('email')) == email:
+                return user_id, user_info
+        return None, None
+
+    def create_user(self, user_id, user_info):
+        """Store a new user, raising DuplicateEmailError if the email is taken"""
+        with self.transaction():
+            if self.find_user_by_email(user_info['email'])[0] is not None:
+                raise DuplicateEmailError(f"Email already registered: {user_info['email']}")
+            self.put('users', user_id, user_info)
+
+    def import_json(self, files=None):
+        """Import the JSON files into this backend, returning per-table counts"""
+        files = files or JSON_FILES
+        counts = {}
+        with self.transaction():
+            for table in self.tables:
+                if table not in files:
+                    continue
+                documents = load_json_file(files[table], {})
+                for key, value in documents.items():
+                    self.put(table, key, value)
+                counts[table] = len(documents)
+        return counts
+
+    def export_json(self, files=None):
+        """Write every table out to its JSON file, returning per-table counts"""
+        files = files or JSON_FILES
+        counts = {}
+        for table in self.tables:
+            if table not in files:
+                continue
+            documents = self.load_all(table)
+            if not save_json_file(files[table], documents):
+                raise StorageError(f"Failed to export {table} to {files[table]}")
+            counts[table] = len(documents)
+        return counts
+
+
+class JsonStorage(Storage):
+    """Original storage format: one JSON file per table, rewritten on every change"""
+
+    shared_versions = False
+
+    def __init__(self, files=None, chat_dir=CHAT_DIR):
+        self.files = dict(files or JSON_FILES)
+        self.chat_dir = chat_dir
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        # Versions live in this process's memory and miss other processes'
+        # writes, so callers must not use them to skip reloads or answer 304s
+        self._versions = {}
+        if not os.path.isdir(chat_dir):
+            os.makedirs(chat_dir)
+            # First start with chat logs: move the old whole-file history over
+            for user_id, entries in load_json_file(self.files[CHAT_TABLE], {}).items():
+                self._write_chat(user_id, entries)
+
+    def _load(self, table):
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None and table in pending:
+            return pending[table]
+        data = load_json_file(self.files[table], {})
+        if pending is not None:
+            pending[table] = data
+        return data
+
+    def _save(self, table, data):
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            pending[table] = data
+            self._local.dirty.add(table)
+            return
+        if not save_json_file(self.files[table], data):
+            raise StorageError(f"Failed to save {self.files[table]}")
+
+    def get(self, table, key, default=None):
+        self._check_table(table)
+        with self._lock:
+            if table == CHAT_TABLE:
+                entries = list(reversed(list(self._chat_entries(key))))
+                return entries or default
+            return self._load(table).get(key, default)
+
+    def put(self, table, key, value):
+        self._check_table(table)
+        with self._lock:
+            if table == CHAT_TABLE:
+                self._write_chat(key, value)
+                return
+            data = self._load(table)
+            data[key] = value
+            self._save(table, data)
+            if table in VERSIONED_TABLES:
+                self._bump_version(key)
+
+    def delete(self, table, key):
+        self._check_table(table)
+        with self._lock:
+            if table == CHAT_TABLE:
+                if os.path.exists(self._chat_path(key)):
+                    os.remove(self._chat_path(key))
+                return
+            data = self._load(table)
+            if data.pop(key, None) is not None:
+                self._save(table, data)
+                if table in VERSIONED_TABLES:
+                    self._bump_version(key)
+
+    def _bump_version(self, key):
+        version = self._versions.get(key, (0, None))[0]
+        self._versions[key] = (version + 1, datetime.now(timezone.utc))
+
+    def get_version(self, key):
+        with self._lock:
+            return self._versions.get(key, (0, None))
+
+    def load_all(self, table):
+        self._check_table(table)
+        with self._lock:
+            if table == CHAT_TABLE:
+                users = sorted(unquote(name[:-len('.jsonl')]) for name in os.listdir(self.chat_dir)
+                               if name.endswith('.jsonl'))
+                return {user_id: self.get(CHAT_TABLE, user_id, []) for user_id in users}
+            return dict(self._load(table))
+
+    def _chat_path(self, user_id):
+        return os.path.join(self.chat_dir, f"{quote(user_id, safe='')}.jsonl")
+
+    def _chat_entries(self, user_id, block_size=8192):
+        """Parsed messages of a user's log, newest first, read backwards in blocks"""
+        path = self._chat_path(user_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                size = min(block_size, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + tail).split(b'\n')
+                tail = lines.pop(0)
+                for line in reversed(lines):
+                    entry = _parse_chat_line(line)
+                    if entry is not None:
+                        yield entry
+            entry = _parse_chat_line(tail)
+            if entry is not None:
+                yield entry
+
+    def _write_chat(self, user_id, entries):
+        """Replace a user's log with entries, numbering any that lack an id"""
+        path = self._chat_path(user_id)
+        tmp_path = f"{path}.tmp"
+        next_id = 1
+        try:
+            with open(tmp_path, 'w') as f:
+                for entry in entries:
+                    entry = dict(entry, id=entry.get('id', next_id))
+                    next_id = entry['id'] + 1
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            raise StorageError(f"Failed to save chat log {path}: {str(e)}") from e
+
+    @timed('storage')
+    def append_chat(self, user_id, entry):
+        with self._lock:
+            last = next(self._chat_entries(user_id), None)
+            entry = dict(entry, id=last['id'] + 1 if last else 1)
+            path = self._chat_path(user_id)
+            try:
+                with open(path, 'ab') as f:
+                    # Start on a fresh line if a previous write was cut short
+                    if f.tell() and not _ends_with_newline(path):
+                        f.write(b'\n')
+                    f.write(json.dumps(entry).encode('utf-8') + b'\n')
+            except OSError as e:
+                raise StorageError(f"Failed to append to chat log {path}: {str(e)}") from e
+            if entry['id'] % CHAT_COMPACT_EVERY == 0:
+                entries = list(self._chat_entries(user_id))[:CHAT_KEEP]
+                self._write_chat(user_id, reversed(entries))
+            return entry
+
+    @timed('storage')
+    def chat_page(self, user_id, before=None, limit=CHAT_PAGE_SIZE):
+        with self._lock:
+            page = []
+            for entry in self._chat_entries(user_id):
+                if len(page) == limit:
+                    break
+                if before is None or entry['id'] < before:
+                    page.append(entry)
+            return page[::-1]
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            if getattr(self._local, 'pending', None) is not None:
+                yield
+                return
+            self._local.pending = {}
+            self._local.dirty = set()
+            try:
+                yield
+                pending, dirty = self._local.pending, self._local.dirty
+                self._local.pending = None
+                for table in dirty:
+                    self._save(table, pending[table])
+            finally:
+                self._local.pending = None
+                self._local.dirty = set()
+
+
+class SQLiteStorage(Storage):
+    """Embedded SQLite backend with one keyed row per user and table
+
+    A ``user_emails`` table maps normalized email addresses to user ids. It is
+    maintained on every write to ``users`` and its primary key enforces
+    uniqueness, so login and signup never scan other users' records.
+    """
+
+    def __init__(self, path=SQLITE_FILE, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._connection()
+        with self.transaction():
+            legacy_chat = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHAT_TABLE,)
+            ).fetchone()
+            for table in self.tables:
+                if table == CHAT_TABLE:
+                    continue
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TEXT NOT NULL)"
+                )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                "key TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_messages ("
+                "user_id TEXT NOT NULL, id INTEGER NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, id)) WITHOUT ROWID"
+            )
+            if legacy_chat:
+                # Chat history used to be one keyed document per user
+                for key, value in conn.execute(f"SELECT key, value FROM {CHAT_TABLE}").fetchall():
+                    self._write_chat(key, json.loads(value))
+                conn.execute(f"DROP TABLE {CHAT_TABLE}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_emails ("
+                "email TEXT PRIMARY KEY, user_id TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS user_emails_user_id ON user_emails (user_id)")
+            if conn.execute("SELECT 1 FROM user_emails LIMIT 1").fetchone() is None:
+                self._rebuild_email_index()
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @timed('storage')
+    def get(self, table, key, default=None):
+        self._check_table(table)
+        if table == CHAT_TABLE:
+            rows = self._connection().execute(
+                "SELECT id, value FROM chat_messages WHERE user_id = ? ORDER BY id", (key,)
+            ).fetchall()
+            return [_chat_entry(id, value) for id, value in rows] or default
+        row = self._connection().execute(
+            f"SELECT value FROM {table} WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    @timed('storage')
+    def put(self, table, key, value):
+        self._check_table(table)
+        try:
+            with self.transaction():
+                if table == CHAT_TABLE:
+                    self._write_chat(key, value)
+                    return
+                if table == 'users':
+                    self._index_email(key, value.get('email'),
+                                      strict=not getattr(self._local, 'importing', False))
+                self._connection().execute(
+                    f"INSERT INTO {table} (key, value, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    (key, json.dumps(value), datetime.now().isoformat())
+                )
+                if table in VERSIONED_TABLES:
+                    self._bump_version(key)
+        except sqlite3.Error as e:
+            raise StorageError(f"Failed to save {table}/{key}: {str(e)}") from e
+
+    @timed('storage')
+    def delete(self, table, key):
+        self._check_table(table)
+        with self.transaction():
+            conn = self._connection()
+            if table == CHAT_TABLE:
+                conn.execute("DELETE FROM chat_messages WHERE user_id = ?", (key,))
+                return
+            if table == 'users':
+                conn.execute("DELETE FROM user_emails WHERE user_id = ?", (key,))
+            if conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,)).rowcount and table in VERSIONED_TABLES:
+                self._bump_version(key)
+
+    def _bump_version(self, key):
+        self._connection().execute(
+            "INSERT INTO versions (key, version, updated_at) VALUES (?, 1, ?) "
+            "ON CONFLICT(key) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+            (key, datetime.now(timezone.utc).isoformat())
+        )
+
+    @timed('storage')
+    def get_version(self, key):
+        row = self._connection().execute(
+            "SELECT version, updated_at FROM versions WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], datetime.fromisoformat(row[1])) if row else (0, None)
+
+    def _write_chat(self, user_id, entries):
+        """Replace a user's chat log with entries, numbering any that lack an id"""
+        conn = self._connection()
+        conn.execute("DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+        next_id = 1
+        for entry in entries:
+            entry = dict(entry)
+            entry_id = entry.pop('id', next_id)
+            next_id = entry_id + 1
+            conn.execute("INSERT INTO chat_messages (user_id, id, value) VALUES (?, ?, ?)",
+                         (user_id, entry_id, json.dumps(entry)))
+
+    @timed('storage')
+    def append_chat(self, user_id, entry):
+        try:
+            with self.transaction():
+                conn = self._connection()
+                last_id = conn.execute(
+                    "SELECT MAX(id) FROM chat_messages WHERE user_id = ?", (user_id,)
+                ).fetchone()[0] or 0
+                entry_id = last_id + 1
+                conn.execute("INSERT INTO chat_messages (user_id, id, value) VALUES (?, ?, ?)",
+                             (user_id, entry_id, json.dumps(entry)))
+                if entry_id % CHAT_COMPACT_EVERY == 0:
+                    conn.execute("DELETE FROM chat_messages WHERE user_id = ? AND id <= ?",
+                                 (user_id, entry_id - CHAT_KEEP))
+        except sqlite3.Error as e:
+            raise StorageError(f"Failed to append chat message for {user_id}: {str(e)}") from e
+        return dict(entry, id=entry_id)
+
+    @timed('storage')
+    def chat_page(self, user_id, before=None, limit=CHAT_PAGE_SIZE):
+        rows = self._connection().execute(
+            "SELECT id, value FROM chat_messages WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (user_id, before if before is not None else 2 ** 63 - 1, limit)
+        ).fetchall()
+        return [_chat_entry(id, value) for id, value in reversed(rows)]
+
+    def _index_email(self, user_id, email, strict=True):
+        """Point the normalized email at user_id, dropping any previous address"""
+        email = normalize_email(email)
+        conn = self._connection()
+        row = conn.execute("SELECT user_id FROM user_emails WHERE email = ?", (email,)).fetchone()
+        if row and row[0] == user_id:
+            return
+        if row:
+            if strict:
+                raise DuplicateEmailError(f"Email already registered: {email}")
+            logger.warning(f"Email {email} of user {user_id} is already indexed for {row[0]}, skipping")
+            return
+        conn.execute("DELETE FROM user_emails WHERE user_id = ?", (user_id,))
+        if email:
+            conn.execute("INSERT INTO user_emails (email, user_id) VALUES (?, ?)", (email, user_id))
+
+    def _rebuild_email_index(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM user_emails")
+        for key, value in conn.execute("SELECT key, value FROM users ORDER BY rowid").fetchall():
+            self._index_email(key, json.loads(value).get('email'), strict=False)
+
+    def import_json(self, files=None):
+        # Legacy JSON data may hold case-insensitive duplicates; keep the first
+        self._local.importing = True
+        try:
+            return super().import_json(files)
+        finally:
+            self._local.importing = False
+
+    @timed('storage')
+    def find_user_by_email(self, email):
+        row = self._connection().execute(
+            "SELECT users.key, users.value FROM user_emails "
+            "JOIN users ON users.key = user_emails.user_id WHERE user_emails.email = ?",
+            (normalize_email(email),)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(row[1])
+
+    def create_user(self, user_id, user_info):
+        with self.transaction():
+            if self.get('users', user_id) is not None:
+                raise StorageError(f"User id already exists: {user_id}")
+            self.put('users', user_id, user_info)
+
+    @timed('storage')
+    def load_all(self, table):
+        self._check_table(table)
+        if table == CHAT_TABLE:
+            documents = {}
+            rows = self._connection().execute("SELECT user_id, id, value FROM chat_messages ORDER BY user_id, id")
+            for user_id, id, value in rows:
+                documents.setdefault(user_id, []).append(_chat_entry(id, value))
+            return documents
+        rows = self._connection().execute(f"SELECT key, value FROM {table} ORDER BY rowid")
+        return {key: json.loads(value) for key, value in rows}
+
+    def is_empty(self):
+        """Return True if no table holds any row"""
+        conn = self._connection()
+        tables = [table if table != CHAT_TABLE else 'chat_messages' for table in self.tables]
+        return not any(
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in tables
+        )
+
+    @contextmanager
+    def transaction(self):
+        conn = self._connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        # IMMEDIATE takes the write lock up front so read-modify-write
+        # sequences cannot interleave with other workers.
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            with span('storage', 'commit'):
+                conn.execute('COMMIT')
+        finally:
+            self._local.depth = 0
+
+
+def open_storage(backend=None):
+    """Open the storage backend selected by STORAGE_BACKEND ('sqlite' or 'json')"""
+    backend = (backend or os.getenv('STORAGE_BACKEND', 'sqlite')).lower()
+    if backend == 'json':
+        return JsonStorage()
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    path = os.getenv('STORAGE_PATH', SQLITE_FILE)
+    storage = SQLiteStorage(path)
+    if storage.is_empty() and any(os.path.exists(p) for p in JSON_FILES.values()):
+        counts = storage.import_json()
+        logger.info(f"Imported existing JSON data into {path}: {counts}")
+    return storage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Healthcare assistant storage tools')
+    parser.add_argument('command', choices=['migrate', 'export'],
+                        help='migrate: import the JSON files into SQLite; export: write SQLite back to JSON')
+    parser.add_argument('--db', default=os.getenv('STORAGE_PATH', SQLITE_FILE),
+                        help='SQLite database path')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    storage = SQLiteStorage(args.db)
+    if args.command == 'migrate':
+        counts = storage.import_json()
+        print(f"Migrated JSON files into {args.db}: {counts}")
+    else:
+        counts = storage.export_json()
+        print(f"Exported {args.db} to JSON files: {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Symptom-to-disease prediction over ``datasets/symbipredict_2022.csv``.
+
+The CSV has one 0/1 column per symptom and a ``prognosis`` label, read
+through its columnar cache (``dataset_catalog.py``). It is reduced once to a
+compact index that is saved to ``models/symptom_index.npz``
+and rebuilt only when the CSV's hash changes:
+
+* ``bits``: one packed uint64 bitset per disease, with every symptom seen
+  with that disease
+* ``weights``/``bias``: a Bernoulli Naive Bayes model (Laplace-smoothed
+  per-disease symptom frequencies) folded into one (symptoms, diseases)
+  matrix, so scoring a symptom set is a single matrix product
+
+``predict`` scores many symptom sets at once, either by Naive Bayes
+(posterior probabilities) or by Jaccard similarity of the bitsets.
+"""
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+from dataset_catalog import load_table
+from model_registry import file_sha256
+
+SYMPTOM_CSV = os.path.join('datasets', 'symbipredict_2022.csv')
+INDEX_FILE = os.path.join('models', 'symptom_index.npz')
+METHODS = ('bayes', 'jaccard')
+
+logger = logging.getLogger(__name__)
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    # NumPy < 2.0: count set bits a byte at a time with a lookup table
+    _BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        counts = _BYTE_BITS[words.view(np.uint8)]
+        return counts.reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class UnknownSymptomError(ValueError):
+    """Raised for symptom names that are not in the index"""
+
+    def __init__(self, symptoms):
+        super().__init__(f"Unknown symptom(s): {', '.join(symptoms)}")
+        self.symptoms = symptoms
+
+
+class SymptomIndexError(ValueError):
+    """Raised when the symptom CSV is malformed and no index can be built"""
+
+
+def normalize_symptom(name):
+    return re.sub(r'[\s_]+', '_', str(name).strip().lower())
+
+
+def pack_bits(matrix):
+    """(rows, n) 0/1 matrix to (rows, ceil(n / 64)) uint64 bitsets"""
+    matrix = np.asarray(matrix, dtype=bool)
+    words = -(-matrix.shape[1] // 64)
+    padded = np.zeros((matrix.shape[0], words * 64), dtype=bool)
+    padded[:, :matrix.shape[1]] = matrix
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64)
+
+
+class SymptomIndex:
+    """Precomputed disease bitsets and Naive Bayes weights"""
+
+    def __init__(self, symptoms, diseases, bits, weights, bias, source_hash=None):
+        self.symptoms = list(symptoms)
+        self.diseases = list(diseases)
+        self.bits = bits
+        self.weights = weights
+        self.bias = bias
+        self.source_hash = source_hash
+        self.positions = {name: i for i, name in enumerate(self.symptoms)}
+        self.disease_sizes = popcount(bits).sum(axis=1)
+
+    @classmethod
+    def build(cls, csv_path=SYMPTOM_CSV, alpha=1.0):
+        """Read the CSV's columnar cache and compute the index"""
+        table = load_table(csv_path)
+
+        # Some columns differ only in spacing or are repeated; merge them
+        symptoms = []
+        column_of = []
+        for name in table.header[:-1]:
+            name = normalize_symptom(name)
+            if name not in symptoms:
+                symptoms.append(name)
+            column_of.append(symptoms.index(name))
+
+        labels = [label.strip() for label in table.values(table.columns[-1])]
+        diseases = sorted(set(labels))
+        disease_of = {name: i for i, name in enumerate(diseases)}
+        raw = table.matrix(table.columns[:-1], dtype=np.float32) > 0
+        present = np.zeros((len(table), len(symptoms)), dtype=bool)
+        for column, symptom in enumerate(column_of):
+            present[:, symptom] |= raw[:, column]
+
+        y = np.array([disease_of[label] for label in labels])
+        row_counts = np.bincount(y, minlength=len(diseases)).astype(np.float64)
+        symptom_counts = np.zeros((len(diseases), len(symptoms)))
+        np.add.at(symptom_counts, y, present)
+
+        # log P(d) + sum_s log P(x_s | d) = bias_d + x . weights[:, d]
+        p = (symptom_counts + alpha) / (row_counts[:, None] + 2 * alpha)
+        weights = (np.log(p) - np.log1p(-p)).T.astype(np.float32)
+        bias = (np.log(row_counts / row_counts.sum()) + np.log1p(-p).sum(axis=1)).astype(np.float32)
+        bits = pack_bits(symptom_counts > 0)
+        return cls(symptoms, diseases, bits, weights, bias, table.source_hash)
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, symptoms=np.array(self.symptoms), diseases=np.array(self.diseases),
+                 bits=self.bits, weights=self.weights, bias=self.bias,
+                 source_hash=np.array(self.source_hash or ''))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            return cls(data['symptoms'].tolist(), data['diseases'].tolist(), data['bits'],
+                       data['weights'], data['bias'], str(data['source_hash']))
+
+    def encode(self, symptom_sets):
+        """0/1 float32 matrix and packed bitsets for a list of symptom name lists"""
+        dense = np.zeros((len(symptom_sets), len(self.symptoms)), dtype=np.float32)
+        unknown = []
+        for row, names in enumerate(symptom_sets):
+            for name in names:
+                position = self.positions.get(normalize_symptom(name))
+                if position is None:
+                    unknown.append(name)
+                else:
+                    dense[row, position] = 1.0
+        if unknown:
+            raise UnknownSymptomError(sorted(set(unknown)))
+        return dense, pack_bits(dense)
+
+    def scores(self, symptom_sets, method='bayes'):
+        """(sets, diseases) scores: NB posteriors or Jaccard similarities"""
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method}")
+        dense, packed = self.encode(symptom_sets)
+        if method == 'bayes':
+            logits = dense @ self.weights + self.bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        overlap = popcount(packed[:, None, :] & self.bits[None, :, :]).sum(axis=2)
+        # union = |query| + |disease| - overlap, with the diseases' sizes counted once at load
+        union = popcount(packed).sum(axis=1)[:, None] + self.disease_sizes[None, :] - overlap
+        return overlap / np.maximum(union, 1)
+
+    def predict(self, symptom_sets, top_k=5, method='bayes'):
+        """Top-k [{'disease', 'score'}] for each symptom set"""
+        scores = self.scores(symptom_sets, method)
+        k = min(top_k, len(self.diseases))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [{'disease': self.diseases[d], 'score': round(float(s), 4)} for d, s in zip(row, row_scores)]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+
+def load_symptom_index(csv_path=SYMPTOM_CSV, index_path=INDEX_FILE):
+    """Load the saved index, rebuilding and saving it if the CSV changed"""
+    source_hash = file_sha256(csv_path)
+    if os.path.exists(index_path):
+        try:
+            index = SymptomIndex.load(index_path)
+            if index.source_hash == source_hash:
+                return index
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable symptom index {index_path}: {str(e)}")
+    try:
+        index = SymptomIndex.build(csv_path)
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+        raise SymptomIndexError(f"Cannot build the symptom index from {csv_path}: {str(e)}") from e
+    index.save(index_path)
+    logger.info(f"Built symptom index: {len(index.symptoms)} symptoms, {len(index.diseases)} diseases")
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_symptom_index():
+    """Process-wide index, loaded on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_symptom_index()
+    return _index
@@ -0,0 +1,49 @@
+"""Train the AI models outside the web server.
+
+Only models whose datasets, hyperparameters or trainer code changed since
+their artifact was produced are retrained::
+
+    python train.py              # train whatever is out of date
+    python train.py rnn sarsa    # consider only these models
+    python train.py --force      # retrain regardless of fingerprints
+    python train.py --status     # show the registry state
+    python train.py rnn --rnn-csv exercise_dataset.csv --rnn-columns "Actual Weight,BMI"
+"""
+import argparse
+import json
+import logging
+
+
+def main(argv=None):
+    from ml import model_registry, RNN_PARAMS
+
+    parser = argparse.ArgumentParser(description='Train healthcare assistant models')
+    parser.add_argument('models', nargs='*',
+                        help=f"models to train: {', '.join(model_registry.specs)} (default: all)")
+    parser.add_argument('--force', action='store_true', help='retrain even if the artifact is current')
+    parser.add_argument('--status', action='store_true', help='print registry status and exit')
+    parser.add_argument('--rnn-csv', help='CSV file in datasets/ for the RNN (default: first CSV)')
+    parser.add_argument('--rnn-columns',
+                        help='comma-separated numeric columns for the RNN; the first is predicted')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.models if name not in model_registry.specs]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+
+    if args.rnn_csv:
+        RNN_PARAMS['csv_file'] = args.rnn_csv
+    if args.rnn_columns:
+        RNN_PARAMS['columns'] = [column.strip() for column in args.rnn_columns.split(',')]
+
+    logging.basicConfig(level=logging.INFO)
+    if args.status:
+        print(json.dumps(model_registry.status(), indent=2))
+        return
+
+    results = model_registry.train_all(args.models or None, force=args.force)
+    for name, result in results.items():
+        print(f"{name}: {result}")
+
+
+if __name__ == '__main__':
+    main()
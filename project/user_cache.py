@@ -0,0 +1,75 @@
+"""Per-user read-through cache of the documents behind the page views.
+
+``documents(user_id, tables)`` returns the user's documents from
+``storage.VERSIONED_TABLES``, loading each from storage at most once per
+version. Every write to those tables bumps the user's version in storage (in
+the same transaction), so a cached entry is used only while its version is
+still current. With the SQLite backend this holds across worker processes
+too: checking the version is one primary-key lookup, far cheaper than loading
+and parsing the documents. The JSON backend only counts its own process's
+writes, so with it every call loads from storage and nothing is cached.
+Returned documents are shared between requests and must be treated as
+read-only.
+
+``USER_CACHE_SIZE`` (default 1024) caps the number of users kept, least
+recently used first out.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from storage import VERSIONED_TABLES
+
+
+class UserDataCache:
+    """LRU of {table: document} per user, keyed on the user's storage version"""
+
+    def __init__(self, storage, max_users=1024):
+        self.storage = storage
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, storage):
+        return cls(storage, max_users=int(os.getenv('USER_CACHE_SIZE', 1024)))
+
+    def version(self, user_id):
+        """(version, updated_at) of the user's documents"""
+        return self.storage.get_version(user_id)
+
+    def documents(self, user_id, tables=VERSIONED_TABLES, version=None):
+        """{table: document or None} for the requested tables"""
+        if not self.storage.shared_versions:
+            return {table: self.storage.get(table, user_id) for table in tables}
+        if version is None:
+            # Read the version before the documents: a write in between makes
+            # the entry newer than its version, never older
+            version = self.version(user_id)[0]
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry['version'] != version:
+                entry = {'version': version, 'docs': {}}
+                self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            missing = [table for table in tables if table not in entry['docs']]
+            if missing:
+                self.misses += 1
+            else:
+                self.hits += 1
+        loaded = {table: self.storage.get(table, user_id) for table in missing}
+        with self._lock:
+            entry['docs'].update(loaded)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return {table: entry['docs'][table] for table in tables}
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def metrics(self):
+        with self._lock:
+            return {'users': len(self._entries), 'hits': self.hits, 'misses': self.misses}